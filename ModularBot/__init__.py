@@ -2,3 +2,6 @@ from .util import ModularUtil as ModularUtil
 from .auto_react import Reaction as Reaction
 from .command import setup as setup
 from .prayers import Prayers as Prayers
+from .analytics import AnalyticsPublisher as AnalyticsPublisher
+from .counters import RoleCounter as RoleCounter
+from .lockdown import LockdownEngine as LockdownEngine
@@ -0,0 +1,61 @@
+from asyncio import Task, create_task, sleep
+
+from discord import HTTPException
+from discord.abc import GuildChannel
+
+from .rate_budget import RateBudget
+from .util import ModularUtil
+
+
+class AnalyticsPublisher:
+	"""Rename analytics channel only when its value changed.
+
+	Burst of update is debounced and only the latest name is kept, each channel
+	is renamed within its own budget since Discord allow about two rename per
+	ten minute per channel.
+	"""
+
+	def __init__(self, *, rate: int, per: float, debounce: float) -> None:
+		self.__budget: RateBudget = RateBudget(rate, per)
+		self.__debounce: float = debounce
+
+		self.__published: dict[int, str] = dict()
+		self.__pending: dict[int, tuple[GuildChannel, str]] = dict()
+		self.__tasks: dict[int, Task] = dict()
+
+	def publish(self, channel: GuildChannel | None, name: str) -> None:
+		if channel is None:
+			return
+
+		self.__published.setdefault(channel.id, channel.name)
+
+		# TODO Back to what is shown, nothing to send
+		if self.__published[channel.id] == name:
+			self.__pending.pop(channel.id, None)
+			return
+
+		self.__pending[channel.id] = (channel, name)
+
+		task: Task | None = self.__tasks.get(channel.id)
+		if task is None or task.done():
+			self.__tasks[channel.id] = create_task(self.__run(channel.id))
+
+	async def __run(self, channel_id: int) -> None:
+		await sleep(self.__debounce)
+
+		while channel_id in self.__pending:
+			if delay := self.__budget.delay(channel_id):
+				await sleep(delay)
+				continue
+
+			channel, name = self.__pending.pop(channel_id)
+			if self.__published.get(channel_id) == name:
+				continue
+
+			self.__budget.try_acquire(channel_id)
+
+			try:
+				await channel.edit(name=name)
+				self.__published[channel_id] = name
+			except HTTPException as e:
+				ModularUtil.error_log(f"Failed to rename channel {channel_id}, {e}")
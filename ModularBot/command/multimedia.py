@@ -1,7 +1,7 @@
 from asyncio import wait, create_task
 
 from discord import Interaction, Embed
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.app_commands import (
 	Choice,
 	CheckFailure,
@@ -10,13 +10,20 @@ from discord.app_commands import (
 	choices,
 	command,
 	guild_only,
+	checks,
 )
 from discord.ui import View
 
-from wavelink import Playable, Playlist, QueueEmpty, LavalinkLoadException
+from wavelink import Playable, Playlist, Pool, QueueEmpty, LavalinkLoadException
 
 from ..util import ModularUtil
-from ..player import TrackPlayerDecorator, TrackPlayer, TrackType, FiltersTemplate
+from ..player import (
+	TrackPlayerDecorator,
+	TrackPlayer,
+	TrackType,
+	FiltersTemplate,
+	CustomPlayer,
+)
 from config import ModularBotConst
 
 
@@ -26,6 +33,24 @@ class Multimedia(commands.Cog, TrackPlayer):
 		self._bot = bot
 		super().__init__()
 
+	async def cog_load(self) -> None:
+		await CustomPlayer.track_store.open()
+		await CustomPlayer.sessions.open()
+		self._snapshot_sessions.start()
+
+	async def cog_unload(self) -> None:
+		# Unloaded before voice client disconnect, last snapshot is still complete
+		self._snapshot_sessions.cancel()
+		await self._save_sessions()
+
+		await CustomPlayer.enrichment.close()
+		await CustomPlayer.track_store.close()
+		await CustomPlayer.sessions.close()
+
+	@tasks.loop(seconds=ModularBotConst.Session.INTERVAL)
+	async def _snapshot_sessions(self) -> None:
+		await self._save_sessions()
+
 	@command(name="join", description="Join an voice channel")
 	@TrackPlayerDecorator.is_user_join_checker()
 	async def _join(self, interaction: Interaction) -> None:
@@ -191,6 +216,18 @@ class Multimedia(commands.Cog, TrackPlayer):
 
 		await ModularUtil.send_response(interaction, embed=embed)
 
+	@_play.autocomplete("query")
+	async def _play_autocomplete(
+		self, interaction: Interaction, current: str
+	) -> list[Choice[str]]:
+		return self._query_suggestions(current)
+
+	@_search.autocomplete("query")
+	async def _search_autocomplete(
+		self, interaction: Interaction, current: str
+	) -> list[Choice[str]]:
+		return self._query_suggestions(current, is_search=True)
+
 	@command(name="queue", description="Show current player queue")
 	@describe(is_history="Show player history instead queue")
 	@choices(is_history=[Choice(name="True", value=1), Choice(name="False", value=0)])
@@ -509,24 +546,49 @@ class Multimedia(commands.Cog, TrackPlayer):
 
 	@command(
 		name="filters_template",
-		description="List of filters template that can be applied(by toggling this, will reset other filters)",
+		description="List of filters template that can be applied(will reset other filters, unless stacked)",
+	)
+	@describe(
+		effect="Toggle template filters",
+		stack="Toggle it on top of the active filters instead",
 	)
-	@describe(effect="Toggle template filters")
 	@TrackPlayerDecorator.is_client_exist()
 	@TrackPlayerDecorator.is_user_allowed()
 	@TrackPlayerDecorator.is_playing()
 	async def _filters_template(
-		self, interaction: Interaction, effect: FiltersTemplate
+		self, interaction: Interaction, effect: FiltersTemplate, stack: bool = False
 	) -> None:
 		await interaction.response.defer()
 
-		embed: Embed = await self.filters_template(interaction, effect=effect)
+		embed: Embed = await self.filters_template(
+			interaction, effect=effect, stack=stack
+		)
 
 		await wait([
 			create_task(ModularUtil.send_response(interaction, embed=embed)),
 			create_task(self._update_player(interaction=interaction)),
 		])
 
+	@command(name="drain_node", description="Move every player out of a Lavalink node")
+	@describe(node="Node identifier")
+	@checks.has_permissions(administrator=True)
+	async def _drain(self, interaction: Interaction, node: str) -> None:
+		await interaction.response.defer(ephemeral=True)
+
+		embed: Embed = await self.drain(interaction, node)
+
+		await ModularUtil.send_response(interaction, embed=embed)
+
+	@_drain.autocomplete("node")
+	async def _drain_autocomplete(
+		self, interaction: Interaction, current: str
+	) -> list[Choice[str]]:
+		return [
+			Choice(name=f"{x} ({len(y.players)} player)", value=x)
+			for x, y in Pool.nodes.items()
+			if current.lower() in x.lower()
+		][:25]
+
 	async def cog_app_command_error(
 		self, interaction: Interaction, error: AppCommandError
 	) -> None:
@@ -0,0 +1,68 @@
+from collections import Counter
+from typing import Iterable
+
+from discord import Guild, Member
+
+from .util import ModularUtil
+
+
+class RoleCounter:
+	"""Member count of tracked role, kept up to date from member event.
+
+	Seeded with one pass over the member cache, join, remove and role change only
+	adjust the count afterward, :meth:`verify` recount to catch missed event.
+	"""
+
+	def __init__(self, roles: Iterable[int]) -> None:
+		self.__tracked: frozenset[int] = frozenset(roles)
+		self.__counts: Counter = Counter()
+
+	def get(self, role_id: int) -> int:
+		return self.__counts[role_id]
+
+	def seed(self, guild: Guild) -> None:
+		self.__counts = self.__recount(guild)
+
+	def member_join(self, member: Member) -> None:
+		self.__counts.update(self.__roles(member))
+
+	def member_remove(self, member: Member) -> None:
+		self.__counts.subtract(self.__roles(member))
+
+	def member_update(self, before: Member, after: Member) -> bool:
+		"""Whether any tracked role changed"""
+		previous: set[int] = self.__roles(before)
+		current: set[int] = self.__roles(after)
+
+		if previous == current:
+			return False
+
+		self.__counts.update(current - previous)
+		self.__counts.subtract(previous - current)
+		return True
+
+	def verify(self, guild: Guild) -> dict[int, int]:
+		"""Full recount, return and fix the drift of every role that was off"""
+		actual: Counter = self.__recount(guild)
+		drift: dict[int, int] = {
+			x: actual[x] - self.__counts[x]
+			for x in self.__tracked
+			if actual[x] != self.__counts[x]
+		}
+
+		if drift:
+			ModularUtil.simple_log(f"Role counter drifted, fixed {drift}")
+
+		self.__counts = actual
+		return drift
+
+	def __roles(self, member: Member) -> set[int]:
+		return {x.id for x in member.roles if x.id in self.__tracked}
+
+	def __recount(self, guild: Guild) -> Counter:
+		counts: Counter = Counter({x: 0 for x in self.__tracked})
+
+		for member in guild.members:
+			counts.update(self.__roles(member))
+
+		return counts
@@ -0,0 +1,103 @@
+from asyncio import Semaphore, gather
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Iterable
+
+from discord import Guild, HTTPException, Role, TextChannel
+from discord.abc import GuildChannel
+
+from .rate_budget import RateBudget
+
+
+@dataclass(slots=True)
+class LockdownReport:
+	view_channel: bool
+	changed: list[int] = field(default_factory=list)
+	failed: dict[int, str] = field(default_factory=dict)
+	unchanged: int = 0
+	elapsed: float = 0.0
+
+	def __str__(self) -> str:
+		return (
+			f"Lockdown view_channel={self.view_channel}, {len(self.changed)} changed, "
+			f"{len(self.failed)} failed, {self.unchanged} unchanged in {self.elapsed:.2f}s"
+		)
+
+
+class LockdownEngine:
+	"""Index of lockdown channel and the permission diff applied to them.
+
+	Only NSFW text channel outside the excluded one is indexed, kept up to date
+	from channel event. Applying compute which overwrite actually differ and send
+	them concurrently within the rate budget.
+	"""
+
+	def __init__(
+		self,
+		*,
+		excluded: Iterable[int],
+		rate: int,
+		per: float,
+		concurrency: int,
+	) -> None:
+		self.__excluded: frozenset[int] = frozenset(excluded)
+		self.__budget: RateBudget = RateBudget(rate, per)
+		self.__concurrency: int = concurrency
+
+		self.__channels: dict[int, TextChannel] = dict()
+
+	@property
+	def channels(self) -> list[TextChannel]:
+		return list(self.__channels.values())
+
+	def seed(self, guild: Guild) -> None:
+		self.__channels.clear()
+
+		for channel in guild.text_channels:
+			self.channel_update(channel)
+
+	def channel_update(self, channel: GuildChannel) -> None:
+		if (
+			isinstance(channel, TextChannel)
+			and channel.is_nsfw()
+			and channel.id not in self.__excluded
+		):
+			self.__channels[channel.id] = channel
+		else:
+			self.__channels.pop(channel.id, None)
+
+	def channel_delete(self, channel: GuildChannel) -> None:
+		self.__channels.pop(channel.id, None)
+
+	def diff(self, role: Role, view_channel: bool) -> list[TextChannel]:
+		"""Channel whose overwrite for role is not the wanted one yet"""
+		return [
+			x
+			for x in self.__channels.values()
+			if x.overwrites_for(role).view_channel != view_channel
+		]
+
+	async def apply(self, role: Role, view_channel: bool) -> LockdownReport:
+		started: float = perf_counter()
+		pending: list[TextChannel] = self.diff(role, view_channel)
+
+		report: LockdownReport = LockdownReport(
+			view_channel=view_channel,
+			unchanged=len(self.__channels) - len(pending),
+		)
+		semaphore: Semaphore = Semaphore(self.__concurrency)
+
+		async def _set(channel: TextChannel) -> None:
+			async with semaphore:
+				await self.__budget.acquire(channel.guild.id)
+
+				try:
+					await channel.set_permissions(role, view_channel=view_channel)
+					report.changed.append(channel.id)
+				except HTTPException as e:
+					report.failed[channel.id] = str(e)
+
+		await gather(*(_set(x) for x in pending))
+
+		report.elapsed = perf_counter() - started
+		return report
@@ -1,3 +1,7 @@
 from .player import TrackPlayer as TrackPlayer
 from .base_player import TrackPlayerDecorator as TrackPlayerDecorator
-from .interfaces import TrackType as TrackType, FiltersTemplate as FiltersTemplate
+from .interfaces import (
+	TrackType as TrackType,
+	FiltersTemplate as FiltersTemplate,
+	CustomPlayer as CustomPlayer,
+)
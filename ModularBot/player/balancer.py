@@ -0,0 +1,180 @@
+from asyncio import Task, create_task, sleep
+from dataclasses import dataclass
+from math import inf
+from time import monotonic
+
+from wavelink import NodeStatus, Pool, StatsEventPayload, StatsResponsePayload
+from wavelink.node import Node
+
+from ..util import ModularUtil
+
+
+@dataclass(slots=True)
+class NodeLoad:
+	players: int = 0
+	playing: int = 0
+	system_load: float = 0.0
+	cores: int = 1
+	deficit: int = 0
+	nulled: int = 0
+	updated_at: float = 0.0
+	# Monotonic time the Lavalink process started, tell which node pushed stats
+	started_at: float | None = None
+
+
+class NodeBalancer:
+	"""Pick the healthiest Lavalink node from the stats each node pushes.
+
+	Penalties follow the usual Lavalink load balancing curves, CPU and frame
+	loss grow exponentially so a struggling node is avoided well before it is
+	saturated. A node at ``max_players`` is only used when every node is full.
+
+	Stats event does not tell which node sent it, every node is polled through
+	its stats endpoint and the pushed one is matched to the node by uptime.
+	"""
+
+	# Seconds between two uptime estimate of the same Lavalink process
+	__MATCH_TOLERANCE: float = 2.0
+
+	def __init__(
+		self,
+		*,
+		players_weight: float,
+		playing_weight: float,
+		cpu_weight: float,
+		frames_weight: float,
+		max_players: int,
+		frame_loss_threshold: float,
+		degraded_cooldown: float,
+		stats_interval: float,
+	) -> None:
+		self.__players_weight: float = players_weight
+		self.__playing_weight: float = playing_weight
+		self.__cpu_weight: float = cpu_weight
+		self.__frames_weight: float = frames_weight
+		self.__max_players: int = max_players
+		self.__frame_loss_threshold: float = frame_loss_threshold
+		self.__degraded_cooldown: float = degraded_cooldown
+		self.__stats_interval: float = stats_interval
+
+		self.__loads: dict[str, NodeLoad] = dict()
+		self.__degraded_at: dict[str, float] = dict()
+		self.__pollers: dict[str, Task] = dict()
+
+	@property
+	def stats(self) -> dict:
+		return dict({
+			node.identifier: round(self.score(node), 2) for node in Pool.nodes.values()
+		})
+
+	def load(self, node: Node) -> NodeLoad:
+		return self.__loads.setdefault(node.identifier, NodeLoad())
+
+	# TODO Poll the node, restarted on every ready so a new process is seen at once
+	def watch(self, node: Node) -> None:
+		self.unwatch(node)
+		self.__pollers[node.identifier] = create_task(self.__poll(node))
+
+	def unwatch(self, node: Node) -> None:
+		if poller := self.__pollers.pop(node.identifier, None):
+			poller.cancel()
+
+	async def __poll(self, node: Node) -> None:
+		while Pool.nodes.get(node.identifier) is node:
+			if node.status is NodeStatus.CONNECTED:
+				try:
+					self.update(node, await node.fetch_stats())
+				except Exception as e:
+					ModularUtil.error_log(
+						f"Stats of node {node.identifier} failed, {e}"
+					)
+
+			await sleep(self.__stats_interval)
+
+		self.__pollers.pop(node.identifier, None)
+
+	# TODO Pushed stats, only used once it match exactly one node
+	def stats_update(self, payload: StatsEventPayload) -> None:
+		started_at: float = monotonic() - payload.uptime / 1000
+
+		nodes: list[Node] = [
+			x
+			for x in Pool.nodes.values()
+			if x.status is NodeStatus.CONNECTED
+			and (load := self.__loads.get(x.identifier))
+			and load.started_at is not None
+			and abs(load.started_at - started_at) <= self.__MATCH_TOLERANCE
+		]
+
+		if len(nodes) == 1:
+			self.update(nodes[0], payload)
+
+	def update(
+		self, node: Node, payload: StatsEventPayload | StatsResponsePayload
+	) -> None:
+		load: NodeLoad = self.load(node)
+
+		load.players = payload.players
+		load.playing = payload.playing
+		load.system_load = payload.cpu.system_load
+		load.cores = payload.cpu.cores
+		load.updated_at = monotonic()
+		load.started_at = load.updated_at - payload.uptime / 1000
+
+		# Stats endpoint never carry frame stats, only the pushed one does
+		if not isinstance(payload, StatsEventPayload):
+			return
+
+		load.deficit = payload.frames.deficit if payload.frames else 0
+		load.nulled = payload.frames.nulled if payload.frames else 0
+
+		# TODO Let players move away from node losing too many frames
+		if load.playing and self.frame_loss(node) >= self.__frame_loss_threshold:
+			if (
+				load.updated_at - self.__degraded_at.get(node.identifier, -inf)
+				>= self.__degraded_cooldown
+			):
+				self.__degraded_at[node.identifier] = load.updated_at
+				node.client.dispatch("wavelink_node_degraded", node)
+
+	def frame_loss(self, node: Node) -> float:
+		"""Ratio of lost frames in the last minute, over every playing player"""
+		load: NodeLoad = self.load(node)
+		expected: int = 3000 * max(1, load.playing)
+
+		return max(0, load.deficit + load.nulled) / expected
+
+	def player_count(self, node: Node) -> int:
+		# Players placed since the last stats push count too
+		return max(self.load(node).players, len(node.players))
+
+	def score(self, node: Node) -> float:
+		load: NodeLoad = self.load(node)
+
+		players: float = self.player_count(node) * self.__players_weight
+		playing: float = load.playing * self.__playing_weight
+		cpu: float = (1.05 ** (100 * load.system_load) * 10 - 10) * self.__cpu_weight
+
+		# Frame stats are per minute, 3000 frames is a full minute of audio
+		deficit: float = 1.03 ** (500 * (load.deficit / 3000)) * 600 - 600
+		nulled: float = (1.03 ** (500 * (load.nulled / 3000)) * 300 - 300) * 2
+		frames: float = (deficit + nulled) * self.__frames_weight
+
+		return players + playing + cpu + frames
+
+	def best(self, *, exclude: Node | None = None) -> Node | None:
+		nodes: list[Node] = [
+			x
+			for x in Pool.nodes.values()
+			if x.status is NodeStatus.CONNECTED and x is not exclude
+		]
+		if not nodes:
+			return None
+
+		available: list[Node] = [
+			x
+			for x in nodes
+			if not self.__max_players or self.player_count(x) < self.__max_players
+		]
+
+		return min(available or nodes, key=self.score)
@@ -1,21 +1,31 @@
 from typing import cast
-from asyncio import gather
-from functools import wraps
+from copy import copy
+from asyncio import Task, create_task, sleep
+from functools import partial, wraps
 
 from discord import (
 	Interaction,
 	Embed,
+	Guild,
 	Message,
 	TextChannel,
+	VoiceChannel,
+	StageChannel,
 	Member,
 	VoiceState,
 	VoiceProtocol,
 )
 from discord.ext import commands
-from discord.app_commands import check
+from discord.ui import View
+from discord.app_commands import Choice, check
 
 from wavelink import (
+	Pool,
 	NodeReadyEventPayload,
+	NodeDisconnectedEventPayload,
+	InvalidNodeException,
+	LavalinkException,
+	NodeStatus,
 	Playlist,
 	Playable,
 	TrackSource,
@@ -24,14 +34,26 @@ from wavelink import (
 	WebsocketClosedEventPayload,
 	TrackEndEventPayload,
 	TrackExceptionEventPayload,
+	LavalinkLoadException,
+	StatsEventPayload,
 )
+from wavelink.node import Node
 
 # from LyricsFindScrapper import Search as SearchLF
 
-from .interfaces import TrackType, CustomYouTubeMusicPlayable, CustomPlayer
+from .interfaces import (
+	TrackType,
+	CustomYouTubeMusicPlayable,
+	CustomPlayer,
+	QueryResolver,
+	ResolvedQuery,
+)
+from .sessions import PlayerSnapshot
 from .view import TrackView
+from .cache import TrackCache
+from .single_flight import SingleFlight
+from .track_index import TrackIndex
 from ..util import ModularUtil
-from .util_player import UtilTrackPlayer
 from config import ModularBotConst
 
 
@@ -154,6 +176,16 @@ class TrackPlayerDecorator:
 
 class TrackPlayerBase:
 	_bot: commands.Bot
+	_search_cache: TrackCache = TrackCache(
+		capacity=ModularBotConst.Cache.SEARCH_CAPACITY,
+		ttl=ModularBotConst.Cache.SEARCH_TTL,
+		negative_ttl=ModularBotConst.Cache.NEGATIVE_TTL,
+	)
+	_search_flight: SingleFlight = SingleFlight()
+	_track_index: TrackIndex = TrackIndex(capacity=ModularBotConst.Cache.INDEX_CAPACITY)
+	_prefetching: set[Task] = set()
+	_sessions_restored: bool = False
+	_pending_drains: dict[str, Task] = dict()
 
 	def __init__(self) -> None:
 		# self.__lf_client = SearchLF(session=self._bot.session)
@@ -163,8 +195,133 @@ class TrackPlayerBase:
 		self, query: str, track_type: TrackType, is_search: bool = False
 	) -> Playable | Playlist:
 		"""Will return either List of tracks or Single Tracks"""
+		resolved: ResolvedQuery = QueryResolver.resolve(query)
+		key: tuple = (resolved.cache_key, track_type, is_search)
+
+		# TODO Serve repeated query from cache
+		tracks: Playable | Playlist | list[Playable] | None = self._search_cache.get(
+			key
+		)
+
+		# TODO Coalesce identical in-flight query
+		if tracks is None:
+			tracks = await self._search_flight.do(
+				key,
+				lambda: self.__search_and_cache(key, resolved, track_type, is_search),
+			)
+
+		return self.__fresh(tracks)
+
+	@staticmethod
+	def __fresh(
+		tracks: Playable | Playlist | list[Playable],
+	) -> Playable | Playlist | list[Playable]:
+		"""Rebuilt from raw data, cached object is shared and track get changed per guild"""
+
+		def _track(track: Playable) -> Playable:
+			return type(track)(data=track.raw_data, playlist=track.playlist)
+
+		if isinstance(tracks, Playable):
+			return _track(tracks)
+
+		if isinstance(tracks, Playlist):
+			playlist: Playlist = copy(tracks)
+			playlist.tracks = [_track(x) for x in tracks.tracks]
+			return playlist
+
+		return [_track(x) for x in tracks]
+
+	async def __search_and_cache(
+		self,
+		key: tuple,
+		resolved: ResolvedQuery,
+		track_type: TrackType,
+		is_search: bool,
+	) -> Playable | Playlist | list[Playable]:
+		# TODO Single track resolution survive restart
+		store_key: str = f"{track_type.name}:{resolved.cache_key}"
+		stored: dict | None = (
+			CustomPlayer.track_store.get_resolution(store_key)
+			if not is_search and not resolved.is_playlist
+			else None
+		)
+
+		try:
+			if stored:
+				tracks = (
+					CustomYouTubeMusicPlayable
+					if track_type is TrackType.YOUTUBE_MUSIC
+					else Playable
+				)(data=stored)
+			else:
+				tracks = await self.__search_lavalink(resolved, track_type, is_search)
+		except (LavalinkLoadException, IndexError) as e:
+			self._search_cache.put_error(key, e)
+			raise e
+
+		self._search_cache.put(key, tracks)
+
+		if not stored and isinstance(tracks, Playable) and not resolved.is_playlist:
+			if not tracks.is_stream:
+				CustomPlayer.track_store.put_resolution(store_key, tracks)
+
+		# TODO Feed autocomplete index, playlist could be too big
+		if isinstance(tracks, Playable):
+			self._track_index.add(tracks)
+		elif isinstance(tracks, list):
+			for track in tracks:
+				self._track_index.add(track)
+
+		return tracks
+
+	def _query_suggestions(
+		self, current: str, /, is_search: bool = False
+	) -> list[Choice[str]]:
+		"""Served from local index only, top suggestion is resolved ahead when confident"""
+		if current.startswith("http"):
+			return []
+
+		result: list = self._track_index.search(current)
+
+		if len(current) >= 3 and (
+			self._track_index.confidence(result)
+			>= ModularBotConst.Cache.PREFETCH_CONFIDENCE
+		):
+			self._prefetch(result[0][1].uri, is_search=is_search)
+
+		return [
+			Choice(
+				name=ModularUtil.truncate_string(
+					f"{entry.title} - {entry.author}", max=100
+				),
+				value=entry.uri,
+			)
+			for _, entry in result
+		]
+
+	def _prefetch(self, query: str, /, is_search: bool = False) -> None:
+		track_type: TrackType = TrackType.what_type(query) or TrackType.YOUTUBE
+		key: tuple = (QueryResolver.resolve(query).cache_key, track_type, is_search)
+
+		if key in self._search_cache:
+			return
+
+		async def _warm() -> None:
+			try:
+				await self._custom_wavelink_searcher(query, track_type, is_search)
+			except Exception:
+				pass
+
+		task: Task = create_task(_warm())
+		self._prefetching.add(task)
+		task.add_done_callback(self._prefetching.discard)
+
+	async def __search_lavalink(
+		self, resolved: ResolvedQuery, track_type: TrackType, is_search: bool = False
+	) -> Playable | Playlist | list[Playable]:
 		tracks: Search = None
-		is_playlist: bool = track_type.is_playlist(query)
+		query: str = resolved.query
+		is_playlist: bool = resolved.is_playlist
 		was_youtube: bool = track_type in (TrackType.YOUTUBE, TrackType.YOUTUBE_MUSIC)
 		search_limit: int = 30
 
@@ -179,25 +336,31 @@ class TrackPlayerBase:
 				source=TrackSource.YouTube
 				if track_type is not TrackType.YOUTUBE_MUSIC
 				else TrackSource.YouTubeMusic,
+				node=CustomPlayer.balancer.best(),
 			)
 
 		elif track_type is TrackType.SOUNCLOUD:
-			tracks = await Playable.search(query, source=TrackSource.SoundCloud)
+			tracks = await Playable.search(
+				query, source=TrackSource.SoundCloud, node=CustomPlayer.balancer.best()
+			)
 
 		elif track_type is TrackType.SPOTIFY:
-			tracks = await Playable.search(query, source="spsearch")
+			tracks = await Playable.search(
+				query, source="spsearch", node=CustomPlayer.balancer.best()
+			)
 
 		# TODO Logic here
 		if is_playlist:
 			tracks.url = query
 
+		# YouTube Music playlist is wrapped lazily by the queue
 		if is_playlist and was_youtube:
-			if track_type is TrackType.YOUTUBE_MUSIC:
-				tracks.tracks = list(map(_into_custom_ytms, tracks.tracks))
-
-			index: int = UtilTrackPlayer.extract_index_youtube(q=query)
+			index: int = resolved.index
 			tracks = tracks[index - 1] if index else tracks
 
+			if index and track_type is TrackType.YOUTUBE_MUSIC:
+				tracks = _into_custom_ytms(tracks)
+
 		elif is_search and not is_playlist:
 			tracks = tracks[0:search_limit]
 
@@ -268,17 +431,40 @@ class TrackPlayerBase:
 		player: CustomPlayer = cast(CustomPlayer, interaction.guild.voice_client)
 
 		if player:
-			message: Message = player.message
+			player.now_playing.update(partial(self._render_now_playing, player))
 
-			view: TrackView = TrackView(self, player)
-			embed: Embed = view.get_embed
+	def _render_now_playing(self, player: CustomPlayer) -> tuple[Embed, View] | None:
+		"""Rendered when the edit is sent, nothing playing remove the controller"""
+		if not player.connected or player.current is None or player._original is None:
+			return None
 
-			await message.edit(embed=embed, view=view)
+		view: TrackView = TrackView(self, player)
+		return (view.get_embed, view)
 
 	# Event handling
 
 	@commands.Cog.listener()
 	async def on_wavelink_node_ready(self, payload: NodeReadyEventPayload) -> None:
+		pending: Task | None = self.__cancel_drain(payload.node)
+
+		CustomPlayer.balancer.watch(payload.node)
+		await CustomPlayer.sessions.save_nodes({payload.node.uri: payload.session_id})
+
+		# TODO Player kept running by Lavalink, take them over without replaying
+		if payload.resumed:
+			await self._resume_node(payload.node)
+
+		# TODO Back on a new session, Lavalink forgot the player left waiting
+		elif pending is not None:
+			await self._drain_node(payload.node)
+
+		# TODO Resume player saved before last shutdown, once every node had its chance
+		if not TrackPlayerBase._sessions_restored and all(
+			x.status is NodeStatus.CONNECTED for x in Pool.nodes.values()
+		):
+			TrackPlayerBase._sessions_restored = True
+			await self._restore_sessions()
+
 		ModularUtil.simple_log(
 			f"Node {payload.node.session_id}, heartbeat {payload.node.heartbeat} is ready!"
 		)
@@ -289,41 +475,235 @@ class TrackPlayerBase:
                 {info.source_managers}, active plugins {[x.name for x in info.plugins]}"
 		)
 
+	async def _save_sessions(self) -> int:
+		snapshots: list[PlayerSnapshot] = [
+			snapshot
+			for node in Pool.nodes.values()
+			for player in list(node.players.values())
+			if (snapshot := cast(CustomPlayer, player).snapshot())
+		]
+
+		await CustomPlayer.sessions.save(snapshots)
+		await CustomPlayer.sessions.save_nodes({
+			node.uri: node.session_id for node in Pool.nodes.values() if node.session_id
+		})
+		return len(snapshots)
+
+	async def _resume_node(self, node: Node) -> None:
+		snapshots: dict[int, PlayerSnapshot] = {
+			x.guild_id: x for x in await CustomPlayer.sessions.load()
+		}
+		adopted = dropped = 0
+
+		for state in await node.fetch_players():
+			guild: Guild | None = self._bot.get_guild(state.guild_id)
+			player: CustomPlayer | None = (
+				cast(CustomPlayer, guild.voice_client) if guild else None
+			)
+
+			# TODO Only the websocket was lost, player object still alive
+			if isinstance(player, CustomPlayer):
+				# Drained into another node meanwhile, the copy left here is stale
+				if player.node is not node:
+					dropped += 1
+					try:
+						await node._destroy_player(state.guild_id)
+					except Exception as e:
+						ModularUtil.error_log(
+							f"Failed to destroy stale player {state.guild_id}, {e}"
+						)
+					continue
+
+				node._players[state.guild_id] = player
+				player.sync(state)
+				adopted += 1
+				continue
+
+			snapshot: PlayerSnapshot | None = snapshots.get(state.guild_id)
+			channel = self._bot.get_channel(snapshot.channel_id) if snapshot else None
+
+			try:
+				if not isinstance(channel, (VoiceChannel, StageChannel)):
+					raise RuntimeError("voice channel is unknown")
+
+				player = await channel.connect(cls=partial(CustomPlayer, nodes=[node]))
+				player.adopt(state, snapshot)
+				player.now_playing.update(partial(self._render_now_playing, player))
+				adopted += 1
+			except Exception as e:
+				dropped += 1
+				ModularUtil.error_log(
+					f"Failed to take over player {state.guild_id}, {e}"
+				)
+
+				if player is None or not player.connected:
+					await node._destroy_player(state.guild_id)
+
+		ModularUtil.simple_log(
+			f"Resumed node {node.identifier}, {adopted} player taken over, {dropped} dropped"
+		)
+
+	async def _restore_sessions(self) -> None:
+		restored = skipped = 0
+
+		for snapshot in await CustomPlayer.sessions.load():
+			channel = self._bot.get_channel(snapshot.channel_id)
+
+			# TODO Taken over from resumed node
+			if channel and channel.guild.voice_client:
+				continue
+
+			# TODO Nobody left to listen
+			if not isinstance(channel, (VoiceChannel, StageChannel)) or not any(
+				not x.bot for x in channel.members
+			):
+				skipped += 1
+				await CustomPlayer.sessions.delete(snapshot.guild_id)
+				continue
+
+			try:
+				player: CustomPlayer = await channel.connect(cls=CustomPlayer)
+				await player.restore(snapshot)
+				restored += 1
+			except Exception as e:
+				skipped += 1
+				await CustomPlayer.sessions.delete(snapshot.guild_id)
+				ModularUtil.error_log(
+					f"Failed to restore player {snapshot.guild_id}, {e}"
+				)
+
+		ModularUtil.simple_log(f"Restored {restored} player session, {skipped} skipped")
+
+	@commands.Cog.listener()
+	async def on_wavelink_node_disconnected(
+		self, payload: NodeDisconnectedEventPayload
+	) -> None:
+		node: Node = payload.node
+		self.__cancel_drain(node)
+
+		if self._bot.is_closed():
+			return
+
+		# TODO Still reconnecting, Lavalink keep the player until the resume timeout
+		if node.status is not NodeStatus.DISCONNECTED and node._resume_timeout > 0:
+			TrackPlayerBase._pending_drains[node.identifier] = create_task(
+				self.__drain_later(node)
+			)
+			return
+
+		await self._drain_node(node)
+
+	async def __drain_later(self, node: Node) -> None:
+		await sleep(node._resume_timeout)
+		TrackPlayerBase._pending_drains.pop(node.identifier, None)
+
+		if node.status is not NodeStatus.CONNECTED:
+			await self._drain_node(node)
+
+	def __cancel_drain(self, node: Node) -> Task | None:
+		pending: Task | None = TrackPlayerBase._pending_drains.pop(
+			node.identifier, None
+		)
+		if pending:
+			pending.cancel()
+
+		return pending
+
+	@commands.Cog.listener()
+	async def on_wavelink_stats_update(self, payload: StatsEventPayload) -> None:
+		CustomPlayer.balancer.stats_update(payload)
+
+	@commands.Cog.listener()
+	async def on_wavelink_node_degraded(self, node: Node) -> None:
+		await self._drain_node(node)
+
+	# TODO Move every player out of node, one by one so placement see new load
+	async def _drain_node(self, node: Node) -> tuple[int, int]:
+		moved = failed = 0
+
+		# Node registry is emptied once reconnecting gave up, player still point at it
+		players: list[CustomPlayer] = [
+			x
+			for x in self._bot.voice_clients
+			if isinstance(x, CustomPlayer) and x.node is node
+		]
+
+		for player in players:
+			target: Node | None = CustomPlayer.balancer.best(exclude=node)
+			if target is None:
+				failed = len(players) - moved
+				break
+
+			try:
+				await cast(CustomPlayer, player).migrate(target)
+				moved += 1
+			except (RuntimeError, LavalinkException, InvalidNodeException) as e:
+				failed += 1
+				ModularUtil.error_log(
+					f"Failed to migrate player {player.guild.id}, {e}"
+				)
+
+		ModularUtil.simple_log(
+			f"Drained node {node.identifier}, {moved} moved, {failed} failed"
+		)
+		return (moved, failed)
+
 	@commands.Cog.listener()
 	async def on_wavelink_track_start(self, payload: TrackStartEventPayload) -> None:
 		player: CustomPlayer = payload.player
 		interaction: Interaction = player.interaction
-		channel: TextChannel = interaction.channel
-		message: Message
+		channel: TextChannel = (
+			interaction.channel if interaction else player.text_channel
+		)
 
-		view: TrackView = TrackView(self, player)
-		embed: Embed = view.get_embed
+		# TODO Resumed after migration, message still valid
+		if player.resumed_track is not None and player.resumed_track is player.current:
+			player.resumed_track = None
+			return
+
+		self._track_index.add(payload.original or payload.track, played=True)
+
+		if channel is None:
+			return
+
+		# TODO Same controller message, edited in place
+		player.now_playing.update(
+			partial(self._render_now_playing, player), channel=channel
+		)
 
-		# TODO Wait message until sended
-		res: list = await gather(channel.send(embed=embed))
-		message: Message = res[0]
+	@commands.Cog.listener()
+	async def on_wavelink_track_enriched(
+		self, player: CustomPlayer, track: Playable
+	) -> None:
+		if not player.message or player._original is not track:
+			return
 
-		player.message = message
-		await message.edit(view=view)
+		player.now_playing.update(partial(self._render_now_playing, player))
 
 	@commands.Cog.listener()
 	async def on_wavelink_track_end(self, payload: TrackEndEventPayload) -> None:
 		player: CustomPlayer = payload.player
 
+		# Next track usually start within the debounce, then it is a single edit
 		if player:
-			await gather(player.message.delete())
+			player.now_playing.update(partial(self._render_now_playing, player))
 
 	@commands.Cog.listener()
 	async def on_wavelink_websocket_closed(
 		self, payload: WebsocketClosedEventPayload
 	) -> None:
 		player: CustomPlayer = payload.player
-		if player and player.playing:
-			await player.message.delete()
 
-		if player and payload.by_remote:
+		if player and payload.by_remote and not player.migrating:
 			await player.disconnect()
 
+	@commands.Cog.listener()
+	async def on_message(self, message: Message) -> None:
+		if message.guild and isinstance(
+			player := message.guild.voice_client, CustomPlayer
+		):
+			player.now_playing.observe(message)
+
 	@commands.Cog.listener()
 	async def on_wavelink_inactive_player(self, player: CustomPlayer) -> None:
 		await player.disconnect()
@@ -342,4 +722,9 @@ class TrackPlayerBase:
 		)
 		embed.set_footer(text="LavaLink Node problem")
 
+		if player.interaction is None:
+			if player.text_channel:
+				await player.text_channel.send(embed=embed)
+			return
+
 		await ModularUtil.send_response(player.interaction, embed=embed)
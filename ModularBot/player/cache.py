@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable
+
+
+class TrackCache:
+	"""TTL + LRU cache shared by every player in the process.
+
+	Empty results and failures are kept for ``negative_ttl`` seconds only, so a
+	typo does not hit Lavalink on every retry but a real track shows up quickly.
+	"""
+
+	def __init__(self, capacity: int, ttl: float, negative_ttl: float) -> None:
+		self.__capacity: int = capacity
+		self.__ttl: float = ttl
+		self.__negative_ttl: float = negative_ttl
+		self.__items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+		self.hits: int = 0
+		self.misses: int = 0
+
+	def __len__(self) -> int:
+		return len(self.__items)
+
+	def __contains__(self, key: Hashable) -> bool:
+		item: tuple[float, Any] | None = self.__items.get(key)
+		return item is not None and item[0] > monotonic()
+
+	@property
+	def stats(self) -> dict:
+		total: int = self.hits + self.misses
+
+		return dict({
+			"size": len(self.__items),
+			"capacity": self.__capacity,
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": round(self.hits / total, 3) if total else 0.0,
+		})
+
+	def get(self, key: Hashable) -> Any | None:
+		"""Return the cached value or ``None`` on miss, re-raise cached failure"""
+		item: tuple[float, Any] | None = self.__items.get(key)
+
+		if item is None or item[0] <= monotonic():
+			if item is not None:
+				del self.__items[key]
+
+			self.misses += 1
+			return None
+
+		self.hits += 1
+		self.__items.move_to_end(key)
+
+		value: Any = item[1]
+		if isinstance(value, BaseException):
+			raise value.with_traceback(None)
+
+		return value
+
+	def put(self, key: Hashable, value: Any) -> None:
+		ttl: float = self.__ttl if value else self.__negative_ttl
+		self.__set(key, value, ttl)
+
+	def put_error(self, key: Hashable, error: BaseException) -> None:
+		self.__set(key, error, self.__negative_ttl)
+
+	def invalidate(self, key: Hashable) -> None:
+		self.__items.pop(key, None)
+
+	def clear(self) -> None:
+		self.__items.clear()
+		self.hits = self.misses = 0
+
+	def __set(self, key: Hashable, value: Any, ttl: float) -> None:
+		if self.__capacity <= 0 or ttl <= 0:
+			return
+
+		self.__items[key] = (monotonic() + ttl, value)
+		self.__items.move_to_end(key)
+
+		# Expired entries are dropped lazily on get, overflow evicts least recently used
+		while len(self.__items) > self.__capacity:
+			self.__items.popitem(last=False)
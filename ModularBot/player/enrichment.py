@@ -0,0 +1,277 @@
+from asyncio import Event, Future, Task, create_task, get_running_loop, wait
+from collections import deque
+from dataclasses import dataclass, field
+from heapq import heappop, heappush
+from itertools import count
+from logging import Logger, getLogger
+from time import monotonic
+from typing import Awaitable, Callable, Hashable
+
+from wavelink import Playable
+
+from .store import TrackMeta
+
+logger: Logger = getLogger("wavelink.player")
+
+
+@dataclass(slots=True)
+class _Job:
+	key: str
+	track: Playable
+	runner: Callable[[Playable], Awaitable[Playable]]
+	node: str
+	priority: int
+	future: Future
+	created_at: float
+	owners: set[Hashable] = field(default_factory=set)
+	targets: list[Playable] = field(default_factory=list)
+	task: Task | None = None
+
+
+class EnrichmentScheduler:
+	"""Shared, prioritized pool of enrichment jobs for every player.
+
+	Lower priority runs first, at most ``workers`` jobs run at once and at most
+	``per_node`` of them against the same Lavalink node. The same track queued by
+	several guilds is enriched once, and a job is cancelled when none of its
+	owners want it anymore.
+	"""
+
+	def __init__(self, workers: int, per_node: int) -> None:
+		self.__workers: int = workers
+		self.__per_node: int = per_node
+
+		self.__heap: list[tuple[int, int, str]] = list()
+		self.__jobs: dict[str, _Job] = dict()
+		self.__owned: dict[Hashable, set[str]] = dict()
+		self.__busy: dict[str, int] = dict()
+		self.__seq: count = count()
+
+		self.__signal: Event | None = None
+		self.__pool: list[Task] = list()
+
+		self.__wait_time: deque[float] = deque(maxlen=256)
+		self.__run_time: deque[float] = deque(maxlen=256)
+
+		self.submitted: int = 0
+		self.deduped: int = 0
+		self.completed: int = 0
+		self.cancelled: int = 0
+		self.failed: int = 0
+
+	def __len__(self) -> int:
+		return len(self.__jobs)
+
+	@staticmethod
+	def identity(track: Playable) -> str:
+		return f"{track.source}:{track.identifier}"
+
+	@property
+	def stats(self) -> dict:
+		running: int = sum(self.__busy.values())
+
+		return dict({
+			"queued": len(self.__jobs) - running,
+			"running": running,
+			"submitted": self.submitted,
+			"deduped": self.deduped,
+			"completed": self.completed,
+			"cancelled": self.cancelled,
+			"failed": self.failed,
+			"wait_p50": self.__percentile(self.__wait_time, 0.5),
+			"wait_p95": self.__percentile(self.__wait_time, 0.95),
+			"run_p50": self.__percentile(self.__run_time, 0.5),
+			"run_p95": self.__percentile(self.__run_time, 0.95),
+		})
+
+	def submit(
+		self,
+		owner: Hashable,
+		track: Playable,
+		runner: Callable[[Playable], Awaitable[Playable]],
+		*,
+		priority: int,
+		node: str,
+	) -> Future:
+		"""Queue track enrichment, the future resolve into the enriched track"""
+		self.__start()
+
+		key: str = self.identity(track)
+		job: _Job | None = self.__jobs.get(key)
+
+		# Running job without owner is being cancelled, start over
+		if job is None or (job.task is not None and not job.owners):
+			job = _Job(
+				key=key,
+				track=track,
+				runner=runner,
+				node=node,
+				priority=priority,
+				future=get_running_loop().create_future(),
+				created_at=monotonic(),
+			)
+			self.__jobs[key] = job
+			self.submitted += 1
+
+			heappush(self.__heap, (priority, next(self.__seq), key))
+		else:
+			self.deduped += 1
+
+			# TODO Promote, old heap entry become stale
+			if job.task is None and priority < job.priority:
+				job.priority = priority
+				heappush(self.__heap, (priority, next(self.__seq), key))
+
+		job.owners.add(owner)
+		if all(x is not track for x in job.targets):
+			job.targets.append(track)
+
+		self.__owned.setdefault(owner, set()).add(key)
+		self.__signal.set()
+
+		return job.future
+
+	def cancel(self, owner: Hashable, *, keep: set[str] = frozenset()) -> None:
+		"""Drop every job of owner, except identity listed in keep"""
+		keys: set[str] = self.__owned.get(owner, set())
+
+		for key in keys - keep:
+			keys.discard(key)
+			job: _Job | None = self.__jobs.get(key)
+
+			if job is None:
+				continue
+
+			job.owners.discard(owner)
+			if job.owners:
+				continue
+
+			if job.task is not None:
+				job.task.cancel()
+				continue
+
+			del self.__jobs[key]
+			job.future.cancel()
+			self.cancelled += 1
+
+		if not keys:
+			self.__owned.pop(owner, None)
+
+	async def close(self) -> None:
+		for worker in self.__pool:
+			worker.cancel()
+
+		for job in self.__jobs.values():
+			if job.task is not None:
+				job.task.cancel()
+
+			job.future.cancel()
+
+		self.__pool.clear()
+		self.__jobs.clear()
+		self.__owned.clear()
+		self.__heap.clear()
+		self.__busy.clear()
+
+	def __start(self) -> None:
+		if self.__pool:
+			return
+
+		self.__signal = Event()
+		self.__pool = [create_task(self.__worker()) for _ in range(self.__workers)]
+
+	def __next(self) -> _Job | None:
+		skipped: list[tuple[int, int, str]] = list()
+		job: _Job | None = None
+
+		while self.__heap:
+			item: tuple[int, int, str] = heappop(self.__heap)
+			candidate: _Job | None = self.__jobs.get(item[2])
+
+			# Stale entry, cancelled, promoted or already running
+			if (
+				candidate is None
+				or candidate.task is not None
+				or candidate.priority != item[0]
+			):
+				continue
+
+			if self.__busy.get(candidate.node, 0) >= self.__per_node:
+				skipped.append(item)
+				continue
+
+			job = candidate
+			break
+
+		for item in skipped:
+			heappush(self.__heap, item)
+
+		return job
+
+	async def __worker(self) -> None:
+		while True:
+			job: _Job | None = self.__next()
+
+			if job is None:
+				self.__signal.clear()
+				await self.__signal.wait()
+				continue
+
+			try:
+				await self.__run(job)
+			except Exception as e:
+				logger.error("Enrichment worker error on %s, %s", job.key, e)
+				if not job.future.done():
+					job.future.set_result(job.track)
+
+	async def __run(self, job: _Job) -> None:
+		started: float = monotonic()
+		self.__wait_time.append(started - job.created_at)
+		self.__busy[job.node] = self.__busy.get(job.node, 0) + 1
+
+		job.task = create_task(job.runner(job.track))
+		try:
+			await wait((job.task,))
+		finally:
+			self.__busy[job.node] -= 1
+			if self.__jobs.get(job.key) is job:
+				del self.__jobs[job.key]
+
+			for owner in job.owners:
+				if owner in self.__owned:
+					self.__owned[owner].discard(job.key)
+
+			self.__signal.set()
+
+		if job.task.cancelled():
+			self.cancelled += 1
+			job.future.cancel()
+			return
+
+		self.__run_time.append(monotonic() - started)
+
+		if job.task.exception():
+			self.failed += 1
+			logger.debug("Enrichment of %s failed, %s", job.key, job.task.exception())
+			if not job.future.done():
+				job.future.set_result(job.track)
+			return
+
+		# TODO Share result with every same track queued elsewhere
+		result: Playable = job.task.result()
+		meta: TrackMeta = TrackMeta.from_playable(result)
+		for target in job.targets:
+			if target is not result:
+				meta.apply(target)
+
+		self.completed += 1
+		if not job.future.done():
+			job.future.set_result(result)
+
+	@staticmethod
+	def __percentile(samples: deque[float], q: float) -> float:
+		if not samples:
+			return 0.0
+
+		ordered: list[float] = sorted(samples)
+		return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
@@ -0,0 +1,123 @@
+from collections import Counter
+from typing import Callable, Iterable
+
+from wavelink import Playable
+
+
+class IdentityIndex:
+	"""Identifier and ISRC of every track currently held by the tracked queues.
+
+	Each key is reference counted, the queue storage add a track as it enter and
+	discard it as it leave, so membership is a dict lookup on long sessions too.
+	"""
+
+	def __init__(self) -> None:
+		self.__ids: Counter[str] = Counter()
+		self.__isrcs: Counter[str] = Counter()
+
+	def __len__(self) -> int:
+		return len(self.__ids)
+
+	def __contains__(self, track: Playable) -> bool:
+		return track.identifier in self.__ids or (
+			track.isrc is not None and track.isrc in self.__isrcs
+		)
+
+	@staticmethod
+	def keys(track: Playable) -> tuple[str, ...]:
+		keys: tuple[str, ...] = (f"id:{track.identifier}",)
+		return keys + (f"isrc:{track.isrc}",) if track.isrc else keys
+
+	def add(self, track: Playable) -> None:
+		self.update(entered=(track,))
+
+	def discard(self, track: Playable) -> None:
+		self.update(left=(track,))
+
+	def update(
+		self, entered: Iterable[Playable] = (), left: Iterable[Playable] = ()
+	) -> None:
+		# Counted in bulk, a whole playlist chunk enter at once
+		entered = list(entered)
+		if entered:
+			self.__ids.update([x.identifier for x in entered])
+			self.__isrcs.update([x.isrc for x in entered if x.isrc])
+
+		for track in left:
+			self.__drop(self.__ids, track.identifier)
+			if track.isrc:
+				self.__drop(self.__isrcs, track.isrc)
+
+	@staticmethod
+	def __drop(counts: Counter[str], key: str) -> None:
+		if counts[key] <= 1:
+			counts.pop(key, None)
+		else:
+			counts[key] -= 1
+
+
+class TrackedItems(list):
+	"""Plain ``Queue._items`` list that report every change to an index.
+
+	With ``window`` only the newest ``window`` items count, used for history which
+	keep growing, the tail is compared before and after the change.
+	"""
+
+	def __init__(self, index: IdentityIndex, *, window: int | None = None) -> None:
+		super().__init__()
+		self.__index: IdentityIndex = index
+		self.__window: int | None = window
+
+	def __change(
+		self,
+		op: Callable,
+		*args,
+		entered: Iterable[Playable] = (),
+		left: Iterable[Playable] = (),
+	):
+		if self.__window is None:
+			result = op(self, *args)
+			self.__index.update(entered, left)
+			return result
+
+		before: list[Playable] = list.__getitem__(self, slice(-self.__window, None))
+		result = op(self, *args)
+		self.__index.update(list.__getitem__(self, slice(-self.__window, None)), before)
+		return result
+
+	def append(self, track: Playable) -> None:
+		self.__change(list.append, track, entered=(track,))
+
+	def extend(self, tracks: Iterable[Playable]) -> None:
+		tracks = list(tracks)
+		self.__change(list.extend, tracks, entered=tracks)
+
+	def insert(self, index: int, track: Playable) -> None:
+		self.__change(list.insert, index, track, entered=(track,))
+
+	def pop(self, index: int = -1) -> Playable:
+		return self.__change(list.pop, index, left=(self[index],))
+
+	def remove(self, track: Playable) -> None:
+		self.__change(list.remove, track, left=(self[self.index(track)],))
+
+	def clear(self) -> None:
+		self.__change(list.clear, left=list(self))
+
+	def __setitem__(self, index: int | slice, value) -> None:
+		if isinstance(index, slice):
+			left, entered = self[index], list(value)
+			value = entered
+		else:
+			left, entered = [self[index]], [value]
+
+		self.__change(list.__setitem__, index, value, entered=entered, left=left)
+
+	def __delitem__(self, index: int | slice) -> None:
+		left: list[Playable] = (
+			self[index] if isinstance(index, slice) else [self[index]]
+		)
+		self.__change(list.__delitem__, index, left=left)
+
+	def copy(self) -> list[Playable]:
+		return list(self)
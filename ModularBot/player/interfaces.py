@@ -1,18 +1,34 @@
-from asyncio import gather, create_task, Lock
-from random import shuffle
+from asyncio import (
+	Event,
+	Future,
+	Lock,
+	Task,
+	current_task,
+	gather,
+	get_running_loop,
+	create_task,
+	shield,
+	sleep,
+)
+from random import shuffle, uniform
 from enum import Enum
-from typing import TypeAlias
+from typing import AsyncIterator, Callable, TypeAlias
 from abc import ABC, abstractmethod
 from collections import deque
 from logging import Logger, getLogger
 from re import sub
+from dataclasses import dataclass
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from time import monotonic_ns
 
 from yarl import URL
 
 from discord import Client, Interaction, Embed, Member, Message
-from discord.abc import Connectable
+from discord.abc import Connectable, Messageable
 
 from wavelink import (
+	AutoPlayMode,
 	Playable,
 	Playlist,
 	Player,
@@ -21,13 +37,28 @@ from wavelink import (
 	LavalinkException,
 	LavalinkLoadException,
 	Filters,
-	Queue,
 	QueueEmpty,
+	InvalidNodeException,
+	QueueMode,
+	NodeStatus,
+	PlayerResponsePayload,
 )
 from wavelink.node import Node
 from wavelink.tracks import PlaylistInfo
 from wavelink.types.request import Request as RequestPayload
 
+from .single_flight import SingleFlight
+from .store import TrackStore, TrackMeta
+from .enrichment import EnrichmentScheduler
+from .segments import TrackSegments
+from .balancer import NodeBalancer
+from .identity_index import IdentityIndex, TrackedItems
+from .presets import FilterEffect, FilterPresets
+from .sessions import PlayerSnapshot, SessionStore
+from .now_playing import NowPlaying
+from ..rate_budget import RateBudget
+from config import ModularBotConst
+
 
 class CustomYouTubeMusicPlayable(Playable):
 	def __init__(self, data, *, playlist: PlaylistInfo | None = None) -> None:
@@ -36,6 +67,10 @@ class CustomYouTubeMusicPlayable(Playable):
 			self._playlist.url = playlist.url.replace("www", "music")
 		self._uri = self._uri.replace("www", "music")
 
+	@classmethod
+	def from_playable(cls, track: Playable) -> "CustomYouTubeMusicPlayable":
+		return cls(data=track.raw_data, playlist=track.playlist)
+
 
 T_a: TypeAlias = list[Playable] | Playlist
 
@@ -43,6 +78,34 @@ logger: Logger = getLogger("wavelink.player")
 
 
 class CustomPlayer(Player):
+	_lavalink_flight: SingleFlight = SingleFlight()
+	track_store: TrackStore = TrackStore(
+		ModularBotConst.Store.FILE,
+		capacity=ModularBotConst.Store.CAPACITY,
+		resolution_ttl=ModularBotConst.Store.RESOLUTION_TTL,
+		flush_interval=ModularBotConst.Store.FLUSH_INTERVAL,
+	)
+	refill_budget: RateBudget = RateBudget(
+		ModularBotConst.Autoplay.REFILL_RATE, ModularBotConst.Autoplay.REFILL_PER
+	)
+	balancer: NodeBalancer = NodeBalancer(
+		players_weight=ModularBotConst.Balancer.PLAYERS_WEIGHT,
+		playing_weight=ModularBotConst.Balancer.PLAYING_WEIGHT,
+		cpu_weight=ModularBotConst.Balancer.CPU_WEIGHT,
+		frames_weight=ModularBotConst.Balancer.FRAMES_WEIGHT,
+		max_players=ModularBotConst.Balancer.MAX_PLAYERS,
+		frame_loss_threshold=ModularBotConst.Balancer.FRAME_LOSS_THRESHOLD,
+		degraded_cooldown=ModularBotConst.Balancer.DEGRADED_COOLDOWN,
+		stats_interval=ModularBotConst.Balancer.STATS_INTERVAL,
+	)
+	enrichment: EnrichmentScheduler = EnrichmentScheduler(
+		workers=ModularBotConst.Enrichment.WORKERS,
+		per_node=ModularBotConst.Enrichment.PER_NODE,
+	)
+	sessions: SessionStore = SessionStore(
+		ModularBotConst.Store.FILE, max_age=ModularBotConst.Session.MAX_AGE
+	)
+
 	def __init__(
 		self,
 		client: Client = ...,
@@ -50,71 +113,77 @@ class CustomPlayer(Player):
 		*,
 		nodes: list[Node] | None = None,
 	) -> None:
+		# TODO Place new player on the healthiest node
+		if not nodes and (best := self.balancer.best()):
+			nodes = [best]
+
 		super().__init__(client, channel, nodes=nodes)
 
+		# TODO Queued, upcoming or recently played, for autoplay dedupe
+		self.seen: IdentityIndex = IdentityIndex()
+
+		# TODO Playlist stay lazy inside the queue
+		self.queue._items = TrackSegments(ModularBotConst.Queue.CHUNK_SIZE, self.seen)
+		self.auto_queue._items = TrackedItems(self.seen)
+		for history in (self.queue.history, self.auto_queue.history):
+			history._items = TrackedItems(
+				self.seen, window=ModularBotConst.Player.SEEN_CAPACITY
+			)
+
 		self.interaction: Interaction = None
-		self.message: Message = None
+		# Where now playing go when there is no interaction, after restored
+		self.text_channel: Messageable | None = None
+
+		# TODO One controller message for every track
+		self.now_playing: NowPlaying = NowPlaying()
 
 		self.normal_default: bool = True
 
-		# TODO Filter list
-		self.karaoke_filter: bool = False
-		self.rotation_filter: bool = False
-		self.tremolo_filter: bool = False
-		self.vibrato_filter: bool = False
-		self.normalization_filter: bool = False
+		# TODO Active filter and template, as one bitmask
+		self.filter_effects: FilterEffect = FilterEffect(0)
+
+		self.__enrich_task: Task | None = None
 
-		# TODO Filter template list
-		self.nigthcore_filter: bool = False
-		self.vaporwave_filter: bool = False
-		self.bass_boost_filter: bool = False
-		self.soft_filter: bool = False
-		self.pop_filter: bool = False
-		self.treble_bass: bool = False
+		self.__refill_lock: Lock = Lock()
+		self.__refill_wakeup: Event = Event()
+		self.__refill_task: Task | None = None
 
-		self.queue_lock = Lock()
-		self.auto_queue_lock = Lock()
+		self.__migrate_lock: Lock = Lock()
+		self.resumed_track: Playable | None = None
+
+		# TODO Staged player change, sent together as one update
+		self.__pending: RequestPayload = dict()
+		self.__rollback: dict[str, tuple[str, object]] = dict()
+		self.__batch: Future | None = None
+		self.__flush_task: Task | None = None
+		self.__transactions: int = 0
 
 	# TODO Reset filter
 
 	def reset_filter(self) -> None:
-		# TODO Filter list
-		self.karaoke_filter: bool = False
-		self.rotation_filter: bool = False
-		self.tremolo_filter: bool = False
-		self.vibrato_filter: bool = False
-		self.normalization_filter: bool = False
-
-		# TODO Filter template list
-		self.nigthcore_filter: bool = False
-		self.vaporwave_filter: bool = False
-		self.bass_boost_filter: bool = False
-		self.soft_filter: bool = False
-		self.pop_filter: bool = False
-		self.treble_bass: bool = False
+		self.filter_effects = FilterEffect(0)
 
 	# TODO Reset inner work
 	def reset_inner_work(self) -> None:
 		self.interaction = None
-		self.message = None
 
 		self.reset_filter()
 
+	@property
+	def message(self) -> Message | None:
+		return self.now_playing.message
+
 	# TODO get current filter state
-	def current_filter_state(self) -> dict:
-		return dict({
-			"karaoke": self.karaoke_filter,
-			"rotation": self.rotation_filter,
-			"tremolo": self.tremolo_filter,
-			"vibrato": self.vibrato_filter,
-			"nightcore": self.nigthcore_filter,
-			"vaporwave": self.vaporwave_filter,
-			"bass boost": self.bass_boost_filter,
-			"soft": self.soft_filter,
-			"pop": self.pop_filter,
-			"treble bass": self.treble_bass,
-			"normalization": self.normalization_filter or self.normal_default,
-		})
+	def current_filter_state(self) -> tuple[str, ...]:
+		"""Name of every active filter"""
+		return FilterPresets.names(self.filter_effects)
+
+	# TODO Coalesce identical Lavalink load
+	@classmethod
+	async def fetch_tracks(cls, query: str) -> list[Playable] | Playlist:
+		return await cls._lavalink_flight.do(
+			query, lambda: Pool.fetch_tracks(query, node=cls.balancer.best())
+		)
 
 	# TODO clean unused text
 	@staticmethod
@@ -128,7 +197,7 @@ class CustomPlayer(Player):
 		print(playable.uri)
 
 		try:
-			trck: list[Playable] = await Pool.fetch_tracks(
+			trck: list[Playable] = await self.fetch_tracks(
 				f"ytmsearch:{self.__clean_unused(playable.title)} {self.__clean_unused(playable.author)}"
 			)
 			playable = next(
@@ -142,7 +211,7 @@ class CustomPlayer(Player):
 			)
 
 			if "lh3" not in playable.artwork:
-				temp: list[Playable] = await Pool.fetch_tracks(playable.uri)
+				temp: list[Playable] = await self.fetch_tracks(playable.uri)
 				playable = temp[0]
 
 		except:  # noqa: E722
@@ -156,9 +225,9 @@ class CustomPlayer(Player):
 	async def fulfill_spotify(self, playable: Playable) -> Playable:
 		try:
 			if playable.source == "spotify":
-				conv: list[Playable] = await Pool.fetch_tracks(playable.uri)
+				conv: list[Playable] = await self.fetch_tracks(playable.uri)
 			else:
-				conv: list[Playable] = await Pool.fetch_tracks(
+				conv: list[Playable] = await self.fetch_tracks(
 					f"spsearch:{self.__clean_unused(playable.title)} {self.__clean_unused(playable.author)}"
 				)
 
@@ -166,6 +235,71 @@ class CustomPlayer(Player):
 		except:  # noqa: E722
 			return playable
 
+	# TODO Enrich track info, reuse stored info when possible
+	async def enrich(self, track: Playable) -> Playable:
+		was_ytms: bool = isinstance(track, CustomYouTubeMusicPlayable)
+		stored: TrackMeta | None = self.track_store.get(track)
+
+		if stored:
+			if stored.mirror:
+				track = (CustomYouTubeMusicPlayable if was_ytms else Playable)(
+					data=stored.mirror, playlist=track.playlist
+				)
+
+			stored.apply(track)
+			return track
+
+		original: Playable = track
+		task: list = list()
+
+		# TODO search isrc and required things
+		if (
+			not track.isrc
+			or not track.artist.artwork
+			or not track.album
+			or track.source == "spotify"
+		):
+			task.append(create_task(self.fulfill_spotify(track)))
+
+		# TODO Reqeuest straight to url, if its yotube
+		if track.source == "youtube":
+			if was_ytms and "lh3" not in track.artwork:
+				task.append(create_task(self.fulfill_youtube_music(track)))
+
+			if not was_ytms and "maxres" not in track.artwork:
+				task.append(create_task(self.fetch_tracks(track.uri)))
+
+		# TODO Check if need to run task
+		spot: Playable = None
+		for x in await gather(*task):
+			try:
+				if isinstance(x, list):
+					x: Playable = x[0]
+
+				if x.source == "spotify":
+					spot = x
+				else:
+					track = x
+			except:  # noqa: E722
+				pass
+
+		# TODO Assign new info
+		if spot:
+			track._isrc = spot.isrc
+			track._artist.artwork = spot.artist.artwork
+			track._album = spot.album
+
+		# TODO Remember only when something was learned
+		if spot or track.artwork != original.artwork:
+			self.track_store.put(
+				original,
+				TrackMeta.from_playable(
+					track, mirror=track if track.encoded != original.encoded else None
+				),
+			)
+
+		return track
+
 	# TODO Custom Recomendation
 	async def _do_recommendation(
 		self,
@@ -176,9 +310,8 @@ class CustomPlayer(Player):
 		assert self.guild is not None
 		assert self.queue.history is not None and self.auto_queue.history is not None
 
-		max_population_: int = max_population if max_population else self._auto_cutoff
-
-		if len(self.auto_queue) > self._auto_cutoff + 1 and not populate_track:
+		# TODO Transition never wait on recommendation, refiller keep auto_queue filled
+		if self.auto_queue and not populate_track:
 			# We still do the inactivity start here since if play fails and we have no more tracks...
 			# we should eventually fire the inactivity event...
 			self._inactivity_start()
@@ -190,9 +323,96 @@ class CustomPlayer(Player):
 			await self.play(track, add_history=True)
 			return
 
-		weighted_history: list[Playable] = self.queue.history[::-1][
-			: max(5, 5 * self._auto_weight)
-		]
+		async with self.__refill_lock:
+			await self.__fetch_recommendation(
+				populate_track=populate_track, max_population=max_population
+			)
+
+		if not self._current and not populate_track:
+			try:
+				now: Playable = self.auto_queue.get()
+				self.auto_queue.history.put(now)
+
+				# TODO Change it into True
+				await self.play(now, add_history=True)
+			except QueueEmpty:
+				logger.info(
+					'Player "%s" could not load any songs via AutoPlay.', self.guild.id
+				)
+				self._inactivity_start()
+
+	# TODO Background refill of auto_queue
+	def wake_refiller(self) -> None:
+		if self.autoplay is not AutoPlayMode.enabled:
+			return
+
+		if self.__refill_task is None or self.__refill_task.done():
+			self.__refill_task = create_task(self.__refill_loop())
+
+		self.__refill_wakeup.set()
+
+	async def __refill_loop(self) -> None:
+		while True:
+			await self.__refill_wakeup.wait()
+			self.__refill_wakeup.clear()
+
+			if (
+				self.autoplay is not AutoPlayMode.enabled
+				or len(self.auto_queue) >= ModularBotConst.Autoplay.LOW_WATERMARK
+			):
+				continue
+
+			# TODO Spread refill of many guilds, keep node within budget
+			await sleep(uniform(0, ModularBotConst.Autoplay.REFILL_JITTER))
+			await self.refill_budget.acquire(self.node.identifier)
+
+			try:
+				async with self.__refill_lock:
+					if len(self.auto_queue) < ModularBotConst.Autoplay.LOW_WATERMARK:
+						await self.__fetch_recommendation()
+			except Exception as e:
+				logger.warning(
+					'Player "%s" failed to refill auto_queue, %s', self.guild.id, e
+				)
+
+	def __stop_refiller(self) -> None:
+		if self.__refill_task:
+			self.__refill_task.cancel()
+			self.__refill_task = None
+
+	def pick_recommendations(
+		self, candidates: list[Playable], limit: int
+	) -> list[Playable]:
+		"""Unseen candidates up to limit, marked as recommended"""
+		picked: list[Playable] = list()
+		keys: set[str] = set()
+
+		for track in candidates:
+			identity: tuple[str, ...] = IdentityIndex.keys(track)
+			if track in self.seen or not keys.isdisjoint(identity):
+				continue
+
+			track._recommended = True
+			keys.update(identity)
+			picked.append(track)
+
+			if len(picked) >= limit:
+				break
+
+		return picked
+
+	# TODO Search recommendation and put it into auto_queue
+	async def __fetch_recommendation(
+		self,
+		*,
+		populate_track: Playable | None = None,
+		max_population: int | None = None,
+	) -> int:
+		max_population_: int = max_population if max_population else self._auto_cutoff
+
+		weighted_history: list[Playable] = self.queue.history[
+			-max(5, 5 * self._auto_weight) :
+		][::-1]
 		weighted_upcoming: list[Playable] = self.auto_queue[
 			: max(3, int((5 * self._auto_weight) / 3))
 		]
@@ -231,7 +451,7 @@ class CustomPlayer(Player):
 		if changed_by > 0:
 			self._history_count = count
 
-		changed_history: list[Playable] = self.queue.history[::-1]
+		changed_history: list[Playable] = self.queue.history[-3:][::-1]
 
 		added: int = 0
 		for i in range(min(changed_by, 3)):
@@ -279,7 +499,9 @@ class CustomPlayer(Player):
 				)
 
 			try:
-				search: Search = await Pool.fetch_tracks(query)
+				search: Search = await Pool.fetch_tracks(
+					query, node=self.balancer.best()
+				)
 
 				# TODO Change into ytms, if it was ytms
 				if youtube and isinstance(self._original, CustomYouTubeMusicPlayable):
@@ -302,33 +524,10 @@ class CustomPlayer(Player):
 		# track for result in results for track in result...
 		filtered_r: list[Playable] = [t for r in results for t in r]
 
-		if not filtered_r and not self.auto_queue:
-			logger.info(
-				'Player "%s" could not load any songs via AutoPlay.', self.guild.id
-			)
-			self._inactivity_start()
-			return
-
-		# Possibly adjust these thresholds?
-		history: list[Playable] = (
-			self.auto_queue[:40]
-			+ self.queue[:40]
-			+ self.queue.history[:-41:-1]
-			+ self.auto_queue.history[:-61:-1]
-		)
-
-		added: int = 0
-
 		shuffle(filtered_r)
-		for track in filtered_r:
-			if track in history:
-				continue
-
-			track._recommended = True
-			added += await self.auto_queue.put_wait(track)
-
-			if added >= max_population_:
-				break
+		added: int = await self.auto_queue.put_wait(
+			self.pick_recommendations(filtered_r, max_population_)
+		)
 
 		logger.debug(
 			'Player "%s" added "%s" tracks to the auto_queue via AutoPlay.',
@@ -336,18 +535,7 @@ class CustomPlayer(Player):
 			added,
 		)
 
-		if not self._current and not populate_track:
-			try:
-				now: Playable = self.auto_queue.get()
-				self.auto_queue.history.put(now)
-
-				# TODO Change it into True
-				await self.play(now, add_history=True)
-			except QueueEmpty:
-				logger.info(
-					'Player "%s" could not load any songs via AutoPlay.', self.guild.id
-				)
-				self._inactivity_start()
+		return added
 
 	# TODO Custom play
 	async def play(
@@ -442,45 +630,12 @@ class CustomPlayer(Player):
 		if vol != self._volume:
 			self._volume = vol
 
-		task: list = list()
-
-		# TODO search isrc and required things
-		if (
-			not track.isrc
-			or not track.artist.artwork
-			or not track.album
-			or track.source == "spotify"
-		):
-			task.append(create_task(self.fulfill_spotify(track)))
-
-		# TODO Reqeuest straight to url, if its yotube
-		if track.source == "youtube":
-			was_ytms: bool = isinstance(track, CustomYouTubeMusicPlayable)
-			if was_ytms and "lh3" not in track.artwork:
-				task.append(create_task(self.fulfill_youtube_music(track)))
-
-			if not was_ytms and "maxres" not in track.artwork:
-				task.append(create_task(Pool.fetch_tracks(track.uri)))
-
-		# TODO Check if need to run task
-		spot: Playable = None
-		for x in await gather(*task):
-			try:
-				if isinstance(x, list):
-					x: Playable = x[0]
-
-				if x.source == "spotify":
-					spot = x
-				else:
-					track = x
-			except:  # noqa: E722
-				pass
-
-		# TODO Assign new info
-		if spot:
-			track._isrc = spot.isrc
-			track._artist.artwork = spot.artist.artwork
-			track._album = spot.album
+		# TODO Known track is instant, unknown one get enriched after playback start
+		enrich_later: bool = (
+			ModularBotConst.Player.ENRICH_LATER and self.track_store.get(track) is None
+		)
+		if not enrich_later:
+			track = await self.enrich(track)
 
 		if replace or not self._current:
 			self._current = track
@@ -504,6 +659,9 @@ class CustomPlayer(Player):
 			"filters": self._filters(),
 		}
 
+		# TODO Staged change already live in player state, ride along this request
+		_, batch, rollback = self.__take_batch()
+
 		try:
 			await self.node._update_player(self.guild.id, data=request, replace=replace)
 		except LavalinkException as e:
@@ -512,10 +670,20 @@ class CustomPlayer(Player):
 			self._original = None
 			self._previous = old_previous
 			self._volume = original_vol
+
+			self.__settle(batch, rollback, e)
 			raise e
 
+		self.__settle(batch, rollback)
+
 		self._paused = pause
 
+		if enrich_later:
+			if self.__enrich_task:
+				self.__enrich_task.cancel()
+
+			self.__enrich_task = create_task(self.__enrich_later(track))
+
 		if add_history:
 			assert self.queue.history is not None
 			self.queue.history.put(track)
@@ -525,64 +693,437 @@ class CustomPlayer(Player):
 				populate_track=track, max_population=max_populate
 			)
 
-		# TODO Do caching
-		create_task(self.do_caching_stuff())
+		self.schedule_enrichment()
+		self.wake_refiller()
 
 		return track
 
-	# TODO Caching logic
-	async def do_caching_stuff(self) -> None:
-		# TODO Caching stuff
-		async def _cache_stuff(queue: Queue, lock: Lock):
-			async with lock:
-				cache_limit: int = 5
-				if queue.is_empty:
-					return
-
-				for x in range(cache_limit):
-					task: list = list()
-
-					if queue.count >= (x + 1):
-						# TODO Do required task
-						if queue[x].isrc and queue[x].artist.artwork:
-							task.append(create_task(self.fulfill_spotify(queue[x])))
-
-						if (
-							isinstance(queue[x], CustomYouTubeMusicPlayable)
-							and "lh3" not in queue[x].artwork
-						):
-							task.append(
-								create_task(self.fulfill_youtube_music(queue[x]))
-							)
-
-						# TODO gather task, and assign it
-						temp_spot: Playable = None
-						for a in await gather(*task):
-							try:
-								if a.source == "spotify":
-									temp_spot = a
-								else:
-									queue[x] = a
-							except:  # noqa: E722
-								pass
-
-						if temp_spot:
-							queue[x]._isrc = temp_spot.isrc
-							queue[x]._artist.artwork = temp_spot.artist.artwork
-							queue[x]._album = temp_spot.album
-
-		# TODO Do caching
-		create_task(_cache_stuff(self.queue, self.queue_lock))
-		create_task(_cache_stuff(self.auto_queue, self.auto_queue_lock))
+	# TODO Merge enriched info into playing track, audio stay untouched
+	async def __enrich_later(self, track: Playable) -> None:
+		enriched: Playable = await shield(
+			self.enrichment.submit(
+				self.guild.id,
+				track,
+				self.enrich,
+				priority=0,
+				node=self.node.identifier,
+			)
+		)
+
+		if enriched is not track:
+			TrackMeta.from_playable(enriched).apply(track)
+
+		if self._original is track:
+			self.client.dispatch("wavelink_track_enriched", self, track)
+
+	# TODO Enrich upcoming tracks, next track first
+	# TODO Playlist stay lazy, tracks count as seen once materialized
+	def queue_playlist(
+		self,
+		tracks: list[Playable],
+		*,
+		transform: Callable[[Playable], Playable] | None = None,
+		front: bool = False,
+	) -> None:
+		self.queue._items.extend_lazy(tracks, transform=transform, front=front)
+		self.queue._wakeup_next()
+
+	def schedule_enrichment(self) -> None:
+		window: int = ModularBotConst.Enrichment.WINDOW
+		upcoming: list[Playable] = [*self.queue[:window], *self.auto_queue[:window]]
+
+		pending: list[Playable] = list()
+		for track in upcoming:
+			# TODO Already known from previous run
+			if stored := self.track_store.get(track):
+				stored.apply(track)
+			else:
+				pending.append(track)
+
+		keep: set[str] = {self.enrichment.identity(x) for x in pending}
+		if self._current:
+			keep.add(self.enrichment.identity(self._current))
+
+		# TODO Drop job of track no longer upcoming
+		self.enrichment.cancel(self.guild.id, keep=keep)
+
+		for i, track in enumerate(pending, start=1):
+			self.enrichment.submit(
+				self.guild.id,
+				track,
+				self.enrich,
+				priority=i,
+				node=self.node.identifier,
+			)
 
 	# TODO Custom stop
 	async def stop(self, *, force: bool = True) -> Playable | None:
 		await super().stop(force=force)
 
+		if self.__enrich_task:
+			self.__enrich_task.cancel()
+			self.__enrich_task = None
+
+		self.enrichment.cancel(self.guild.id)
+		self.__stop_refiller()
 		self.reset_inner_work()
 
 		return
 
+	@property
+	def migrating(self) -> bool:
+		return self.__migrate_lock.locked()
+
+	# TODO Move into another node, keep playback, filters and every queue
+	async def migrate(self, node: Node, /) -> None:
+		assert self.guild is not None
+
+		if node.identifier == self.node.identifier:
+			raise InvalidNodeException(
+				f"Player '{self.guild.id}' is already on node {node!r}"
+			)
+
+		async with self.__migrate_lock:
+			current: Playable | None = self._current
+			original: Playable | None = self._original
+			previous: Playable | None = self._previous
+
+			position: int = self.position
+			paused: bool = self.paused
+			volume: int = self.volume
+			filters: Filters = self.filters
+
+			old: Node = self.node
+			await self._destroy(with_invalidate=False)
+			self._node = node
+
+			await self._dispatch_voice_update()
+			if not self.connected:
+				raise RuntimeError(
+					f"Migrating player '{self.guild.id}' failed, voice state not switched"
+				)
+
+			node._players[self.guild.id] = self
+
+			if not current:
+				async with self.transaction():
+					await self.set_filters(filters)
+					await self.set_volume(volume)
+					await self.pause(paused)
+			else:
+				# Same track resumed, now playing message is kept
+				self.resumed_track = current
+
+				await self.play(
+					current,
+					replace=True,
+					start=position,
+					volume=volume,
+					filters=filters,
+					paused=paused,
+					add_history=False,
+				)
+
+				self._original = original
+				self._previous = previous
+
+		logger.info(
+			'Player "%s" migrated from %r into %r', self.guild.id, old, self.node
+		)
+
+	# TODO Persist and restore session
+	@staticmethod
+	def encode_track(track: Playable) -> tuple[dict, bool]:
+		return (track.raw_data, isinstance(track, CustomYouTubeMusicPlayable))
+
+	@classmethod
+	def decode_track(cls, entry: tuple[dict, bool]) -> Playable:
+		data, is_youtube_music = entry
+		track: Playable = (
+			CustomYouTubeMusicPlayable if is_youtube_music else Playable
+		)(data=data)
+
+		if stored := cls.track_store.get(track):
+			stored.apply(track)
+
+		return track
+
+	def snapshot(self) -> PlayerSnapshot | None:
+		"""Reference to current state only, encoding is left to the session store"""
+		if not self.connected or self.channel is None:
+			return None
+
+		channel: Messageable | None = (
+			self.interaction.channel if self.interaction else self.text_channel
+		)
+
+		return PlayerSnapshot(
+			guild_id=self.guild.id,
+			channel_id=self.channel.id,
+			text_channel_id=channel.id if channel else None,
+			message_id=self.message.id if self.message else None,
+			current=self.encode_track(self._current) if self._current else None,
+			original=self.encode_track(self._original) if self._original else None,
+			position=self.position,
+			paused=self.paused,
+			volume=self.volume,
+			filter_effects=int(self.filter_effects),
+			normal_default=self.normal_default,
+			queue_mode=self.queue.mode.name,
+			autoplay=self.autoplay.name,
+			queue=list(map(self.encode_track, self.queue)),
+			auto_queue=list(map(self.encode_track, self.auto_queue)),
+			history=list(
+				map(
+					self.encode_track,
+					list(self.queue.history)[-ModularBotConst.Session.HISTORY :],
+				)
+			),
+		)
+
+	def __restore_state(self, snapshot: PlayerSnapshot) -> None:
+		if snapshot.text_channel_id:
+			self.text_channel = self.client.get_channel(snapshot.text_channel_id)
+
+		if self.text_channel:
+			self.now_playing.attach(self.text_channel, snapshot.message_id)
+
+		self.queue.mode = QueueMode[snapshot.queue_mode]
+		self.autoplay = AutoPlayMode[snapshot.autoplay]
+		self.normal_default = snapshot.normal_default
+
+		# Queue stay raw until reached
+		self.queue._items.extend_lazy(snapshot.queue, transform=self.decode_track)
+		self.queue._wakeup_next()
+
+		history: list[Playable] = list(map(self.decode_track, snapshot.history))
+		upcoming: list[Playable] = list(map(self.decode_track, snapshot.auto_queue))
+		self.queue.history.put(history)
+		self.auto_queue.put(upcoming)
+
+	async def restore(self, snapshot: PlayerSnapshot) -> None:
+		"""Bring back queue, mode, filter and playback position from snapshot"""
+		assert self.guild is not None
+		self.__restore_state(snapshot)
+
+		effects: FilterEffect = FilterEffect(snapshot.filter_effects)
+		if snapshot.current is None:
+			async with self.transaction():
+				await self.apply_effects(effects)
+				await self.set_volume(snapshot.volume)
+			return
+
+		current: Playable = self.decode_track(snapshot.current)
+
+		async with self.transaction():
+			await self.apply_effects(effects)
+			await self.play(
+				current,
+				start=0 if current.is_stream else snapshot.position,
+				volume=snapshot.volume,
+				paused=snapshot.paused,
+				add_history=False,
+			)
+
+		if snapshot.original:
+			self._original = self.decode_track(snapshot.original)
+
+	def adopt(
+		self, state: PlayerResponsePayload, snapshot: PlayerSnapshot | None = None
+	) -> None:
+		"""Take over player still running on a resumed node, playback is left untouched"""
+		assert self.guild is not None
+
+		if snapshot:
+			self.__restore_state(snapshot)
+			self.filter_effects = FilterEffect(snapshot.filter_effects)
+
+		current: Playable | None = state.track
+		# Same track, snapshot keep YouTube Music and enriched metadata
+		if current and snapshot and snapshot.current:
+			saved: Playable = self.decode_track(snapshot.current)
+			current = saved if saved.encoded == current.encoded else current
+
+		self._current = current
+		self._original = (
+			self.decode_track(snapshot.original)
+			if current and snapshot and snapshot.original
+			else current
+		)
+
+		self.sync(state)
+
+	def sync(self, state: PlayerResponsePayload) -> None:
+		"""Local state follow what Lavalink report"""
+		self._volume = state.volume
+		self._paused = state.paused
+		self._filters = state.filters
+		self._last_position = state.state.position
+		self._last_update = monotonic_ns()
+
+	# TODO Batched player update
+	@asynccontextmanager
+	async def transaction(self) -> AsyncIterator[None]:
+		"""Filter, volume, seek and pause made inside are sent as one update on exit"""
+		self.__transactions += 1
+		batch: Future | None = None
+
+		try:
+			yield
+		finally:
+			self.__transactions -= 1
+			if not self.__transactions:
+				batch = self.__batch
+				await self.flush_updates()
+
+		if batch:
+			await shield(batch)
+
+	async def flush_updates(self) -> None:
+		"""Send staged change now, failure is raised to whoever waited on it"""
+		request, batch, rollback = self.__take_batch()
+		if not request:
+			return
+
+		try:
+			await self.node._update_player(self.guild.id, data=request)
+		except Exception as e:
+			self.__settle(batch, rollback, e)
+		else:
+			self.__settle(batch, rollback)
+
+	def __settle(
+		self,
+		batch: Future | None,
+		rollback: dict[str, tuple[str, object]],
+		error: Exception | None = None,
+	) -> None:
+		if batch is None:
+			return
+
+		if error is None:
+			batch.set_result(None)
+			return
+
+		# Restore what was applied ahead, unless staged again since
+		for key, (attr, value) in rollback.items():
+			if key not in self.__pending:
+				setattr(self, attr, value)
+
+		batch.set_exception(error)
+
+	def __stage(
+		self, key: str, payload: object, attr: str | None = None, value: object = None
+	) -> Future:
+		# State is applied ahead, so change made later in the window see it
+		if attr is not None:
+			self.__rollback.setdefault(key, (attr, getattr(self, attr)))
+			setattr(self, attr, value)
+
+		self.__pending[key] = payload
+
+		if self.__batch is None:
+			self.__batch = get_running_loop().create_future()
+			# Failure may have no waiter, inside a transaction or once play took it
+			self.__batch.add_done_callback(lambda x: x.cancelled() or x.exception())
+
+		if not self.__transactions and (
+			self.__flush_task is None or self.__flush_task.done()
+		):
+			self.__flush_task = create_task(self.__flush_later())
+
+		return self.__batch
+
+	def __take_batch(
+		self,
+	) -> tuple[RequestPayload, Future | None, dict[str, tuple[str, object]]]:
+		if self.__flush_task and self.__flush_task is not current_task():
+			self.__flush_task.cancel()
+		self.__flush_task = None
+
+		taken: tuple = (self.__pending, self.__batch, self.__rollback)
+		self.__pending, self.__batch, self.__rollback = dict(), None, dict()
+
+		return taken
+
+	async def __flush_later(self) -> None:
+		await sleep(ModularBotConst.Player.UPDATE_WINDOW)
+		await self.flush_updates()
+
+	async def __wait(self, batch: Future) -> None:
+		# Inside a transaction the change is sent on exit
+		if not self.__transactions:
+			await shield(batch)
+
+	async def pause(self, value: bool, /) -> None:
+		assert self.guild is not None
+		await self.__wait(self.__stage("paused", value, "_paused", value))
+
+	async def seek(self, position: int = 0, /) -> None:
+		assert self.guild is not None
+
+		if not self._current:
+			return
+
+		await self.__wait(self.__stage("position", position))
+
+	async def set_volume(self, value: int = 100, /) -> None:
+		assert self.guild is not None
+		volume: int = max(min(value, 1000), 0)
+
+		await self.__wait(self.__stage("volume", volume, "_volume", volume))
+
+	async def set_filters(
+		self, filters: Filters | None = None, /, *, seek: bool = False
+	) -> None:
+		assert self.guild is not None
+
+		if filters is None:
+			filters = Filters()
+
+		batch: Future = self.__stage("filters", filters(), "_filters", filters)
+		if self.playing and seek:
+			self.__stage("position", self.position)
+
+		await self.__wait(batch)
+
+	async def apply_effects(self, effects: FilterEffect) -> None:
+		"""Replace active filter with the precompiled combination"""
+		assert self.guild is not None
+		self.filter_effects = effects
+
+		await self.__wait(
+			self.__stage(
+				"filters",
+				FilterPresets.payload(effects),
+				"_filters",
+				FilterPresets.filters(effects),
+			)
+		)
+
+	# TODO Custom disconnect
+	async def disconnect(self, **kwargs) -> None:
+		self.__stop_refiller()
+		self.enrichment.cancel(self.guild.id)
+
+		_, batch, _ = self.__take_batch()
+		if batch:
+			batch.cancel()
+
+		# Shutdown keep the last snapshot and controller for the next start
+		await self.now_playing.close(keep=self.client.is_closed())
+
+		if not self.client.is_closed():
+			await self.sessions.delete(self.guild.id)
+
+		# TODO Left playing on the node, taken over again once session resumed
+		elif self.node._resume_timeout > 0 and self.node.status is NodeStatus.CONNECTED:
+			self.node._players.pop(self.guild.id, None)
+			self.cleanup()
+			return
+
+		await super().disconnect(**kwargs)
+
 
 class FiltersTemplate(Enum):
 	DISABLE = 0
@@ -593,6 +1134,10 @@ class FiltersTemplate(Enum):
 	POP = 5
 	TREBLE_BASS = 6
 
+	@property
+	def effect(self) -> FilterEffect:
+		return FilterEffect(0) if self is self.DISABLE else FilterEffect[self.name]
+
 
 class TrackType(Enum):
 	YOUTUBE = 1
@@ -602,30 +1147,10 @@ class TrackType(Enum):
 
 	@classmethod
 	def what_type(cls, uri: str):
-		if uri.startswith("http"):
-			if "spotify.com" in uri:
-				return cls.SPOTIFY
-
-			elif "music.youtube.com" in uri:
-				return cls.YOUTUBE_MUSIC
-
-			elif "youtube.com" in uri or "youtu.be" in uri:
-				return cls.YOUTUBE
-
-			elif "soundcloud.com" in uri:
-				return cls.SOUNCLOUD
+		return QueryResolver.resolve(uri).source
 
 	def is_playlist(self, uri: str):
-		if uri.startswith("http"):
-			url: URL = URL(uri)
-
-			# TODO Checking palylist
-			if url.query.get("list") or any(
-				item in url.path for item in ["playlist", "album", "sets"]
-			):
-				return True
-
-		return False
+		return QueryResolver.resolve(uri).is_playlist
 
 	def favicon(self) -> str:
 		favicon: str = "https://www.google.com/s2/favicons?domain={domain}&sz=256"
@@ -643,6 +1168,142 @@ class TrackType(Enum):
 			return favicon.format(domain="https://soundcloud.com")
 
 
+@dataclass(frozen=True, slots=True)
+class ResolvedQuery:
+	raw: str
+	query: str
+	source: TrackType | None
+	is_url: bool
+	is_playlist: bool
+	index: int | None
+	url: str | None
+	cache_key: str
+
+
+class QueryResolver:
+	"""Parse a user query once, every URL variant maps onto one canonical form"""
+
+	__YOUTUBE_HOSTS: tuple[str, ...] = ("youtube.com", "youtu.be", "music.youtube.com")
+	__PLAYLIST_PATHS: tuple[str, ...] = ("playlist", "album", "sets")
+
+	@staticmethod
+	@lru_cache(maxsize=2048)
+	def resolve(raw: str) -> ResolvedQuery:
+		query: str = " ".join(raw.split())
+
+		if not query.startswith("http"):
+			return ResolvedQuery(
+				raw=raw,
+				query=query,
+				source=None,
+				is_url=False,
+				is_playlist=False,
+				index=0,
+				url=None,
+				cache_key=f"search:{query.casefold()}",
+			)
+
+		url: URL = URL(query)
+		host: str = (url.host or "").lower().removeprefix("www.").removeprefix("m.")
+
+		# TODO Checking palylist
+		is_playlist: bool = bool(url.query.get("list")) or any(
+			item in url.path for item in QueryResolver.__PLAYLIST_PATHS
+		)
+
+		if host in QueryResolver.__YOUTUBE_HOSTS:
+			return QueryResolver.__resolve_youtube(raw, url, host, is_playlist)
+
+		source: TrackType | None = None
+		canonical: URL = url
+
+		if host.endswith("spotify.com"):
+			source = TrackType.SPOTIFY
+			# Drop locale segment and tracking params, /intl-id/track/x -> /track/x
+			parts: list[str] = [
+				p for p in url.parts[1:] if p and not p.startswith("intl-")
+			]
+			canonical = URL.build(
+				scheme="https", host="open.spotify.com", path="/" + "/".join(parts)
+			)
+
+		elif host.endswith("soundcloud.com"):
+			source = TrackType.SOUNCLOUD
+			canonical = URL.build(
+				scheme="https",
+				host=host if host.startswith("on.") else "soundcloud.com",
+				path=url.path.rstrip("/") or "/",
+			)
+
+		canonical_url: str = str(canonical)
+
+		return ResolvedQuery(
+			raw=raw,
+			query=canonical_url,
+			source=source,
+			is_url=True,
+			is_playlist=is_playlist,
+			index=0,
+			url=canonical_url,
+			cache_key=canonical_url.removeprefix("https://").removeprefix("http://"),
+		)
+
+	@staticmethod
+	def __resolve_youtube(
+		raw: str, url: URL, host: str, is_playlist: bool
+	) -> ResolvedQuery:
+		is_music: bool = host.startswith("music.")
+		video: str | None = url.query.get("v")
+		playlist: str | None = url.query.get("list")
+
+		if host == "youtu.be":
+			video = url.path.strip("/") or video
+
+		elif url.path.startswith(("/shorts/", "/embed/", "/live/")):
+			video = url.parts[2] if len(url.parts) > 2 else video
+
+		# TODO Temp fix YT
+		index: int | None = None
+		try:
+			index = int(url.query.get("start_radio")) or int(url.query.get("index"))
+		except (ValueError, TypeError):
+			index = None
+
+		params: dict[str, str] = dict()
+		if video:
+			params["v"] = video
+		if playlist:
+			params["list"] = playlist
+
+		canonical: URL = URL.build(
+			scheme="https",
+			host="music.youtube.com" if is_music else "www.youtube.com",
+			path="/watch" if video else "/playlist",
+			query=params,
+		)
+
+		# Indexed link resolve to one track of the playlist, not the playlist
+		cache_key: str = f"youtube:{video or ''}:{playlist or ''}"
+		if index and playlist:
+			cache_key += f":{index}"
+
+		# Channel, search page, etc. keep as it is
+		if not params:
+			canonical = url
+			cache_key = f"youtube:{url.path}"
+
+		return ResolvedQuery(
+			raw=raw,
+			query=str(canonical),
+			source=TrackType.YOUTUBE_MUSIC if is_music else TrackType.YOUTUBE,
+			is_url=True,
+			is_playlist=is_playlist,
+			index=index,
+			url=str(canonical),
+			cache_key=cache_key,
+		)
+
+
 class TrackPlayerInterface(ABC):
 	@abstractmethod
 	async def _play_response(
@@ -685,6 +1346,10 @@ class TrackPlayerInterface(ABC):
 	async def stop(self, interaction: Interaction) -> None:
 		pass
 
+	@abstractmethod
+	async def drain(self, interaction: Interaction, identifier: str) -> Embed:
+		pass
+
 	@abstractmethod
 	def loop(self, interaction: Interaction, /, is_queue: bool = False) -> bool:
 		pass
@@ -0,0 +1,140 @@
+from asyncio import Task, create_task, sleep
+from typing import Callable, TypeAlias
+
+from discord import Embed, HTTPException, Message, NotFound, PartialMessage
+from discord.abc import Messageable
+from discord.ui import View
+
+from ..rate_budget import RateBudget
+from ..util import ModularUtil
+from config import ModularBotConst
+
+Render: TypeAlias = Callable[[], tuple[Embed, View] | None]
+
+
+class NowPlaying:
+	"""Single controller message of a player, edited in place across tracks.
+
+	An update only keep the latest render, it is sent once the debounce and the
+	channel edit budget allow it. Render returning ``None`` remove the message.
+	The message is sent again only when it was deleted or buried under newer one.
+	"""
+
+	budget: RateBudget = RateBudget(
+		ModularBotConst.NowPlaying.EDIT_RATE, ModularBotConst.NowPlaying.EDIT_PER
+	)
+
+	def __init__(self) -> None:
+		self.channel: Messageable | None = None
+		self.message: Message | PartialMessage | None = None
+
+		self.__view: View | None = None
+		self.__render: Render | None = None
+		self.__behind: int = 0
+		self.__task: Task | None = None
+
+	def attach(self, channel: Messageable, message_id: int | None = None) -> None:
+		"""Reuse message sent before restart, edited on the next update"""
+		self.channel = channel
+		self.message = channel.get_partial_message(message_id) if message_id else None
+		self.__behind = 0
+
+	def update(self, render: Render, *, channel: Messageable | None = None) -> None:
+		if channel is not None and (
+			self.channel is None or self.channel.id != channel.id
+		):
+			self.__move(channel)
+
+		self.__render = render
+		if self.channel is None:
+			return
+
+		if self.__task is None or self.__task.done():
+			self.__task = create_task(self.__publish_later())
+
+	def observe(self, message: Message) -> None:
+		"""Count message sent after the controller, to know when it is buried"""
+		if (
+			self.message is not None
+			and message.channel.id == self.channel.id
+			and message.id != self.message.id
+		):
+			self.__behind += 1
+
+	async def close(self, *, keep: bool = False) -> None:
+		if self.__task:
+			self.__task.cancel()
+			self.__task = None
+
+		self.__render = None
+		if not keep:
+			await self.__delete()
+
+	def __move(self, channel: Messageable) -> None:
+		if self.message is not None:
+			create_task(self.__delete())
+
+		self.channel = channel
+
+	async def __publish_later(self) -> None:
+		# Track end and the next start land in the same window
+		await sleep(ModularBotConst.NowPlaying.DEBOUNCE)
+
+		while self.__render is not None:
+			await self.budget.acquire(self.channel.id)
+
+			render, self.__render = self.__render, None
+			try:
+				await self.__publish(render())
+			except HTTPException as e:
+				ModularUtil.error_log(f"Now playing update failed, {e}")
+
+	async def __publish(self, rendered: tuple[Embed, View] | None) -> None:
+		if rendered is None:
+			await self.__delete()
+			return
+
+		embed, view = rendered
+
+		if (
+			self.message is not None
+			and self.__behind < ModularBotConst.NowPlaying.SCROLL_LIMIT
+		):
+			try:
+				self.message = await self.message.edit(embed=embed, view=view)
+				self.__swap(view)
+				return
+			except NotFound:
+				self.message = None
+
+		buried: Message | PartialMessage | None = self.message
+
+		self.message = await self.channel.send(embed=embed, view=view)
+		self.__behind = 0
+		self.__swap(view)
+
+		if buried is not None:
+			await self.__delete(buried)
+
+	def __swap(self, view: View) -> None:
+		if self.__view is not None and self.__view is not view:
+			self.__view.stop()
+
+		self.__view = view
+
+	async def __delete(self, message: Message | PartialMessage | None = None) -> None:
+		if message is None:
+			message, self.message = self.message, None
+			self.__behind = 0
+
+			if self.__view is not None:
+				self.__view.stop()
+				self.__view = None
+
+		if message is None:
+			return
+
+		try:
+			await message.delete()
+		except HTTPException:
+			pass
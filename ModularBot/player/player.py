@@ -13,9 +13,17 @@ from wavelink import (
 	Album,
 	Artist,
 	PlaylistInfo,
-	Filters,
+	Pool,
+	InvalidNodeException,
+)
+from wavelink.node import Node
+from .presets import FilterEffect, FilterPresets
+from .interfaces import (
+	CustomPlayer,
+	CustomYouTubeMusicPlayable,
+	TrackType,
+	FiltersTemplate,
 )
-from .interfaces import CustomPlayer, TrackType, FiltersTemplate
 from .util_player import UtilTrackPlayer
 from .base_player import TrackPlayerBase, TrackPlayerDecorator
 from .view import QueueView, SelectViewTrack
@@ -56,10 +64,18 @@ class TrackPlayer(TrackPlayerBase):
 		tracks: Playable | Playlist = await self._custom_wavelink_searcher(
 			query=query, track_type=source, is_search=True
 		)
+		data: list[Playable] = tracks
+		if isinstance(tracks, Playlist):
+			data = (
+				map(CustomYouTubeMusicPlayable.from_playable, tracks.tracks)
+				if source is TrackType.YOUTUBE_MUSIC
+				else tracks.tracks
+			)
+
 		view: SelectViewTrack = SelectViewTrack(
 			self,
 			interaction,
-			data=tracks if not isinstance(tracks, Playlist) else tracks.tracks,
+			data=data,
 			autoplay=autoplay,
 			force_play=force_play,
 			put_front=put_front,
@@ -88,15 +104,6 @@ class TrackPlayer(TrackPlayerBase):
 		else:
 			player = cast(CustomPlayer, interaction.user.guild.voice_client)
 
-		# TODO Enable normalization
-		if player.normal_default and not player.normalization_filter:
-			filters: Filters = player.filters
-			filters.plugin_filters.set(**{
-				"normalization": {"maxAmplitude": 0.5, "adaptive": True}
-			})
-
-			await player.set_filters(filters)
-
 		# TODO Record interaction
 		player.interaction = interaction
 
@@ -104,6 +111,7 @@ class TrackPlayer(TrackPlayerBase):
 			TrackType.what_type(uri=query) if not was_playable else None
 		) or source
 
+		# Searched before the transaction, other control is not held by the network
 		if not was_playable:
 			tracks: Playable | Playlist = await self._custom_wavelink_searcher(
 				query=query, track_type=track_type
@@ -112,56 +120,76 @@ class TrackPlayer(TrackPlayerBase):
 		else:
 			tracks = query
 
-		# Enable autoplay, skip into next song
-		if player.autoplay is AutoPlayMode.disabled:
-			player.autoplay = AutoPlayMode.partial
-
-		if autoplay is not None:
-			player.autoplay = (
-				AutoPlayMode.enabled if autoplay is True else AutoPlayMode.partial
-			)
+		started: Playable | None = None
+
+		# TODO Normalization ride along the play request, one update
+		async with player.transaction():
+			# TODO Enable normalization
+			if (
+				player.normal_default
+				and FilterEffect.NORMALIZATION not in player.filter_effects
+			):
+				await player.apply_effects(
+					player.filter_effects | FilterEffect.NORMALIZATION
+				)
 
+			# Enable autoplay, skip into next song
 			if player.autoplay is AutoPlayMode.disabled:
-				player.auto_queue.clear()
+				player.autoplay = AutoPlayMode.partial
 
-		if isinstance(tracks, Playlist):
-			playlist: list[Playable] = tracks.tracks.copy()
+			if autoplay is not None:
+				player.autoplay = (
+					AutoPlayMode.enabled if autoplay is True else AutoPlayMode.partial
+				)
 
-			if player.playing and force_play:
-				player.queue.put_at(0, player.queue.history.get_at(-1))
+				if player.autoplay is AutoPlayMode.disabled:
+					player.auto_queue.clear()
 
-			# TODO Try extend left on here
-			if put_front or force_play:
-				playlist.extend(player.queue._items)
-				player.queue._items = playlist
+				player.wake_refiller()
 
-			else:
-				player.queue._items.extend(playlist)
+			if isinstance(tracks, Playlist):
+				if player.playing and force_play:
+					player.queue.put_at(0, player.queue.history.get_at(-1))
 
-			player.queue._wakeup_next()
+				# TODO Kept lazy, materialized in chunk once playback get close
+				player.queue_playlist(
+					tracks.tracks,
+					transform=CustomYouTubeMusicPlayable.from_playable
+					if track_type is TrackType.YOUTUBE_MUSIC
+					else None,
+					front=put_front or force_play,
+				)
 
-			if force_play and player.playing:
-				await player.seek(player.current.length * 1000)
-			elif not player.playing:
-				trck: Playable = await player.queue.get_wait()
-				await player.play(trck, populate=(autoplay is True))
+				if force_play and player.playing:
+					await player.seek(player.current.length * 1000)
+				elif not player.playing:
+					trck: Playable = await player.queue.get_wait()
+					started = await player.play(trck)
 
-			is_playlist = True
-		elif player.playing:
-			if force_play:
-				player.queue.put_at(0, player.queue.history.get_at(-1))
-				player.queue.put_at(0, tracks)
-				await player.seek(player.current.length * 1000)
+				is_playlist = True
+			elif player.playing:
+				if force_play:
+					player.queue.put_at(0, player.queue.history.get_at(-1))
+					player.queue.put_at(0, tracks)
+					await player.seek(player.current.length * 1000)
 
-			if put_front:
-				player.queue.put_at(0, tracks)
+				if put_front:
+					player.queue.put_at(0, tracks)
 
-			elif not force_play:
-				await player.queue.put_wait(tracks)
+				elif not force_play:
+					await player.queue.put_wait(tracks)
 
-			is_queued = True
-		else:
-			await player.play(tracks, populate=(autoplay is True))
+				is_queued = True
+			else:
+				started = await player.play(tracks)
+
+			# TODO Queue changed without new track started
+			if is_queued or (is_playlist and player.playing):
+				player.schedule_enrichment()
+
+		# Recommendation search also stay outside the transaction
+		if started is not None and autoplay is True:
+			await player._do_recommendation(populate_track=started, max_population=5)
 
 		return (tracks, is_playlist, is_queued)
 
@@ -205,10 +233,12 @@ class TrackPlayer(TrackPlayerBase):
 
 			player.queue.put_at(0, track)
 
-		await player.seek(player.current.length * 1000)
+		# TODO Seek and resume in one update
+		async with player.transaction():
+			await player.seek(player.current.length * 1000)
 
-		if player.paused:
-			await player.pause(not player.paused)
+			if player.paused:
+				await player.pause(not player.paused)
 
 	@TrackPlayerDecorator.record_interaction()
 	async def jump(self, interaction: Interaction) -> None:
@@ -233,20 +263,21 @@ class TrackPlayer(TrackPlayerBase):
 		player: CustomPlayer = cast(CustomPlayer, interaction.user.guild.voice_client)
 
 		was_on_loop: bool = player.queue.mode is QueueMode.loop
-		if (
-			not player.queue.history.is_empty
-			and player.queue.history.count >= 1
-			and player.queue.history[-1] is player._original
-		):
-			player.queue.put_at(0, player.queue.history.get_at(-1))
-			player.queue.put_at(0, player.queue.history.get_at(-1))
-			await player.seek(player.current.length * 1000)
+		async with player.transaction():
+			if (
+				not player.queue.history.is_empty
+				and player.queue.history.count >= 1
+				and player.queue.history[-1] is player._original
+			):
+				player.queue.put_at(0, player.queue.history.get_at(-1))
+				player.queue.put_at(0, player.queue.history.get_at(-1))
+				await player.seek(player.current.length * 1000)
 
-		else:
-			was_allowed = False
+			else:
+				was_allowed = False
 
-		if player.paused:
-			await player.pause(not player.paused)
+			if player.paused:
+				await player.pause(not player.paused)
 
 		return (was_allowed, was_on_loop)
 
@@ -262,6 +293,29 @@ class TrackPlayer(TrackPlayerBase):
 
 		await player.stop()
 
+	async def drain(self, interaction: Interaction, identifier: str) -> Embed:
+		embed: Embed = Embed(
+			color=ModularUtil.convert_color(ModularBotConst.Color.SUCCESS),
+		)
+
+		try:
+			node: Node = Pool.get_node(identifier)
+		except InvalidNodeException:
+			embed.description = f"❌ Node **{identifier}** not found"
+			embed.color = ModularUtil.convert_color(ModularBotConst.Color.FAILED)
+			return embed
+
+		moved, failed = await self._drain_node(node)
+
+		embed.description = (
+			f"🚚 Node **{identifier}** drained, **{moved}** player moved"
+			+ (f", **{failed}** failed" if failed else "")
+		)
+		if failed:
+			embed.color = ModularUtil.convert_color(ModularBotConst.Color.WARNING)
+
+		return embed
+
 	@TrackPlayerDecorator.record_interaction()
 	def clear(self, interaction: Interaction) -> None:
 		player: CustomPlayer = cast(CustomPlayer, interaction.user.guild.voice_client)
@@ -272,6 +326,7 @@ class TrackPlayer(TrackPlayerBase):
 		if not player.queue.is_empty or not player.auto_queue.is_empty:
 			player.queue.reset()
 			player.auto_queue.reset()
+			player.schedule_enrichment()
 
 	@TrackPlayerDecorator.record_interaction()
 	def shuffle(self, interaction: Interaction) -> None:
@@ -387,144 +442,31 @@ class TrackPlayer(TrackPlayerBase):
 	# Filter Template
 	@TrackPlayerDecorator.record_interaction()
 	async def filters_template(
-		self, interaction: Interaction, /, effect: FiltersTemplate
+		self, interaction: Interaction, /, effect: FiltersTemplate, stack: bool = False
 	) -> Embed:
 		player: CustomPlayer = cast(CustomPlayer, interaction.user.guild.voice_client)
-		filters: Filters = player.filters
-		is_disable: bool = effect is FiltersTemplate.DISABLE
 		embed: Embed = Embed(
 			title="💽 Filters applied",
 			color=ModularUtil.convert_color(ModularBotConst.Color.SUCCESS),
 			description="It may takes a while to apply",
 		)
 
-		player.reset_filter()
-		filters.reset()
-
-		async def __filter_nightcore() -> bool:
-			player.nigthcore_filter = not player.nigthcore_filter
-
-			if player.nigthcore_filter:
-				filters.timescale.set(pitch=1.2, speed=1.2, rate=1)
-
-			await player.set_filters(filters)
-			return player.nigthcore_filter
-
-		async def __filter_vaporwave() -> bool:
-			player.vaporwave_filter = not player.vaporwave_filter
-
-			# TODO Explore filter, setup
-			if player.vaporwave_filter:
-				filters.equalizer.set(
-					bands=[
-						{"band": 1, "gain": 0.3},
-						{"band": 0, "gain": 0.3},
-					]
-				)
-				filters.timescale.set(pitch=0.85, speed=0.8, rate=1)
-				filters.tremolo.set(depth=0.3, frequency=14)
-
-			await player.set_filters(filters)
-			return player.vaporwave_filter
-
-		async def __filter_bass_boost() -> bool:
-			player.bass_boost_filter = not player.bass_boost_filter
-
-			# TODO Explore filter, setup
-			if player.bass_boost_filter:
-				bass_boost: list = [
-					{"band": 0, "gain": 0.2},
-					{"band": 1, "gain": 0.15},
-					{"band": 2, "gain": 0.01},
-				]
-				filters.equalizer.set(bands=bass_boost)
-
-			await player.set_filters(filters)
-
-			return player.bass_boost_filter
-
-		async def __filter_soft() -> bool:
-			player.soft_filter = not player.soft_filter
-
-			# TODO Explore filter, setup
-			if player.soft_filter:
-				filters.low_pass.set(smoothing=20.0)
-
-			await player.set_filters(filters)
-
-			return player.soft_filter
-
-		async def __filter_pop() -> bool:
-			player.pop_filter = not player.pop_filter
-
-			# TODO Explore filter, setup
-			if player.pop_filter:
-				pop: list = [
-					{"band": 0, "gain": -0.1},
-					{"band": 1, "gain": -0.09},
-					{"band": 2, "gain": -0.01},
-					{"band": 4, "gain": 0.004},
-					{"band": 5, "gain": 0.05},
-					{"band": 6, "gain": 0.1},
-					{"band": 7, "gain": 0.09},
-					{"band": 8, "gain": 0.009},
-					{"band": 9, "gain": 0.005},
-				]
-				filters.equalizer.set(bands=pop)
-
-			await player.set_filters(filters)
-
-			return player.pop_filter
-
-		async def __filter_treble_bass() -> bool:
-			player.treble_bass = not player.treble_bass
-
-			# TODO Explore filter, setup
-			if player.treble_bass:
-				treble_bass: list = [
-					{"band": 0, "gain": 0.2},
-					{"band": 1, "gain": 0.15},
-					{"band": 2, "gain": 0.01},
-					{"band": 9, "gain": 0.01},
-					{"band": 10, "gain": 0.025},
-					{"band": 11, "gain": 0.05},
-					{"band": 12, "gain": 0.1},
-				]
-				filters.equalizer.set(bands=treble_bass)
-
-			await player.set_filters(filters)
-
-			return player.treble_bass
-
-		if is_disable:
-			await player.set_filters(filters)
-
-		elif effect is FiltersTemplate.NIGHT_CORE:
-			res = await __filter_nightcore()
-			embed.add_field(name="Nightcore", value=res)
-
-		elif effect is FiltersTemplate.VAPOR_WAVE:
-			res = await __filter_vaporwave()
-			embed.add_field(name="Vaporwave", value=res)
-
-		elif effect is FiltersTemplate.BASS_BOOST:
-			res = await __filter_bass_boost()
-			embed.add_field(name="Bass boost", value=res)
-
-		elif effect is FiltersTemplate.SOFT:
-			res = await __filter_soft()
-			embed.add_field(name="Soft", value=res)
-
-		elif effect is FiltersTemplate.POP:
-			res = await __filter_pop()
-			embed.add_field(name="Pop", value=res)
+		# TODO Stack toggle template on top, otherwise it replace every filter
+		effects: FilterEffect = (
+			player.filter_effects ^ effect.effect if stack else effect.effect
+		)
+		if effect is FiltersTemplate.DISABLE:
+			effects = FilterEffect(0)
 
-		elif effect is FiltersTemplate.TREBLE_BASS:
-			res = await __filter_treble_bass()
-			embed.add_field(name="Treble bass", value=res)
+		await player.apply_effects(effects)
 
-		if is_disable:
+		if effect is FiltersTemplate.DISABLE:
 			embed.title = "🔻Disabling all effect"
+		else:
+			embed.add_field(
+				name=FilterPresets.names(effect.effect)[0].capitalize(),
+				value=effect.effect in effects,
+			)
 
 		return embed
 
@@ -541,7 +483,7 @@ class TrackPlayer(TrackPlayerBase):
 		normalization: bool = None,
 	) -> Embed:
 		player: CustomPlayer = cast(CustomPlayer, interaction.user.guild.voice_client)
-		filters: Filters = player.filters
+		effects: FilterEffect = player.filter_effects
 
 		embed: Embed = Embed(
 			title="💽 Filters applied",
@@ -549,76 +491,26 @@ class TrackPlayer(TrackPlayerBase):
 			color=ModularUtil.convert_color(ModularBotConst.Color.SUCCESS),
 		)
 
-		def __filter_karaoke(state: bool = False) -> None:
-			player.karaoke_filter = state
-
-			if state:
-				filters.karaoke.set(
-					level=1.0, mono_level=1.0, filter_band=220.0, filter_width=100.0
-				)
-			else:
-				filters.karaoke.reset()
-
-		def __filter_rotation(state: bool = False) -> None:
-			player.rotation_filter = state
-
-			if state:
-				filters.rotation.set(rotation_hz=0.2)
-			else:
-				filters.rotation.reset()
-
-		def __filter_tremolo(state: bool = False) -> None:
-			player.tremolo_filter = state
-
-			# TODO Explore filter, setup
-			if state:
-				filters.tremolo.set(frequency=10, depth=0.5)
-			else:
-				filters.tremolo.reset()
-
-		def __filter_vibrato(state: bool = False) -> None:
-			player.vibrato_filter = state
-
-			# TODO Explore filter, setup
-			if state:
-				filters.vibrato.set(frequency=10, depth=0.9)
-			else:
-				filters.vibrato.reset()
-
-		def __filter_normalization(state: bool = False) -> None:
-			player.normalization_filter = state
-			player.normal_default = False
-
-			if state:
-				filters.plugin_filters.set(**{
-					"normalization": {"maxAmplitude": 0.5, "adaptive": True}
-				})
-			else:
-				filters.plugin_filters.reset()
-
-		if karaoke is not None:
-			__filter_karaoke(karaoke)
-			embed.add_field(name="Karaoke", value=str(karaoke))
-
-		if rotation is not None:
-			__filter_rotation(rotation)
-			embed.add_field(name="Rotation", value=str(rotation))
-
-		if tremolo is not None:
-			__filter_tremolo(tremolo)
-			embed.add_field(name="Tremolo", value=str(tremolo))
+		for name, effect, state in (
+			("Karaoke", FilterEffect.KARAOKE, karaoke),
+			("Rotation", FilterEffect.ROTATION, rotation),
+			("Tremolo", FilterEffect.TREMOLO, tremolo),
+			("Vibrato", FilterEffect.VIBRATO, vibrato),
+			("Normalization", FilterEffect.NORMALIZATION, normalization),
+		):
+			if state is None:
+				continue
 
-		if vibrato is not None:
-			__filter_vibrato(vibrato)
-			embed.add_field(name="Vibrato", value=str(vibrato))
+			effects = effects | effect if state else effects & ~effect
+			embed.add_field(name=name, value=str(state))
 
+		# TODO Explicit choice override the default normalization
 		if normalization is not None:
-			__filter_normalization(normalization)
-			embed.add_field(name="Normalization", value=str(normalization))
+			player.normal_default = False
 
 		if not embed.fields:
 			embed.description = "Nothing to apply"
 
-		await player.set_filters(filters)
+		await player.apply_effects(effects)
 
 		return embed
@@ -0,0 +1,206 @@
+from dataclasses import dataclass
+from enum import IntFlag
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+from wavelink import Filters
+from wavelink.types.filters import FilterPayload
+
+
+class FilterEffect(IntFlag):
+	KARAOKE = 1 << 0
+	ROTATION = 1 << 1
+	TREMOLO = 1 << 2
+	VIBRATO = 1 << 3
+	NORMALIZATION = 1 << 4
+
+	# Template
+	NIGHT_CORE = 1 << 5
+	VAPOR_WAVE = 1 << 6
+	BASS_BOOST = 1 << 7
+	SOFT = 1 << 8
+	POP = 1 << 9
+	TREBLE_BASS = 1 << 10
+
+
+@dataclass(frozen=True, slots=True)
+class FilterPreset:
+	effect: FilterEffect
+	name: str
+	payload: Mapping
+
+
+def _freeze(value):
+	if isinstance(value, Mapping):
+		return MappingProxyType({x: _freeze(y) for x, y in value.items()})
+
+	if isinstance(value, (list, tuple)):
+		return tuple(_freeze(x) for x in value)
+
+	return value
+
+
+def _thaw(value):
+	if isinstance(value, Mapping):
+		return {x: _thaw(y) for x, y in value.items()}
+
+	if isinstance(value, tuple):
+		return [_thaw(x) for x in value]
+
+	return value
+
+
+def _preset(effect: FilterEffect, name: str, payload: dict) -> FilterPreset:
+	return FilterPreset(effect, name, _freeze(payload))
+
+
+class FilterPresets:
+	"""Every filter effect as data, combination compiled once into a request payload.
+
+	Stacked effects are merged in registry order, equalizer gain add up, timescale
+	multiply and any other filter is overridden by the later effect.
+	"""
+
+	REGISTRY: tuple[FilterPreset, ...] = (
+		_preset(
+			FilterEffect.KARAOKE,
+			"karaoke",
+			{
+				"karaoke": {
+					"level": 1.0,
+					"monoLevel": 1.0,
+					"filterBand": 220.0,
+					"filterWidth": 100.0,
+				}
+			},
+		),
+		_preset(FilterEffect.ROTATION, "rotation", {"rotation": {"rotationHz": 0.2}}),
+		_preset(
+			FilterEffect.TREMOLO,
+			"tremolo",
+			{"tremolo": {"frequency": 10, "depth": 0.5}},
+		),
+		_preset(
+			FilterEffect.VIBRATO,
+			"vibrato",
+			{"vibrato": {"frequency": 10, "depth": 0.9}},
+		),
+		_preset(
+			FilterEffect.NIGHT_CORE,
+			"nightcore",
+			{"timescale": {"pitch": 1.2, "speed": 1.2, "rate": 1}},
+		),
+		_preset(
+			FilterEffect.VAPOR_WAVE,
+			"vaporwave",
+			{
+				"equalizer": [{"band": 1, "gain": 0.3}, {"band": 0, "gain": 0.3}],
+				"timescale": {"pitch": 0.85, "speed": 0.8, "rate": 1},
+				"tremolo": {"depth": 0.3, "frequency": 14},
+			},
+		),
+		_preset(
+			FilterEffect.BASS_BOOST,
+			"bass boost",
+			{
+				"equalizer": [
+					{"band": 0, "gain": 0.2},
+					{"band": 1, "gain": 0.15},
+					{"band": 2, "gain": 0.01},
+				]
+			},
+		),
+		_preset(FilterEffect.SOFT, "soft", {"lowPass": {"smoothing": 20.0}}),
+		_preset(
+			FilterEffect.POP,
+			"pop",
+			{
+				"equalizer": [
+					{"band": 0, "gain": -0.1},
+					{"band": 1, "gain": -0.09},
+					{"band": 2, "gain": -0.01},
+					{"band": 4, "gain": 0.004},
+					{"band": 5, "gain": 0.05},
+					{"band": 6, "gain": 0.1},
+					{"band": 7, "gain": 0.09},
+					{"band": 8, "gain": 0.009},
+					{"band": 9, "gain": 0.005},
+				]
+			},
+		),
+		_preset(
+			FilterEffect.TREBLE_BASS,
+			"treble bass",
+			{
+				"equalizer": [
+					{"band": 0, "gain": 0.2},
+					{"band": 1, "gain": 0.15},
+					{"band": 2, "gain": 0.01},
+					{"band": 9, "gain": 0.01},
+					{"band": 10, "gain": 0.025},
+					{"band": 11, "gain": 0.05},
+					{"band": 12, "gain": 0.1},
+				]
+			},
+		),
+		_preset(
+			FilterEffect.NORMALIZATION,
+			"normalization",
+			{
+				"pluginFilters": {
+					"normalization": {"maxAmplitude": 0.5, "adaptive": True}
+				}
+			},
+		),
+	)
+
+	@staticmethod
+	@lru_cache(maxsize=None)
+	def compile(effects: FilterEffect) -> Mapping:
+		"""Read only payload of the combination, compiled once and shared"""
+		payload: dict = dict()
+		gains: list[float] | None = None
+
+		for preset in FilterPresets.REGISTRY:
+			if not effects & preset.effect:
+				continue
+
+			for key, value in preset.payload.items():
+				if key == "equalizer":
+					gains = gains or [0.0] * 15
+					for band in value:
+						gains[band["band"]] = max(
+							-0.25, min(1.0, gains[band["band"]] + band["gain"])
+						)
+
+				elif key == "timescale" and key in payload:
+					payload[key] = {
+						x: round(payload[key].get(x, 1.0) * value.get(x, 1.0), 4)
+						for x in payload[key].keys() | value.keys()
+					}
+
+				else:
+					payload[key] = {**payload.get(key, {}), **value}
+
+		if gains is not None:
+			payload["equalizer"] = [
+				{"band": i, "gain": round(x, 4)} for i, x in enumerate(gains)
+			]
+
+		return _freeze(payload)
+
+	@staticmethod
+	@lru_cache(maxsize=None)
+	def names(effects: FilterEffect) -> tuple[str, ...]:
+		"""Active effect name, in registry order"""
+		return tuple(x.name for x in FilterPresets.REGISTRY if effects & x.effect)
+
+	@classmethod
+	def payload(cls, effects: FilterEffect) -> FilterPayload:
+		"""Own plain copy of the compiled payload, ready to be sent"""
+		return _thaw(cls.compile(effects))
+
+	@classmethod
+	def filters(cls, effects: FilterEffect) -> Filters:
+		return Filters(data=cls.payload(effects))
@@ -0,0 +1,242 @@
+from typing import Callable, Iterable, Iterator, Sequence
+
+from wavelink import Playable
+
+from .identity_index import IdentityIndex
+
+
+class _Lazy:
+	__slots__ = ("source", "start", "stop", "transform")
+
+	def __init__(
+		self,
+		source: Sequence[Playable],
+		start: int,
+		stop: int,
+		transform: Callable[[Playable], Playable] | None,
+	) -> None:
+		self.source: Sequence[Playable] = source
+		self.start: int = start
+		self.stop: int = stop
+		self.transform: Callable[[Playable], Playable] | None = transform
+
+	def __len__(self) -> int:
+		return self.stop - self.start
+
+	def at(self, offset: int) -> Playable:
+		track: Playable = self.source[self.start + offset]
+		return self.transform(track) if self.transform else track
+
+	def cut(self, start: int, stop: int) -> "_Lazy":
+		return _Lazy(self.source, self.start + start, self.start + stop, self.transform)
+
+
+class TrackSegments:
+	"""List compatible storage for ``Queue._items`` made of segments.
+
+	A playlist is kept as a lazy view over the loaded tracks and only turned into
+	queue items ``chunk`` at a time, when an index inside it is accessed. Adding a
+	playlist, at either end, never copies the tracks already in the queue. Track
+	is reported to ``index`` once it is a queue item, lazy one as it materialize.
+	"""
+
+	def __init__(self, chunk: int = 50, index: IdentityIndex | None = None) -> None:
+		self.__chunk: int = chunk
+		self.__index: IdentityIndex | None = index
+		self.__segments: list[list[Playable] | _Lazy] = list()
+		self.__length: int = 0
+
+	def __len__(self) -> int:
+		return self.__length
+
+	def __bool__(self) -> bool:
+		return self.__length > 0
+
+	def __repr__(self) -> str:
+		return f"TrackSegments(length={self.__length}, segments={len(self.__segments)})"
+
+	def __getitem__(self, index: int | slice) -> Playable | list[Playable]:
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(self.__length))]
+
+		segment, offset = self.__materialize(index)
+		return self.__segments[segment][offset]
+
+	def __setitem__(self, index: int, value: Playable) -> None:
+		segment, offset = self.__materialize(index)
+		self.__report(entered=(value,), left=(self.__segments[segment][offset],))
+		self.__segments[segment][offset] = value
+
+	def __delitem__(self, index: int | slice) -> None:
+		if isinstance(index, slice):
+			for i in sorted(range(*index.indices(self.__length)), reverse=True):
+				self.pop(i)
+			return
+
+		self.pop(index)
+
+	# Read only walk, lazy part is not materialized
+	def __iter__(self) -> Iterator[Playable]:
+		for segment in list(self.__segments):
+			if isinstance(segment, _Lazy):
+				yield from (segment.at(i) for i in range(len(segment)))
+			else:
+				yield from list(segment)
+
+	def __reversed__(self) -> Iterator[Playable]:
+		for segment in reversed(list(self.__segments)):
+			if isinstance(segment, _Lazy):
+				yield from (segment.at(i) for i in reversed(range(len(segment))))
+			else:
+				yield from reversed(list(segment))
+
+	def __contains__(self, item: Playable) -> bool:
+		return any(x == item for x in self)
+
+	def pop(self, index: int = -1) -> Playable:
+		segment, offset = self.__materialize(index)
+		track: Playable = self.__segments[segment].pop(offset)
+		self.__report(left=(track,))
+
+		self.__length -= 1
+		if not self.__segments[segment]:
+			del self.__segments[segment]
+
+		return track
+
+	def insert(self, index: int, value: Playable) -> None:
+		index = max(
+			0, min(self.__length, index + self.__length if index < 0 else index)
+		)
+
+		if index == self.__length:
+			self.append(value)
+			return
+
+		self.__report(entered=(value,))
+
+		if index == 0:
+			head: list[Playable] | _Lazy = self.__segments[0]
+
+			if isinstance(head, list) and len(head) < self.__chunk:
+				head.insert(0, value)
+			else:
+				self.__segments.insert(0, [value])
+			self.__length += 1
+			return
+
+		segment, offset = self.__materialize(index)
+		self.__segments[segment].insert(offset, value)
+		self.__length += 1
+
+	def append(self, value: Playable) -> None:
+		self.__report(entered=(value,))
+
+		if self.__segments and isinstance(self.__segments[-1], list):
+			self.__segments[-1].append(value)
+		else:
+			self.__segments.append([value])
+
+		self.__length += 1
+
+	def extend(self, items: Iterable[Playable]) -> None:
+		items = list(items)
+		if not items:
+			return
+
+		self.__report(entered=items)
+		self.__segments.append(items)
+		self.__length += len(items)
+
+	def extend_lazy(
+		self,
+		source: Sequence[Playable],
+		*,
+		transform: Callable[[Playable], Playable] | None = None,
+		front: bool = False,
+	) -> None:
+		"""Add source as one lazy segment, source must not be mutated afterward"""
+		if not source:
+			return
+
+		lazy: _Lazy = _Lazy(source, 0, len(source), transform)
+
+		if front:
+			self.__segments.insert(0, lazy)
+		else:
+			self.__segments.append(lazy)
+
+		self.__length += len(lazy)
+
+	def index(self, item: Playable) -> int:
+		for i, track in enumerate(self):
+			if track == item:
+				return i
+
+		raise ValueError(f"{item!r} is not in queue")
+
+	def remove(self, item: Playable) -> None:
+		self.pop(self.index(item))
+
+	def clear(self) -> None:
+		for segment in self.__segments:
+			if not isinstance(segment, _Lazy):
+				self.__report(left=segment)
+
+		self.__segments.clear()
+		self.__length = 0
+
+	# Copy is not reported, it is a snapshot of the queue
+	def copy(self) -> "TrackSegments":
+		copied: TrackSegments = TrackSegments(self.__chunk)
+		copied.__segments = [
+			x.cut(0, len(x)) if isinstance(x, _Lazy) else x.copy()
+			for x in self.__segments
+		]
+		copied.__length = self.__length
+
+		return copied
+
+	def __locate(self, index: int) -> tuple[int, int]:
+		if index < 0:
+			index += self.__length
+
+		if not 0 <= index < self.__length:
+			raise IndexError("queue index out of range")
+
+		for i, segment in enumerate(self.__segments):
+			if index < len(segment):
+				return (i, index)
+
+			index -= len(segment)
+
+		raise IndexError("queue index out of range")
+
+	def __materialize(self, index: int) -> tuple[int, int]:
+		"""Locate index, turning the lazy chunk holding it into a plain list"""
+		i, offset = self.__locate(index)
+		segment: list[Playable] | _Lazy = self.__segments[i]
+
+		if not isinstance(segment, _Lazy):
+			return (i, offset)
+
+		start: int = offset - offset % self.__chunk
+		stop: int = min(len(segment), start + self.__chunk)
+
+		chunk: list[Playable] = [segment.at(x) for x in range(start, stop)]
+		self.__report(entered=chunk)
+
+		parts: list[list[Playable] | _Lazy] = [
+			segment.cut(0, start),
+			chunk,
+			segment.cut(stop, len(segment)),
+		]
+		self.__segments[i : i + 1] = [x for x in parts if len(x)]
+
+		return (i + (start > 0), offset - start)
+
+	def __report(
+		self, entered: Iterable[Playable] = (), left: Iterable[Playable] = ()
+	) -> None:
+		if self.__index is not None:
+			self.__index.update(entered, left)
@@ -0,0 +1,179 @@
+from asyncio import to_thread
+from dataclasses import dataclass, field, asdict
+from json import dumps, loads
+from os import makedirs, path
+from sqlite3 import Connection, connect
+from time import time
+
+from ..util import ModularUtil
+
+
+@dataclass(slots=True)
+class PlayerSnapshot:
+	"""Everything needed to bring a player back, tracks kept as Lavalink raw data"""
+
+	guild_id: int
+	channel_id: int
+	text_channel_id: int | None = None
+	message_id: int | None = None
+	# Each track is [raw data, is YouTube Music]
+	current: tuple[dict, bool] | None = None
+	original: tuple[dict, bool] | None = None
+	position: int = 0
+	paused: bool = False
+	volume: int = 100
+	filter_effects: int = 0
+	normal_default: bool = True
+	queue_mode: str = "normal"
+	autoplay: str = "disabled"
+	queue: list[tuple[dict, bool]] = field(default_factory=list)
+	auto_queue: list[tuple[dict, bool]] = field(default_factory=list)
+	history: list[tuple[dict, bool]] = field(default_factory=list)
+	saved_at: float = 0.0
+
+
+class SessionStore:
+	"""Player snapshot kept in SQLite, one row per guild.
+
+	Serialization and disk write both run on a worker thread, the event loop only
+	collect references to the track raw data.
+	"""
+
+	__SCHEMA: str = """
+	CREATE TABLE IF NOT EXISTS player_session (
+		guild_id INTEGER PRIMARY KEY,
+		data TEXT NOT NULL,
+		updated_at REAL NOT NULL
+	);
+	CREATE TABLE IF NOT EXISTS node_session (
+		uri TEXT PRIMARY KEY,
+		session_id TEXT NOT NULL,
+		updated_at REAL NOT NULL
+	);
+	"""
+
+	def __init__(self, file: str, *, max_age: float) -> None:
+		self.__file: str = file
+		self.__max_age: float = max_age
+
+		self.__conn: Connection | None = None
+
+	@property
+	def is_open(self) -> bool:
+		return self.__conn is not None
+
+	async def open(self) -> None:
+		if self.is_open:
+			return
+
+		await to_thread(self.__open)
+
+	async def close(self) -> None:
+		if not self.is_open:
+			return
+
+		await to_thread(self.__conn.close)
+		self.__conn = None
+
+	async def save(self, snapshots: list[PlayerSnapshot]) -> None:
+		if not self.is_open or not snapshots:
+			return
+
+		try:
+			await to_thread(self.__write, snapshots)
+		except Exception as e:
+			ModularUtil.error_log(f"Player session save failed, {e}")
+
+	async def delete(self, guild_id: int) -> None:
+		if not self.is_open:
+			return
+
+		try:
+			await to_thread(self.__delete, guild_id)
+		except Exception as e:
+			ModularUtil.error_log(f"Player session delete failed, {e}")
+
+	async def save_nodes(self, sessions: dict[str, str]) -> None:
+		"""Lavalink session id of every node, keyed by node uri"""
+		if not self.is_open or not sessions:
+			return
+
+		try:
+			await to_thread(self.__write_nodes, sessions)
+		except Exception as e:
+			ModularUtil.error_log(f"Node session save failed, {e}")
+
+	async def node_sessions(self, max_age: float) -> dict[str, str]:
+		"""Session id seen within max_age, older one already expired on the node"""
+		if not self.is_open:
+			return {}
+
+		return await to_thread(self.__read_nodes, max_age)
+
+	async def load(self) -> list[PlayerSnapshot]:
+		"""Snapshot recent enough to resume, older one is dropped"""
+		if not self.is_open:
+			return []
+
+		return await to_thread(self.__read)
+
+	def __open(self) -> None:
+		directory: str = path.dirname(self.__file)
+		if directory:
+			makedirs(directory, exist_ok=True)
+
+		conn: Connection = connect(self.__file, check_same_thread=False)
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		conn.executescript(self.__SCHEMA)
+
+		self.__conn = conn
+
+	def __write(self, snapshots: list[PlayerSnapshot]) -> None:
+		now: float = time()
+		rows: list[tuple[int, str, float]] = list()
+
+		for snapshot in snapshots:
+			snapshot.saved_at = now
+			rows.append((snapshot.guild_id, dumps(asdict(snapshot)), now))
+
+		with self.__conn:
+			self.__conn.executemany(
+				"INSERT OR REPLACE INTO player_session (guild_id, data, updated_at) VALUES (?, ?, ?)",
+				rows,
+			)
+
+	def __write_nodes(self, sessions: dict[str, str]) -> None:
+		now: float = time()
+
+		with self.__conn:
+			self.__conn.executemany(
+				"INSERT OR REPLACE INTO node_session (uri, session_id, updated_at) VALUES (?, ?, ?)",
+				[(uri, session_id, now) for uri, session_id in sessions.items()],
+			)
+
+	def __read_nodes(self, max_age: float) -> dict[str, str]:
+		return dict(
+			self.__conn.execute(
+				"SELECT uri, session_id FROM node_session WHERE updated_at > ?",
+				(time() - max_age,),
+			)
+		)
+
+	def __delete(self, guild_id: int) -> None:
+		with self.__conn:
+			self.__conn.execute(
+				"DELETE FROM player_session WHERE guild_id = ?", (guild_id,)
+			)
+
+	def __read(self) -> list[PlayerSnapshot]:
+		with self.__conn:
+			self.__conn.execute(
+				"DELETE FROM player_session WHERE updated_at <= ?",
+				(time() - self.__max_age,),
+			)
+
+		return [
+			PlayerSnapshot(**loads(data))
+			for (data,) in self.__conn.execute("SELECT data FROM player_session")
+		]
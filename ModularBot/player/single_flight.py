@@ -0,0 +1,61 @@
+from asyncio import Task, CancelledError, create_task, shield
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+	__slots__ = ("task", "waiters")
+
+	def __init__(self, task: Task) -> None:
+		self.task: Task = task
+		self.waiters: int = 0
+
+
+class SingleFlight:
+	"""In-flight request table, concurrent callers of the same key share one task.
+
+	Errors are propagated to every waiter. A cancelled waiter only detaches
+	itself, the shared task is cancelled once nobody is waiting for it anymore.
+	"""
+
+	def __init__(self) -> None:
+		self.__calls: dict[Hashable, _Call] = dict()
+
+		self.started: int = 0
+		self.coalesced: int = 0
+
+	def __len__(self) -> int:
+		return len(self.__calls)
+
+	@property
+	def stats(self) -> dict:
+		return dict({
+			"in_flight": len(self.__calls),
+			"started": self.started,
+			"coalesced": self.coalesced,
+		})
+
+	async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+		call: _Call | None = self.__calls.get(key)
+
+		if call is None or call.task.cancelled():
+			call = _Call(create_task(factory()))
+			call.task.add_done_callback(lambda _: self.__forget(key, call))
+
+			self.__calls[key] = call
+			self.started += 1
+		else:
+			self.coalesced += 1
+
+		call.waiters += 1
+		try:
+			return await shield(call.task)
+		except CancelledError:
+			if call.waiters <= 1 and not call.task.done():
+				call.task.cancel()
+			raise
+		finally:
+			call.waiters -= 1
+
+	def __forget(self, key: Hashable, call: _Call) -> None:
+		if self.__calls.get(key) is call:
+			del self.__calls[key]
@@ -0,0 +1,244 @@
+from asyncio import Task, create_task, sleep, to_thread
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from json import dumps, loads
+from os import makedirs, path
+from sqlite3 import Connection, connect
+from time import time
+
+from wavelink import Playable
+
+from ..util import ModularUtil
+
+
+@dataclass(slots=True)
+class TrackMeta:
+	isrc: str | None = None
+	artwork: str | None = None
+	artist_artwork: str | None = None
+	album_name: str | None = None
+	album_url: str | None = None
+	mirror: dict | None = None
+
+	@classmethod
+	def from_playable(
+		cls, track: Playable, mirror: Playable | None = None
+	) -> "TrackMeta":
+		return cls(
+			isrc=track.isrc,
+			artwork=track.artwork,
+			artist_artwork=track.artist.artwork,
+			album_name=track.album.name,
+			album_url=track.album.url,
+			mirror=mirror.raw_data if mirror else None,
+		)
+
+	def apply(self, track: Playable) -> None:
+		track._isrc = track.isrc or self.isrc
+		track._artwork = self.artwork or track.artwork
+		track._artist.artwork = self.artist_artwork or track.artist.artwork
+		track._album.name = self.album_name or track.album.name
+		track._album.url = self.album_url or track.album.url
+
+
+class TrackStore:
+	"""SQLite (WAL) backed store for enriched track metadata and query resolutions.
+
+	The newest rows are mirrored in memory as an LRU within ``capacity``, so reads
+	on the play path are a dict lookup. Writes are buffered and flushed in batches
+	on a worker thread, which also prune the tables back to ``capacity``.
+	"""
+
+	__SCHEMA: str = """
+	CREATE TABLE IF NOT EXISTS track_meta (
+		key TEXT PRIMARY KEY,
+		data TEXT NOT NULL,
+		updated_at REAL NOT NULL
+	);
+	CREATE TABLE IF NOT EXISTS resolution (
+		key TEXT PRIMARY KEY,
+		data TEXT NOT NULL,
+		updated_at REAL NOT NULL
+	);
+	CREATE INDEX IF NOT EXISTS track_meta_updated ON track_meta (updated_at);
+	CREATE INDEX IF NOT EXISTS resolution_updated ON resolution (updated_at);
+	"""
+
+	def __init__(
+		self,
+		file: str,
+		*,
+		capacity: int,
+		resolution_ttl: float,
+		flush_interval: float,
+	) -> None:
+		self.__file: str = file
+		self.__capacity: int = capacity
+		self.__resolution_ttl: float = resolution_ttl
+		self.__flush_interval: float = flush_interval
+
+		self.__conn: Connection | None = None
+		self.__flusher: Task | None = None
+
+		self.__meta: OrderedDict[str, TrackMeta] = OrderedDict()
+		self.__resolution: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+		self.__pending: dict[tuple[str, str], tuple[str, float]] = dict()
+
+	@property
+	def is_open(self) -> bool:
+		return self.__conn is not None
+
+	async def open(self) -> None:
+		if self.is_open:
+			return
+
+		await to_thread(self.__open)
+		self.__flusher = create_task(self.__flush_loop())
+
+		ModularUtil.simple_log(
+			f"Track store loaded {len(self.__meta)} metadata, {len(self.__resolution)} resolution"
+		)
+
+	async def close(self) -> None:
+		if not self.is_open:
+			return
+
+		if self.__flusher:
+			self.__flusher.cancel()
+			self.__flusher = None
+
+		await self.flush()
+		await to_thread(self.__conn.close)
+		self.__conn = None
+
+	# TODO Metadata, looked up by identifier, ISRC or encoded string
+	def get(self, track: Playable) -> TrackMeta | None:
+		for key in (track.identifier, track.isrc, track.encoded):
+			if key and (meta := self.__meta.get(key)):
+				self.__meta.move_to_end(key)
+				return meta
+
+		return None
+
+	def put(self, track: Playable, meta: TrackMeta) -> None:
+		data: str = dumps(asdict(meta))
+		now: float = time()
+
+		for key in {track.identifier, track.isrc, track.encoded, meta.isrc}:
+			if not key:
+				continue
+
+			self.__meta[key] = meta
+			self.__meta.move_to_end(key)
+			self.__buffer(("track_meta", key), (data, now))
+
+		self.__evict(self.__meta)
+
+	# TODO Query resolution, single track only
+	def get_resolution(self, key: str) -> dict | None:
+		item: tuple[float, dict] | None = self.__resolution.get(key)
+
+		if item is None or item[0] + self.__resolution_ttl <= time():
+			if item is not None:
+				del self.__resolution[key]
+
+			return None
+
+		self.__resolution.move_to_end(key)
+		return item[1]
+
+	def put_resolution(self, key: str, track: Playable) -> None:
+		now: float = time()
+
+		self.__resolution[key] = (now, track.raw_data)
+		self.__resolution.move_to_end(key)
+		self.__buffer(("resolution", key), (dumps(track.raw_data), now))
+
+		self.__evict(self.__resolution)
+
+	def __evict(self, items: OrderedDict) -> None:
+		while len(items) > self.__capacity:
+			items.popitem(last=False)
+
+	def __buffer(self, key: tuple[str, str], value: tuple[str, float]) -> None:
+		# Closed or failing store keep only the newest write, oldest one is dropped
+		self.__pending.pop(key, None)
+		self.__pending[key] = value
+
+		while len(self.__pending) > self.__capacity:
+			del self.__pending[next(iter(self.__pending))]
+
+	async def flush(self) -> None:
+		if not self.__pending or not self.is_open:
+			return
+
+		batch: dict[tuple[str, str], tuple[str, float]] = self.__pending
+		self.__pending = dict()
+
+		try:
+			await to_thread(self.__write, batch)
+		except Exception as e:
+			ModularUtil.error_log(f"Track store flush failed, {e}")
+			newer: dict[tuple[str, str], tuple[str, float]] = self.__pending
+			self.__pending = dict()
+
+			for key, value in (batch | newer).items():
+				self.__buffer(key, value)
+
+	async def __flush_loop(self) -> None:
+		while True:
+			await sleep(self.__flush_interval)
+			await self.flush()
+
+	def __open(self) -> None:
+		directory: str = path.dirname(self.__file)
+		if directory:
+			makedirs(directory, exist_ok=True)
+
+		conn: Connection = connect(self.__file, check_same_thread=False)
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		conn.executescript(self.__SCHEMA)
+
+		with conn:
+			self.__prune(conn)
+
+		# Oldest first, so the newest row end up most recently used
+		for key, data in conn.execute(
+			"SELECT key, data FROM track_meta ORDER BY updated_at"
+		):
+			self.__meta[key] = TrackMeta(**loads(data))
+
+		for key, data, updated_at in conn.execute(
+			"SELECT key, data, updated_at FROM resolution ORDER BY updated_at"
+		):
+			self.__resolution[key] = (updated_at, loads(data))
+
+		self.__evict(self.__meta)
+		self.__evict(self.__resolution)
+
+		self.__conn = conn
+
+	def __write(self, batch: dict[tuple[str, str], tuple[str, float]]) -> None:
+		with self.__conn:
+			for table in ("track_meta", "resolution"):
+				self.__conn.executemany(
+					f"INSERT OR REPLACE INTO {table} (key, data, updated_at) VALUES (?, ?, ?)",
+					[(k, d, t) for (tb, k), (d, t) in batch.items() if tb == table],
+				)
+
+			self.__prune(self.__conn)
+
+	def __prune(self, conn: Connection) -> None:
+		"""Drop expired resolution and every row older than the newest ``capacity``"""
+		conn.execute(
+			"DELETE FROM resolution WHERE updated_at <= ?",
+			(time() - self.__resolution_ttl,),
+		)
+
+		for table in ("track_meta", "resolution"):
+			conn.execute(
+				f"DELETE FROM {table} WHERE updated_at < ("
+				f"SELECT updated_at FROM {table} ORDER BY updated_at DESC LIMIT 1 OFFSET ?)",
+				(self.__capacity - 1,),
+			)
@@ -0,0 +1,156 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from math import log1p
+from re import compile, Pattern
+
+from wavelink import Playable
+
+
+@dataclass(slots=True)
+class IndexedTrack:
+	identifier: str
+	title: str
+	author: str
+	uri: str
+	plays: int = 0
+	seen: int = 0
+
+
+class TrackIndex:
+	"""In-memory prefix/token index of recently played and cached tracks.
+
+	Lookups never touch the network, every token is kept in a sorted list so a
+	prefix is resolved with two bisects instead of a scan over all titles.
+	"""
+
+	__TOKEN: Pattern = compile(r"\w+")
+
+	def __init__(self, capacity: int) -> None:
+		self.__capacity: int = capacity
+		self.__entries: OrderedDict[str, IndexedTrack] = OrderedDict()
+		self.__postings: dict[str, set[str]] = dict()
+		self.__tokens: list[str] = list()
+		self.__clock: int = 0
+
+	def __len__(self) -> int:
+		return len(self.__entries)
+
+	@classmethod
+	def tokenize(cls, text: str) -> list[str]:
+		return cls.__TOKEN.findall(text.casefold())
+
+	def add(self, track: Playable, *, played: bool = False) -> None:
+		if not track.uri or len(track.uri) > 100 or track.is_stream:
+			return
+
+		entry: IndexedTrack | None = self.__entries.get(track.identifier)
+
+		if entry is None:
+			entry = IndexedTrack(
+				identifier=track.identifier,
+				title=track.title,
+				author=track.author,
+				uri=track.uri,
+			)
+			self.__entries[entry.identifier] = entry
+
+			for token in set(self.tokenize(f"{entry.title} {entry.author}")):
+				if token not in self.__postings:
+					self.__postings[token] = set()
+					insort(self.__tokens, token)
+
+				self.__postings[token].add(entry.identifier)
+
+		self.__clock += 1
+		entry.seen = self.__clock
+		self.__entries.move_to_end(entry.identifier)
+
+		if played:
+			entry.plays += 1
+
+		while len(self.__entries) > self.__capacity:
+			_, old = self.__entries.popitem(last=False)
+			self.__remove(old)
+
+	def search(self, text: str, limit: int = 25) -> list[tuple[float, IndexedTrack]]:
+		tokens: list[str] = self.tokenize(text)
+
+		if not tokens:
+			return [
+				(0.0, entry)
+				for entry in islice(reversed(self.__entries.values()), limit)
+			]
+
+		candidates: set[str] | None = None
+
+		# Every word must match, only the last one is treated as a prefix
+		for i, token in enumerate(tokens):
+			found: set[str] = (
+				self.__prefix(token)
+				if i == len(tokens) - 1
+				else self.__postings.get(token, set())
+			)
+
+			candidates = found if candidates is None else candidates & found
+			if not candidates:
+				return []
+
+		exact: int = len(tokens) - 1 + (tokens[-1] in self.__postings)
+		base: float = 0.5 + 0.5 * (exact / len(tokens))
+
+		result: list[tuple[float, IndexedTrack]] = sorted(
+			(
+				(
+					base
+					+ 0.1 * log1p(self.__entries[key].plays)
+					- 0.25 * self.__age(self.__entries[key]),
+					self.__entries[key],
+				)
+				for key in candidates
+			),
+			key=lambda x: x[0],
+			reverse=True,
+		)
+		return result[:limit]
+
+	@staticmethod
+	def confidence(result: list[tuple[float, IndexedTrack]]) -> float:
+		"""How sure the top suggestion is the one user wants, between 0 and 1"""
+		if not result:
+			return 0.0
+
+		if len(result) == 1:
+			return 1.0
+
+		top, second = max(result[0][0], 0.0), max(result[1][0], 0.0)
+		if top + second <= 0:
+			return 0.0
+
+		return min(max(top / (top + second), 0.0), 1.0)
+
+	def __age(self, entry: IndexedTrack) -> float:
+		"""Recency between 0 and 1, anything older than capacity count as oldest"""
+		return min(self.__clock - entry.seen, self.__capacity) / self.__capacity
+
+	def __prefix(self, prefix: str) -> set[str]:
+		found: set[str] = set()
+		index: int = bisect_left(self.__tokens, prefix)
+
+		while index < len(self.__tokens) and self.__tokens[index].startswith(prefix):
+			found |= self.__postings[self.__tokens[index]]
+			index += 1
+
+		return found
+
+	def __remove(self, entry: IndexedTrack) -> None:
+		for token in set(self.tokenize(f"{entry.title} {entry.author}")):
+			ids: set[str] | None = self.__postings.get(token)
+			if ids is None:
+				continue
+
+			ids.discard(entry.identifier)
+			if not ids:
+				del self.__postings[token]
+				del self.__tokens[bisect_left(self.__tokens, token)]
@@ -1,20 +1,10 @@
-from yarl import URL
+from .interfaces import QueryResolver
 
 
 class UtilTrackPlayer:
 	@staticmethod
 	def extract_index_youtube(q: str) -> int:
-		index: int = 0
-
-		if q.startswith("http"):
-			url = URL(q)
-			# TODO Temp fix YT
-			try:
-				index = int(url.query.get("start_radio")) or int(url.query.get("index"))
-			except (ValueError, TypeError):
-				index = None
-
-		return index
+		return QueryResolver.resolve(q).index
 
 	@staticmethod
 	def parse_sec(sec: int, show_suffix: bool = True) -> str:
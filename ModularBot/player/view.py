@@ -65,7 +65,7 @@ class TrackView(View):
 			description=f"**[{track.title} | {track.author}]({track.uri})** - **{
 				UtilTrackPlayer.parse_sec(track.length)
 			}**",
-			timestamp=interaction.created_at,
+			timestamp=interaction.created_at if interaction else ModularUtil.get_time(),
 		)
 
 		track_type: TrackType = TrackType.what_type(track.uri)
@@ -77,18 +77,20 @@ class TrackView(View):
 		if self.__is_loop_queue:
 			embed.add_field(name="Loop Queue", value="Active", inline=False)
 
-		for key, val in self.__player.current_filter_state().items():
-			if bool(val):
-				embed.add_field(name=f"{str(key).capitalize()} Filter", value=str(val))
+		for key in self.__player.current_filter_state():
+			embed.add_field(name=f"{key.capitalize()} Filter", value=str(True))
 
 		embed.set_thumbnail(
 			url=track.artist.artwork if track.source != "youtube" else None
 		)
 		embed.set_image(url=self.__player.current.artwork)
-		embed.set_footer(
-			text=f"Last control from {interaction.user.display_name}",
-			icon_url=interaction.user.display_avatar,
-		)
+		if interaction:
+			embed.set_footer(
+				text=f"Last control from {interaction.user.display_name}",
+				icon_url=interaction.user.display_avatar,
+			)
+		else:
+			embed.set_footer(text="Resumed after restart")
 
 		return embed
 
@@ -0,0 +1,343 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time
+
+import numpy as np
+from pytz import timezone
+
+# Julian date of 0h UT is the proleptic ordinal plus this
+_JD_ORDINAL: float = 1721424.5
+# Terrestrial minus universal time, close enough for this century
+_DELTA_T: float = 69 / 86400
+
+# Absolute Hijri month, year * 12 + month - 1, of the lunation k = 0 (Jan 2000)
+_HIJRI_LUNATION: int = 17049
+
+
+@dataclass(frozen=True, slots=True)
+class CalculationMethod:
+	fajr_angle: float
+	isha_angle: float | None = None
+	# Fixed delay after Maghrib, used when there is no Isha angle
+	isha_minutes: float = 0
+	# Precaution minute added to every time, subtracted from sunrise
+	ihtiyat: int = 0
+
+
+METHODS: dict[str, CalculationMethod] = {
+	"KEMENAG": CalculationMethod(20, 18, ihtiyat=2),
+	"MWL": CalculationMethod(18, 17),
+	"ISNA": CalculationMethod(15, 15),
+	"EGYPT": CalculationMethod(19.5, 17.5),
+	"KARACHI": CalculationMethod(18, 18),
+	"MAKKAH": CalculationMethod(18.5, isha_minutes=90),
+	"JAKIM": CalculationMethod(20, 18, ihtiyat=1),
+}
+
+
+class PrayerEngine:
+	"""Prayer time and Hijri month computed locally, no network involved.
+
+	Solar position is the low precision almanac formula, evaluated for every day
+	and event at once with NumPy and refined twice at the event time, which is
+	within a minute of the usual timetable. Hijri month starts the day after the
+	evening where the moon is old enough at sunset, new moon from Meeus.
+	"""
+
+	# Column of the computed table
+	FAJR, SUNRISE, DHUHR, ASR, MAGHRIB, ISHA = range(6)
+
+	def __init__(
+		self,
+		latitude: float,
+		longitude: float,
+		*,
+		tz: str,
+		method: CalculationMethod,
+		elevation: float = 0,
+		asr_factor: int = 1,
+		min_moon_age: float = 8,
+		hijri_adjust: int = 0,
+	) -> None:
+		self.__latitude: float = np.radians(latitude)
+		self.__longitude: float = longitude
+		self.__tz = timezone(tz)
+		self.__method: CalculationMethod = method
+		self.__horizon: float = 0.833 + 0.0347 * np.sqrt(max(elevation, 0))
+		self.__asr_factor: int = asr_factor
+		self.__min_moon_age: float = min_moon_age
+		self.__hijri_adjust: int = hijri_adjust
+
+		self.__years: dict[int, np.ndarray] = dict()
+		self.__ramadhan: dict[int, dict[str, str]] = dict()
+
+	def year(self, year: int) -> np.ndarray:
+		"""Minute since local midnight, one row per day and one column per event"""
+		if year not in self.__years:
+			first: int = date(year, 1, 1).toordinal()
+			self.__years[year] = self.__minutes(
+				self.compute(np.arange(first, date(year + 1, 1, 1).toordinal()))
+			)
+
+		return self.__years[year]
+
+	def day(self, day: date) -> dict:
+		"""Same shape as the API row, the ``ramadhan`` of the Gregorian year included"""
+		row: np.ndarray = self.year(day.year)[day.timetuple().tm_yday - 1]
+
+		res: dict = {
+			name: f"{row[column] // 60:02d}:{row[column] % 60:02d}"
+			for name, column in (
+				("Maghrib", self.MAGHRIB),
+				("Subuh", self.FAJR),
+				("Dzuhur", self.DHUHR),
+				("Ashar", self.ASR),
+				("Isya", self.ISHA),
+			)
+		}
+		res["ramadhan"] = dict(self.ramadhan(day.year))
+		return res
+
+	def compute(self, ordinals: np.ndarray) -> np.ndarray:
+		"""Local hour of every event for the given proleptic ordinal"""
+		ordinals = np.asarray(ordinals)
+		zone: np.ndarray = self.__offsets(ordinals)[:, None]
+		jd: np.ndarray = ordinals[:, None] + _JD_ORDINAL
+
+		method: CalculationMethod = self.__method
+		angles: np.ndarray = np.array([
+			method.fajr_angle,
+			self.__horizon,
+			0,
+			0,
+			self.__horizon,
+			method.isha_angle or 0,
+		])
+		# Morning event is before noon
+		morning: np.ndarray = np.array([True, True, False, False, False, False])
+
+		hours: np.ndarray = np.broadcast_to(
+			np.array([5, 6, 12, 13, 18, 18], dtype=float), (len(ordinals), 6)
+		)
+		for _ in range(2):
+			decl, eqt = self.__sun(jd + (hours - zone) / 24)
+			noon: np.ndarray = 12 - eqt - self.__longitude / 15 + zone
+
+			angle: np.ndarray = self.__hour_angle(np.radians(-angles), decl)
+			asr: np.ndarray = self.__hour_angle(
+				np.arctan(
+					1 / (self.__asr_factor + np.tan(np.abs(self.__latitude - decl)))
+				),
+				decl,
+			)
+			angle[:, self.DHUHR] = 0
+			angle[:, self.ASR] = asr[:, self.ASR]
+
+			hours = noon + np.where(morning, -angle, angle)
+
+		if method.isha_angle is None:
+			hours[:, self.ISHA] = hours[:, self.MAGHRIB] + method.isha_minutes / 60
+
+		return self.__high_latitude(hours, angles)
+
+	def month_starts(self, lunations: np.ndarray) -> np.ndarray:
+		"""Proleptic ordinal of the first day of the Hijri month of each lunation"""
+		conjunction: np.ndarray = self.new_moon(lunations)
+
+		# Local day of the conjunction, then the age of the moon at its sunset
+		zone: np.ndarray = self.__offsets(np.floor(conjunction - _JD_ORDINAL))
+		local: np.ndarray = np.floor(conjunction + zone / 24 - _JD_ORDINAL).astype(int)
+		sunset: np.ndarray = (
+			local
+			+ _JD_ORDINAL
+			+ (self.compute(local)[:, self.MAGHRIB] - self.__offsets(local)) / 24
+		)
+		age: np.ndarray = (sunset - conjunction) * 24
+
+		return local + np.where(age >= self.__min_moon_age, 1, 2) + self.__hijri_adjust
+
+	def hijri(self, day: date) -> tuple[int, int, int]:
+		"""Hijri year, month and day"""
+		lunation: int = int(
+			np.floor((day.year + day.timetuple().tm_yday / 366 - 2000) * 12.3685)
+		)
+		lunations: np.ndarray = np.arange(lunation - 2, lunation + 3)
+		starts: np.ndarray = self.month_starts(lunations)
+
+		index: int = int(np.searchsorted(starts, day.toordinal(), side="right")) - 1
+		month: int = _HIJRI_LUNATION + int(lunations[index])
+
+		return month // 12, month % 12 + 1, day.toordinal() - int(starts[index]) + 1
+
+	def ramadhan(self, year: int) -> dict[str, str]:
+		"""First day of Ramadhan and of Syawal starting in the Gregorian year"""
+		if year not in self.__ramadhan:
+			self.__ramadhan[year] = self.__find_ramadhan(year)
+
+		return self.__ramadhan[year]
+
+	def __find_ramadhan(self, year: int) -> dict[str, str]:
+		first: int = int(np.floor((year - 2000) * 12.3685)) - 1
+		lunations: np.ndarray = np.arange(first, first + 15)
+		starts: np.ndarray = self.month_starts(lunations)
+
+		for index, lunation in enumerate(lunations[:-1]):
+			start: date = date.fromordinal(int(starts[index]))
+			if (_HIJRI_LUNATION + lunation) % 12 == 8 and start.year == year:
+				end: date = date.fromordinal(int(starts[index + 1]))
+				return {
+					"start": f"{start:%B} {start.day}",
+					"end": f"{end:%B} {end.day}",
+				}
+
+		return {}
+
+	@staticmethod
+	def new_moon(lunations: np.ndarray) -> np.ndarray:
+		"""Julian date (UT) of the new moon, Meeus chapter 49 without planetary term"""
+		k: np.ndarray = np.asarray(lunations, dtype=float)
+		t: np.ndarray = k / 1236.85
+
+		jde: np.ndarray = (
+			2451550.09766
+			+ 29.530588861 * k
+			+ 0.00015437 * t**2
+			- 0.000000150 * t**3
+			+ 0.00000000073 * t**4
+		)
+		e: np.ndarray = 1 - 0.002516 * t - 0.0000074 * t**2
+		m: np.ndarray = np.radians(
+			2.5534 + 29.10535670 * k - 0.0000014 * t**2 - 0.00000011 * t**3
+		)
+		mp: np.ndarray = np.radians(
+			201.5643
+			+ 385.81693528 * k
+			+ 0.0107582 * t**2
+			+ 0.00001238 * t**3
+			- 0.000000058 * t**4
+		)
+		f: np.ndarray = np.radians(
+			160.7108
+			+ 390.67050284 * k
+			- 0.0016118 * t**2
+			- 0.00000227 * t**3
+			+ 0.000000011 * t**4
+		)
+		omega: np.ndarray = np.radians(
+			124.7746 - 1.56375588 * k + 0.0020672 * t**2 + 0.00000215 * t**3
+		)
+		sin = np.sin
+
+		correction: np.ndarray = (
+			-0.40720 * sin(mp)
+			+ 0.17241 * e * sin(m)
+			+ 0.01608 * sin(2 * mp)
+			+ 0.01039 * sin(2 * f)
+			+ 0.00739 * e * sin(mp - m)
+			- 0.00514 * e * sin(mp + m)
+			+ 0.00208 * e**2 * sin(2 * m)
+			- 0.00111 * sin(mp - 2 * f)
+			- 0.00057 * sin(mp + 2 * f)
+			+ 0.00056 * e * sin(2 * mp + m)
+			- 0.00042 * sin(3 * mp)
+			+ 0.00042 * e * sin(m + 2 * f)
+			+ 0.00038 * e * sin(m - 2 * f)
+			- 0.00024 * e * sin(2 * mp - m)
+			- 0.00017 * sin(omega)
+			- 0.00007 * sin(mp + 2 * m)
+			+ 0.00004 * sin(2 * mp - 2 * f)
+			+ 0.00004 * sin(3 * m)
+			+ 0.00003 * sin(mp + m - 2 * f)
+			+ 0.00003 * sin(2 * mp + 2 * f)
+			- 0.00003 * sin(mp + m + 2 * f)
+			+ 0.00003 * sin(mp - m + 2 * f)
+			- 0.00002 * sin(mp - m - 2 * f)
+			- 0.00002 * sin(3 * mp + m)
+			+ 0.00002 * sin(4 * mp)
+		)
+
+		return jde + correction - _DELTA_T
+
+	@staticmethod
+	def __sun(jd: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+		"""Declination in radian and equation of time in hour"""
+		d: np.ndarray = jd - 2451545.0
+		g: np.ndarray = np.radians(357.529 + 0.98560028 * d)
+		q: np.ndarray = 280.459 + 0.98564736 * d
+		ecliptic: np.ndarray = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+		obliquity: np.ndarray = np.radians(23.439 - 0.00000036 * d)
+
+		ascension: np.ndarray = (
+			np.degrees(
+				np.arctan2(np.cos(obliquity) * np.sin(ecliptic), np.cos(ecliptic))
+			)
+			/ 15
+		)
+		decl: np.ndarray = np.arcsin(np.sin(obliquity) * np.sin(ecliptic))
+		eqt: np.ndarray = (q / 15 - ascension + 12) % 24 - 12
+
+		return decl, eqt
+
+	def __hour_angle(self, altitude: np.ndarray, decl: np.ndarray) -> np.ndarray:
+		"""Hour from noon until the sun reach the altitude, NaN when it never does"""
+		cos: np.ndarray = (
+			np.sin(altitude) - np.sin(self.__latitude) * np.sin(decl)
+		) / (np.cos(self.__latitude) * np.cos(decl))
+
+		with np.errstate(invalid="ignore"):
+			return np.degrees(np.arccos(cos)) / 15
+
+	def __high_latitude(self, hours: np.ndarray, angles: np.ndarray) -> np.ndarray:
+		# Twilight that never end, or last too long, is a portion of the night
+		night: np.ndarray = (hours[:, self.SUNRISE] - hours[:, self.MAGHRIB]) % 24
+
+		fajr: np.ndarray = hours[:, self.SUNRISE] - angles[self.FAJR] / 60 * night
+		hours[:, self.FAJR] = np.where(
+			np.isnan(hours[:, self.FAJR]) | (hours[:, self.FAJR] < fajr),
+			fajr,
+			hours[:, self.FAJR],
+		)
+
+		if self.__method.isha_angle is not None:
+			isha: np.ndarray = hours[:, self.MAGHRIB] + angles[self.ISHA] / 60 * night
+			hours[:, self.ISHA] = np.where(
+				np.isnan(hours[:, self.ISHA]) | (hours[:, self.ISHA] > isha),
+				isha,
+				hours[:, self.ISHA],
+			)
+
+		return hours
+
+	def __minutes(self, hours: np.ndarray) -> np.ndarray:
+		ihtiyat: np.ndarray = np.full(6, self.__method.ihtiyat)
+		ihtiyat[self.SUNRISE] = -ihtiyat[self.SUNRISE]
+
+		# Rounded up, the precaution is never shortened
+		return (np.ceil(hours * 60 + ihtiyat).astype(int)) % 1440
+
+	def __offsets(self, ordinals: np.ndarray) -> np.ndarray:
+		"""UTC offset in hour at local noon, DST included"""
+		unique, inverse = np.unique(
+			np.asarray(ordinals, dtype=int), return_inverse=True
+		)
+		offsets: np.ndarray = np.empty(len(unique))
+
+		# Offset rarely change, only span whose end differ is looked up day by day
+		for lo in range(0, len(unique), 32):
+			self.__fill(unique, offsets, lo, min(lo + 31, len(unique) - 1))
+
+		return offsets[inverse].reshape(np.shape(ordinals))
+
+	def __fill(self, unique: np.ndarray, offsets: np.ndarray, lo: int, hi: int) -> None:
+		offsets[lo] = self.__offset(int(unique[lo]))
+		offsets[hi] = self.__offset(int(unique[hi]))
+
+		if offsets[lo] == offsets[hi]:
+			offsets[lo:hi] = offsets[lo]
+		elif hi - lo > 1:
+			middle: int = (lo + hi) // 2
+			self.__fill(unique, offsets, lo, middle)
+			self.__fill(unique, offsets, middle, hi)
+
+	def __offset(self, ordinal: int) -> float:
+		noon: datetime = datetime.combine(date.fromordinal(ordinal), time(12))
+		return self.__tz.utcoffset(noon, is_dst=False).total_seconds() / 3600
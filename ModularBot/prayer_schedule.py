@@ -0,0 +1,187 @@
+from asyncio import sleep, to_thread
+from datetime import datetime, timedelta
+from json import dump, load
+from os import makedirs, path, replace
+from random import uniform
+from time import time
+
+from aiohttp import ClientError, ClientSession
+
+from .util import ModularUtil
+
+# Upstream name to the one shown in the channel, in the order it is shown
+_RENAME: dict[str, str] = {
+	"Maghrib": "Maghrib",
+	"Fajr": "Subuh",
+	"Zuhr": "Dzuhur",
+	"Asr": "Ashar",
+	"Isha": "Isya",
+}
+
+
+class PrayerSchedule:
+	"""Whole prayer period of the API, cached on disk and served from memory.
+
+	The API return every day of the period at once, it is only fetched again when
+	today or tomorrow is missing. Request is conditional, failure is retried with
+	exponential backoff and jitter, and the last good period is kept meanwhile.
+	"""
+
+	def __init__(
+		self,
+		url: str,
+		file: str,
+		*,
+		max_age: float,
+		retries: int,
+		backoff: float,
+		backoff_cap: float,
+	) -> None:
+		self.__url: str = url
+		self.__file: str = file
+		self.__max_age: float = max_age
+		self.__retries: int = retries
+		self.__backoff: float = backoff
+		self.__backoff_cap: float = backoff_cap
+
+		self.__days: dict[str, dict[str, str]] = dict()
+		self.__ramadhan: dict[str, dict[str, str]] = dict()
+		self.__etag: str | None = None
+		self.__last_modified: str | None = None
+		self.__fetched_at: float = 0.0
+		self.__loaded: bool = False
+
+	@staticmethod
+	def key(day: datetime) -> str:
+		"""Day key used by the API, like ``Sat Oct 4``"""
+		return f"{day:%a %b} {day.day}"
+
+	def covers(self, day: datetime) -> bool:
+		# Key has no year, period too old may match the same day of another year
+		return (
+			time() - self.__fetched_at < self.__max_age and self.key(day) in self.__days
+		)
+
+	def day(self, day: datetime) -> dict | None:
+		if not self.covers(day):
+			return None
+
+		return {
+			**self.__days[self.key(day)],
+			"ramadhan": self.__ramadhan.get(str(day.year), {}),
+		}
+
+	async def refresh(self, session: ClientSession) -> bool:
+		"""Fetch the period when it ran out, whether today is known afterward"""
+		if not self.__loaded:
+			await to_thread(self.__load)
+			self.__loaded = True
+
+		today: datetime = ModularUtil.get_time()
+		if self.covers(today) and self.covers(today + timedelta(days=1)):
+			return True
+
+		for attempt in range(self.__retries):
+			if attempt:
+				# Full jitter, retry of many instance does not land together
+				await sleep(
+					uniform(0, min(self.__backoff_cap, self.__backoff * 2**attempt))
+				)
+
+			try:
+				if await self.__fetch(session):
+					break
+			except (ClientError, TimeoutError, ValueError) as e:
+				ModularUtil.error_log(f"Prayer schedule fetch failed, {e}")
+		else:
+			ModularUtil.error_log(
+				f"Prayer schedule unavailable after {self.__retries} attempt, "
+				"keeping the last good data"
+			)
+
+		return self.covers(today)
+
+	async def __fetch(self, session: ClientSession) -> bool:
+		headers: dict[str, str] = dict()
+		if self.__days and self.__etag:
+			headers["If-None-Match"] = self.__etag
+		if self.__days and self.__last_modified:
+			headers["If-Modified-Since"] = self.__last_modified
+
+		async with session.get(self.__url, headers=headers) as resp:
+			if resp.status == 304:
+				self.__fetched_at = time()
+				return True
+
+			if resp.status != 200:
+				ModularUtil.error_log(f"Prayer API responded {resp.status}")
+				return False
+
+			data: dict = (await resp.json()).get("data") or {}
+			etag: str | None = resp.headers.get("ETag")
+			last_modified: str | None = resp.headers.get("Last-Modified")
+
+		if not data.get("praytimes"):
+			raise ValueError("no praytimes in response")
+
+		self.__update(data, etag, last_modified, time())
+		await to_thread(self.__save, data)
+		return True
+
+	def __update(
+		self,
+		data: dict,
+		etag: str | None,
+		last_modified: str | None,
+		fetched_at: float,
+	) -> None:
+		# Renamed once here, lookup only copy the row
+		self.__days = {
+			day: self.__row(row) for day, row in dict(data.get("praytimes")).items()
+		}
+		self.__ramadhan = dict(data.get("ramadhan") or {})
+		self.__etag = etag
+		self.__last_modified = last_modified
+		self.__fetched_at = fetched_at
+
+	@staticmethod
+	def __row(row: dict) -> dict[str, str]:
+		other: dict[str, str] = {x: y for x, y in row.items() if x not in _RENAME}
+		return other | {y: row[x] for x, y in _RENAME.items() if x in row}
+
+	def __load(self) -> None:
+		if not path.isfile(self.__file):
+			return
+
+		try:
+			with open(self.__file) as f:
+				cache: dict = load(f)
+
+			self.__update(
+				cache["data"],
+				cache.get("etag"),
+				cache.get("last_modified"),
+				cache.get("fetched_at", 0.0),
+			)
+		except (OSError, ValueError, KeyError, TypeError) as e:
+			ModularUtil.error_log(f"Prayer schedule cache unreadable, {e}")
+
+	def __save(self, data: dict) -> None:
+		makedirs(path.dirname(self.__file) or ".", exist_ok=True)
+		temp: str = self.__file + ".tmp"
+
+		try:
+			with open(temp, "w") as f:
+				dump(
+					{
+						"data": data,
+						"etag": self.__etag,
+						"last_modified": self.__last_modified,
+						"fetched_at": self.__fetched_at,
+					},
+					f,
+				)
+
+			replace(temp, self.__file)
+		except OSError as e:
+			ModularUtil.error_log(f"Prayer schedule cache not saved, {e}")
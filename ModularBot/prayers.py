@@ -1,8 +1,11 @@
+from asyncio import Task, create_task
 from random import choice
 from discord import Embed
 from aiohttp import ClientSession
 from datetime import datetime
 
+from .prayer_engine import METHODS, PrayerEngine
+from .prayer_schedule import PrayerSchedule
 from .util import ModularUtil
 from config import ModularBotConst
 
@@ -41,34 +44,67 @@ class Prayers:
 		"Biasakan diri dengan hidup susah, karena kesenangan tidak akan kekal selamanya. \n\n- Umar bin Khattab",
 	]
 
+	engine: PrayerEngine = PrayerEngine(
+		ModularBotConst.Prayer.LATITUDE,
+		ModularBotConst.Prayer.LONGITUDE,
+		tz=ModularBotConst.TIMEZONE,
+		method=METHODS[ModularBotConst.Prayer.METHOD.upper()],
+		elevation=ModularBotConst.Prayer.ELEVATION,
+		asr_factor=ModularBotConst.Prayer.ASR_FACTOR,
+		min_moon_age=ModularBotConst.Prayer.MIN_MOON_AGE,
+		hijri_adjust=ModularBotConst.Prayer.HIJRI_ADJUST,
+	)
+	# Remote timetable, only compared against the local one
+	schedule: PrayerSchedule = PrayerSchedule(
+		__PRAYER_API + "/" + __PRAYER_LOCATION,
+		ModularBotConst.Prayer.CACHE_FILE,
+		max_age=ModularBotConst.Prayer.CACHE_MAX_AGE,
+		retries=ModularBotConst.Prayer.RETRIES,
+		backoff=ModularBotConst.Prayer.BACKOFF,
+		backoff_cap=ModularBotConst.Prayer.BACKOFF_CAP,
+	)
+	__cross_check_task: Task | None = None
+
 	@classmethod
 	async def get_prayertime(cls, session: ClientSession) -> dict | None:
-		res: dict = {}
-		while not res:
-			async with session.get(
-				cls.__PRAYER_API + "/" + cls.__PRAYER_LOCATION
-			) as resp:
-				if resp.status == 200:
-					temp: dict = await resp.json()
-
-					temp = temp.get("data")
-					time: datetime = ModularUtil.get_time()
-					cur_date: str = f"{time.strftime('%a')} {time.strftime('%b')} {time.strftime('%d').replace('0', '') if time.strftime('%d').startswith('0') else time.strftime('%d')}"
-					res.update(dict(temp.get("praytimes")).get(cur_date, {}))
-					res.update({
-						"Maghrib": res.pop("Maghrib"),
-						"Subuh": res.pop("Fajr"),
-						"Dzuhur": res.pop("Zuhr"),
-						"Ashar": res.pop("Asr"),
-						"Isya": res.pop("Isha"),
-						"ramadhan": dict(temp.get("ramadhan")).get(
-							time.strftime("%Y"), {}
-						),
-					})
-				else:
-					raise Exception("API problem")
+		"""Today's prayer time, computed locally so an API outage change nothing"""
+		time: datetime = ModularUtil.get_time()
+		res: dict = cls.engine.day(time.date())
+
+		# TODO Cross-check in background, never delay nor replace the local result
+		if ModularBotConst.Prayer.CROSS_CHECK and (
+			cls.__cross_check_task is None or cls.__cross_check_task.done()
+		):
+			cls.__cross_check_task = create_task(cls.__cross_check(session, res, time))
 
-			return res
+		return res
+
+	@classmethod
+	async def __cross_check(cls, session: ClientSession, res: dict, time: datetime):
+		if not await cls.schedule.refresh(session):
+			return
+
+		remote: dict = cls.schedule.day(time)
+		tolerance: int = ModularBotConst.Prayer.CROSS_CHECK_TOLERANCE
+
+		def _minutes(value: str) -> int:
+			hour, minute = value.split(":")
+			return int(hour) * 60 + int(minute)
+
+		off: list[str] = [
+			f"{name} {value} (API {remote[name]})"
+			for name, value in res.items()
+			if name != "ramadhan"
+			and name in remote
+			and abs(_minutes(value) - _minutes(remote[name])) > tolerance
+		]
+		if remote.get("ramadhan") and remote["ramadhan"] != res["ramadhan"]:
+			off.append(f"ramadhan {res['ramadhan']} (API {remote['ramadhan']})")
+
+		if off:
+			ModularUtil.simple_log(
+				f"Local prayer time differ from the API, {', '.join(off)}"
+			)
 
 	@classmethod
 	def prayers_generator(cls, praytimes: dict, time: datetime) -> Embed | None:
@@ -0,0 +1,44 @@
+from asyncio import sleep
+from time import monotonic
+from typing import Hashable
+
+
+class RateBudget:
+	"""Token bucket per key, ``rate`` actions every ``per`` seconds.
+
+	Tokens refill continuously, a key starts with a full bucket.
+	"""
+
+	def __init__(self, rate: int, per: float) -> None:
+		self.__rate: int = rate
+		self.__per: float = per
+		self.__buckets: dict[Hashable, tuple[float, float]] = dict()
+
+	def delay(self, key: Hashable) -> float:
+		"""Seconds until key has a token, zero when it can act now"""
+		tokens, _ = self.__refill(key)
+		return 0.0 if tokens >= 1 else (1 - tokens) * self.__per / self.__rate
+
+	def try_acquire(self, key: Hashable) -> bool:
+		tokens, now = self.__refill(key)
+
+		if tokens < 1:
+			return False
+
+		self.__buckets[key] = (tokens - 1, now)
+		return True
+
+	async def acquire(self, key: Hashable) -> None:
+		while not self.try_acquire(key):
+			await sleep(self.delay(key))
+
+	def __refill(self, key: Hashable) -> tuple[float, float]:
+		now: float = monotonic()
+		tokens, updated_at = self.__buckets.get(key, (self.__rate, now))
+
+		tokens = min(
+			self.__rate, tokens + (now - updated_at) * self.__rate / self.__per
+		)
+		self.__buckets[key] = (tokens, now)
+
+		return (tokens, now)
@@ -0,0 +1,198 @@
+from asyncio import Event, Task, TimeoutError, create_task, wait_for
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, tzinfo
+from heapq import heappop, heappush
+from itertools import count
+from typing import Awaitable, Callable, Iterable, TypeAlias
+
+from pytz import BaseTzInfo
+
+from .util import ModularUtil
+
+NextDeadline: TypeAlias = Callable[[datetime], datetime | None]
+Job: TypeAlias = Callable[[datetime], Awaitable[None]]
+
+
+@dataclass(order=True, slots=True)
+class _Entry:
+	deadline: datetime
+	seq: int
+	name: str = field(compare=False)
+	generation: int = field(compare=False)
+
+
+@dataclass(slots=True)
+class _Job:
+	next_deadline: NextDeadline
+	run: Job
+	immediate: bool
+	generation: int = 0
+
+
+class DeadlineScheduler:
+	"""Run every job at its next deadline, sleeping until the nearest one.
+
+	Deadline is timezone aware and compared as an instant, so DST and day
+	rollover are left to the ``next_deadline`` of each job. Sleep is capped, so
+	wall clock jump is noticed and the heap is rebuilt on :meth:`reschedule`.
+	"""
+
+	def __init__(
+		self, get_time: Callable[[], datetime], *, max_sleep: float = 300
+	) -> None:
+		self.__get_time: Callable[[], datetime] = get_time
+		self.__max_sleep: float = max_sleep
+
+		self.__jobs: dict[str, _Job] = dict()
+		self.__heap: list[_Entry] = list()
+		self.__seq: count = count()
+
+		self.__wakeup: Event = Event()
+		self.__task: Task | None = None
+
+	def add(
+		self,
+		name: str,
+		next_deadline: NextDeadline,
+		run: Job,
+		*,
+		immediate: bool = False,
+	) -> None:
+		"""Immediate job also run once on start and on every reschedule"""
+		self.__jobs[name] = _Job(next_deadline, run, immediate)
+
+		if self.running:
+			self.reschedule(name)
+
+	def reschedule(self, *names: str) -> None:
+		"""Recompute deadline of the job, every job when none is given"""
+		now: datetime = self.__get_time()
+
+		for name in names or tuple(self.__jobs):
+			job: _Job = self.__jobs[name]
+			job.generation += 1
+
+			self.__push(name, job, now if job.immediate else job.next_deadline(now))
+
+		self.__wakeup.set()
+
+	@property
+	def running(self) -> bool:
+		return self.__task is not None and not self.__task.done()
+
+	def start(self) -> None:
+		if self.running:
+			return
+
+		self.__task = create_task(self.__run())
+		self.reschedule()
+
+	def stop(self) -> None:
+		if self.__task:
+			self.__task.cancel()
+			self.__task = None
+
+		self.__heap.clear()
+
+	def next_deadline(self) -> datetime | None:
+		self.__drop_stale()
+		return self.__heap[0].deadline if self.__heap else None
+
+	def __push(self, name: str, job: _Job, deadline: datetime | None) -> None:
+		if deadline is not None:
+			heappush(
+				self.__heap, _Entry(deadline, next(self.__seq), name, job.generation)
+			)
+
+	def __drop_stale(self) -> None:
+		while self.__heap and (
+			self.__heap[0].name not in self.__jobs
+			or self.__heap[0].generation != self.__jobs[self.__heap[0].name].generation
+		):
+			heappop(self.__heap)
+
+	async def __run(self) -> None:
+		while True:
+			self.__wakeup.clear()
+			deadline: datetime | None = self.next_deadline()
+
+			timeout: float = self.__max_sleep
+			if deadline is not None:
+				timeout = min(timeout, (deadline - self.__get_time()).total_seconds())
+
+			if timeout > 0:
+				try:
+					await wait_for(self.__wakeup.wait(), timeout)
+					continue
+				except TimeoutError:
+					pass
+
+			for entry in self.__due():
+				await self.__fire(entry)
+
+	def __due(self) -> Iterable[_Entry]:
+		now: datetime = self.__get_time()
+
+		while (deadline := self.next_deadline()) is not None and deadline <= now:
+			yield heappop(self.__heap)
+
+	async def __fire(self, entry: _Entry) -> None:
+		job: _Job = self.__jobs[entry.name]
+
+		try:
+			await job.run(entry.deadline)
+		except Exception as e:
+			ModularUtil.error_log(f"Scheduled job {entry.name} failed, {e}")
+
+		# Job rescheduled while running already has its entry
+		if entry.generation == job.generation:
+			# Missed deadline after a stall is skipped, not replayed one by one
+			after: datetime = max(entry.deadline, self.__get_time())
+			self.__push(entry.name, job, job.next_deadline(after))
+
+
+class Schedule:
+	"""Next deadline helper, wall clock time of the given timezone"""
+
+	@staticmethod
+	def at(day: date, clock: time, tz: tzinfo) -> datetime:
+		naive: datetime = datetime.combine(day, clock)
+
+		if isinstance(tz, BaseTzInfo):
+			return tz.normalize(tz.localize(naive))
+
+		return naive.replace(tzinfo=tz)
+
+	@classmethod
+	def daily(cls, clocks: Iterable[time], after: datetime) -> datetime | None:
+		"""Nearest of the clock after ``after``, today or else tomorrow"""
+		clocks = sorted(clocks)
+		if not clocks:
+			return None
+
+		tz: tzinfo = after.tzinfo
+		today: date = after.astimezone(tz).date()
+
+		for day in (today, today + timedelta(days=1)):
+			for clock in clocks:
+				if (deadline := cls.at(day, clock, tz)) > after:
+					return deadline
+
+		return None
+
+	@classmethod
+	def weekly(cls, weekday: int, clock: time, after: datetime) -> datetime:
+		tz: tzinfo = after.tzinfo
+		today: date = after.astimezone(tz).date()
+
+		for offset in range(8):
+			day: date = today + timedelta(days=offset)
+			if (
+				day.weekday() == weekday
+				and (deadline := cls.at(day, clock, tz)) > after
+			):
+				return deadline
+
+	@staticmethod
+	def every(seconds: float, after: datetime) -> datetime:
+		return after + timedelta(seconds=seconds)
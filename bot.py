@@ -1,7 +1,8 @@
-from asyncio import sleep, wait, create_task
+from asyncio import wait, create_task
 from io import BytesIO
 from random import choice
-from datetime import timedelta, datetime
+from calendar import day_name
+from datetime import timedelta, datetime, time as dtime
 
 import discord
 from pytz import timezone
@@ -21,6 +22,7 @@ from discord import (
 	File,
 	Activity,
 	ActivityType,
+	abc,
 )
 from discord.app_commands import guild_only
 from aiohttp import ClientSession
@@ -28,12 +30,24 @@ from aiohttp import ClientSession
 from wavelink import Node, Pool
 
 from config import GuildChannel, GuildRole, ModularBotConst, GuildMessage
-from ModularBot import ModularUtil, Prayers
+from ModularBot import (
+	ModularUtil,
+	Prayers,
+	AnalyticsPublisher,
+	RoleCounter,
+	LockdownEngine,
+)
+from ModularBot.lockdown import LockdownReport
+from ModularBot.player import CustomPlayer
+from ModularBot.scheduler import DeadlineScheduler, Schedule
 
 
 class ModularBotTask:
 	_guild: Guild
 	_role: Role
+	_role_counter: RoleCounter
+	_scheduler: DeadlineScheduler
+	_lockdown: LockdownEngine
 
 	session: ClientSession
 	_praytime_message: Message
@@ -44,14 +58,19 @@ class ModularBotTask:
 		if not self._pull_data.is_running():
 			self._pull_data.start()
 
-		if not self._prayer_time.is_running():
-			self._prayer_time.start()
-
-		if not self._lockdown_channel.is_running():
-			self._lockdown_channel.start()
+		# TODO Prayer, lockdown and presence wake up only at their next deadline
+		if not self._scheduler.running:
+			self._scheduler.add("prayer", self._next_prayer, self._prayer_time)
+			self._scheduler.add(
+				"lockdown", self._next_lockdown, self._lockdown_channel, immediate=True
+			)
+			self._scheduler.add(
+				"presence", self._next_activity, self._change_activity, immediate=True
+			)
+			self._scheduler.start()
 
-		if not self._change_activity.is_running():
-			self._change_activity.start()
+		if not self._verify_counter.is_running():
+			self._verify_counter.start()
 
 	async def __ramadhan_checker(self) -> None:
 		self._is_ramadhan: bool = False
@@ -103,6 +122,7 @@ class ModularBotTask:
 	async def _connect_nodes_lavalink(bot: commands.Bot) -> None:
 		await bot.wait_until_ready()
 		inactive_timeout: int = timedelta(minutes=30).total_seconds()
+		resume_timeout: int = ModularBotConst.Session.RESUME_TIMEOUT
 
 		def get_lavalink_nodes() -> list[Node]:
 			temp: list[Node] = list()
@@ -119,18 +139,35 @@ class ModularBotTask:
 						uri=server[0],
 						password=server_pass[0],
 						inactive_player_timeout=inactive_timeout,
+						resume_timeout=resume_timeout,
 					)
 				)
 				return temp
 
 			for s, p in zip(server, server_pass):
 				temp.append(
-					Node(uri=s, password=p, inactive_player_timeout=inactive_timeout)
+					Node(
+						uri=s,
+						password=p,
+						inactive_player_timeout=inactive_timeout,
+						resume_timeout=resume_timeout,
+					)
 				)
 
 			return temp
 
-		await Pool.connect(nodes=get_lavalink_nodes(), client=bot, cache_capacity=20)
+		nodes: list[Node] = get_lavalink_nodes()
+
+		# TODO Resume previous Lavalink session, Session-Id is sent once it is set
+		# Saved along player snapshot, so it could be one interval late
+		if resume_timeout > 0:
+			sessions: dict[str, str] = await CustomPlayer.sessions.node_sessions(
+				resume_timeout + ModularBotConst.Session.INTERVAL
+			)
+			for node in nodes:
+				node._session_id = sessions.get(node.uri)
+
+		await Pool.connect(nodes=nodes, client=bot, cache_capacity=20)
 
 	@tasks.loop(hours=1)
 	async def _pull_data(self) -> None:
@@ -140,8 +177,47 @@ class ModularBotTask:
 		# except:  # noqa: E722
 		# 	pass
 
-	@tasks.loop(seconds=30)
-	async def _prayer_time(self) -> None:
+		# TODO New prayer time and ramadhan state move the deadline
+		if self._scheduler.running:
+			self._scheduler.reschedule()
+
+	def __prayer_clocks(self) -> dict[str, dtime]:
+		return {
+			name: datetime.strptime(value, "%H:%M").time()
+			for name, value in self._praytimes.items()
+			if name != "ramadhan"
+		}
+
+	def _next_prayer(self, after: datetime) -> datetime | None:
+		if not self._praytimes or not self._is_ramadhan:
+			return None
+
+		return Schedule.daily(self.__prayer_clocks().values(), after)
+
+	def _next_lockdown(self, after: datetime) -> datetime:
+		if self._praytimes and self._is_ramadhan:
+			clocks: dict[str, dtime] = self.__prayer_clocks()
+			imsak: datetime = datetime.combine(after.date(), clocks["Subuh"])
+
+			return Schedule.daily(
+				[(imsak - timedelta(minutes=10)).time(), clocks["Maghrib"]], after
+			)
+
+		def _weekly(value: str) -> datetime:
+			day, hour = value.split("-")
+			return Schedule.weekly(
+				list(day_name).index(day), dtime(hour=int(hour)), after
+			)
+
+		return min(
+			_weekly(ModularBotConst.LockDownTime.START),
+			_weekly(ModularBotConst.LockDownTime.END),
+		)
+
+	def _next_activity(self, after: datetime) -> datetime:
+		return Schedule.every(ModularBotConst.Scheduler.PRESENCE_INTERVAL, after)
+
+	async def _prayer_time(self, deadline: datetime) -> None:
 		if self._praytimes:
 			time: datetime = ModularUtil.get_time()
 
@@ -158,24 +234,19 @@ class ModularBotTask:
 						embed=is_praytime
 					)
 
-	@tasks.loop(seconds=30)
-	async def _lockdown_channel(self) -> None:
+	async def _lockdown_channel(self, deadline: datetime) -> None:
 		time: datetime = ModularUtil.get_time()
 
 		async def _do_the_lockdown(view_channel: bool):
-			for channel in self._guild.text_channels:
-				channel: TextChannel = channel
-				overwrites = channel.overwrites_for(self._role)
-
-				if (
-					channel.is_nsfw()
-					and channel.id != GuildChannel.BINCANG_HARAM_CHANNEL
-					and overwrites.view_channel != view_channel
-				):
-					await channel.set_permissions(self._role, view_channel=view_channel)
-					await sleep(2)
+			# TODO Only overwrite that differ is sent, report what was done
+			report: LockdownReport = await self._lockdown.apply(
+				self._role, view_channel
+			)
 
-			return
+			if report.failed:
+				ModularUtil.error_log(f"{report}, failed {report.failed}")
+			elif report.changed:
+				ModularUtil.simple_log(str(report))
 
 		if self._praytimes and self._is_ramadhan:
 			imsak: str = self._praytimes.get("Subuh")
@@ -196,11 +267,17 @@ class ModularBotTask:
 			elif time.strftime("%A-%H") == ModularBotConst.LockDownTime.START:
 				await _do_the_lockdown(view_channel=False)
 
-	@tasks.loop(seconds=30)
-	async def _change_activity(self: commands.Bot) -> None:
-		the_musketter_count: int = len(
-			self._guild.get_role(GuildRole.THE_MUSKETEER).members
-		)
+	@tasks.loop(seconds=ModularBotConst.Analytics.VERIFY_INTERVAL)
+	async def _verify_counter(self) -> None:
+		# First run is right after seeding
+		if self._verify_counter.current_loop == 0:
+			return
+
+		if self._role_counter.verify(self._guild):
+			await self._analytics()
+
+	async def _change_activity(self: commands.Bot, deadline: datetime) -> None:
+		the_musketter_count: int = self._role_counter.get(GuildRole.THE_MUSKETEER)
 
 		async def a() -> None:
 			await self.change_presence(
@@ -239,6 +316,8 @@ class ModularBotTask:
 
 class ModularBotBase(commands.Bot):
 	_guild: Guild
+	_analytics_publisher: AnalyticsPublisher
+	_role_counter: RoleCounter
 
 	async def _help_embed(self) -> Embed:
 		desc: str = (
@@ -271,10 +350,8 @@ class ModularBotBase(commands.Bot):
 
 	async def _analytics(self) -> None:
 		member_count: int = self._guild.member_count
-		the_musketter_count: int = len(
-			self._guild.get_role(GuildRole.THE_MUSKETEER).members
-		)
-		bot_count: int = len(self._guild.get_role(GuildRole.BOT).members)
+		the_musketter_count: int = self._role_counter.get(GuildRole.THE_MUSKETEER)
+		bot_count: int = self._role_counter.get(GuildRole.BOT)
 		channel_count: int = len(self._guild.channels)
 		role_count: int = len(self._guild.roles)
 
@@ -296,11 +373,9 @@ class ModularBotBase(commands.Bot):
 			f"Jumlah Role: {role_count}",
 		]
 
+		# TODO Only changed value is renamed, within each channel budget
 		for channel, name in zip(voice_channels, texts):
-			await wait([
-				create_task(channel.edit(name=name)),
-				create_task(sleep(ModularBotConst.REQUEST_LIMIT)),
-			])
+			self._analytics_publisher.publish(channel, name)
 
 
 class ModularBotClient(ModularBotBase, ModularBotTask):
@@ -313,17 +388,43 @@ class ModularBotClient(ModularBotBase, ModularBotTask):
 		self._praytimes: dict = None
 		self._guild: Guild = None
 		self._role: Role = None
+		self._analytics_publisher: AnalyticsPublisher = AnalyticsPublisher(
+			rate=ModularBotConst.Analytics.RENAME_RATE,
+			per=ModularBotConst.Analytics.RENAME_PER,
+			debounce=ModularBotConst.Analytics.DEBOUNCE,
+		)
+		self._scheduler: DeadlineScheduler = DeadlineScheduler(
+			ModularUtil.get_time, max_sleep=ModularBotConst.Scheduler.MAX_SLEEP
+		)
+		self._role_counter: RoleCounter = RoleCounter([
+			GuildRole.THE_MUSKETEER,
+			GuildRole.BOT,
+		])
+		self._lockdown: LockdownEngine = LockdownEngine(
+			excluded=[GuildChannel.BINCANG_HARAM_CHANNEL],
+			rate=ModularBotConst.LockDownTime.RATE,
+			per=ModularBotConst.LockDownTime.PER,
+			concurrency=ModularBotConst.LockDownTime.CONCURRENCY,
+		)
 
 		super().__init__(ModularBotConst.BOT_PREFIX, intents=intents)
 
 		self.synced: bool = False
 
-	async def on_guild_channel_delete(self, *_):
+	async def on_guild_channel_delete(self, channel: abc.GuildChannel):
+		self._lockdown.channel_delete(channel)
 		await self._analytics()
 
-	async def on_guild_channel_create(self, *_):
+	async def on_guild_channel_create(self, channel: abc.GuildChannel):
+		self._lockdown.channel_update(channel)
 		await self._analytics()
 
+	async def on_guild_channel_update(
+		self, _: abc.GuildChannel, after: abc.GuildChannel
+	):
+		# TODO NSFW flag may be toggled, index follow it
+		self._lockdown.channel_update(after)
+
 	async def on_guild_role_delete(self, *_):
 		await self._analytics()
 
@@ -334,6 +435,8 @@ class ModularBotClient(ModularBotBase, ModularBotTask):
 		if member.guild.id is not self._guild.id:
 			return
 
+		self._role_counter.member_join(member)
+
 		welcome_banner: BytesIO = await ModularUtil.banner_creator(
 			str(member.display_name), member.display_avatar.url
 		)
@@ -353,6 +456,9 @@ class ModularBotClient(ModularBotBase, ModularBotTask):
 			return
 
 	async def on_member_remove(self, member: Member) -> None:
+		if member.guild.id == self._guild.id:
+			self._role_counter.member_remove(member)
+
 		leave_banner: BytesIO = await ModularUtil.banner_creator(
 			str(member.display_name), member.display_avatar.url, is_welcome=False
 		)
@@ -365,6 +471,13 @@ class ModularBotClient(ModularBotBase, ModularBotTask):
 			create_task(leave_channel.send(file=image_file)),
 		])
 
+	async def on_member_update(self, before: Member, after: Member) -> None:
+		if after.guild.id != self._guild.id:
+			return
+
+		if self._role_counter.member_update(before, after):
+			await self._analytics()
+
 	async def on_message(self, message: Message) -> None:
 		if message.author == self.user:
 			return
@@ -404,6 +517,10 @@ class ModularBotClient(ModularBotBase, ModularBotTask):
 
 		print(self._praytime_channel)
 
+		# TODO Counted once, member event keep it up to date
+		self._role_counter.seed(self._guild)
+		self._lockdown.seed(self._guild)
+
 		if not self.synced:
 			await self.tree.sync()
 			self.synced = True
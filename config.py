@@ -22,6 +22,107 @@ class ModularBotConst:
 	class LockDownTime:
 		START: str = "Friday-09"
 		END: str = "Friday-21"
+		# Permission edit budget, shared by every locked channel of the guild
+		RATE: int = int(getenv("LOCKDOWN_RATE", 5))
+		PER: float = float(getenv("LOCKDOWN_PER", 5))
+		CONCURRENCY: int = int(getenv("LOCKDOWN_CONCURRENCY", 3))
+
+	class Scheduler:
+		# Longest sleep, so wall clock jump is noticed
+		MAX_SLEEP: float = float(getenv("SCHEDULER_MAX_SLEEP", 300))
+		PRESENCE_INTERVAL: float = float(getenv("PRESENCE_INTERVAL", 30))
+
+	class Prayer:
+		# Computed locally, the API is only used as a cross-check
+		LATITUDE: float = float(getenv("PRAYER_LATITUDE", -6.2088))
+		LONGITUDE: float = float(getenv("PRAYER_LONGITUDE", 106.8456))
+		ELEVATION: float = float(getenv("PRAYER_ELEVATION", 8))
+		# KEMENAG, MWL, ISNA, EGYPT, KARACHI, MAKKAH or JAKIM
+		METHOD: str = getenv("PRAYER_METHOD", "KEMENAG")
+		# 1 for Shafi'i, 2 for Hanafi
+		ASR_FACTOR: int = int(getenv("PRAYER_ASR_FACTOR", 1))
+		# Hour the moon must be old at sunset for the Hijri month to start next day
+		MIN_MOON_AGE: float = float(getenv("HIJRI_MIN_MOON_AGE", 8))
+		HIJRI_ADJUST: int = int(getenv("HIJRI_ADJUST", 0))
+		CROSS_CHECK: bool = getenv("PRAYER_CROSS_CHECK", "true").lower() == "true"
+		# Minute of difference with the API that is reported
+		CROSS_CHECK_TOLERANCE: int = int(getenv("PRAYER_CROSS_CHECK_TOLERANCE", 3))
+		CACHE_FILE: str = getenv("PRAYER_CACHE_FILE", "data/prayers.json")
+		# Cached period older than this is fetched again, day key has no year
+		CACHE_MAX_AGE: int = int(getenv("PRAYER_CACHE_MAX_AGE", 3456000))
+		RETRIES: int = int(getenv("PRAYER_RETRIES", 5))
+		BACKOFF: float = float(getenv("PRAYER_BACKOFF", 2))
+		BACKOFF_CAP: float = float(getenv("PRAYER_BACKOFF_CAP", 120))
+
+	class Analytics:
+		# Discord allow about 2 channel rename every 10 minute
+		RENAME_RATE: int = int(getenv("ANALYTICS_RENAME_RATE", 2))
+		RENAME_PER: float = float(getenv("ANALYTICS_RENAME_PER", 600))
+		DEBOUNCE: float = float(getenv("ANALYTICS_DEBOUNCE", 10))
+		# Seconds between full role recount, to catch missed member event
+		VERIFY_INTERVAL: int = int(getenv("ANALYTICS_VERIFY_INTERVAL", 1800))
+
+	class Cache:
+		SEARCH_CAPACITY: int = int(getenv("SEARCH_CACHE_CAPACITY", 512))
+		SEARCH_TTL: int = int(getenv("SEARCH_CACHE_TTL", 600))
+		NEGATIVE_TTL: int = int(getenv("SEARCH_CACHE_NEGATIVE_TTL", 30))
+		INDEX_CAPACITY: int = int(getenv("TRACK_INDEX_CAPACITY", 2000))
+		PREFETCH_CONFIDENCE: float = float(getenv("PREFETCH_CONFIDENCE", 0.6))
+
+	class Player:
+		ENRICH_LATER: bool = getenv("PLAYER_ENRICH_LATER", "true").lower() == "true"
+		# Newest history track still counted as seen by autoplay
+		SEEN_CAPACITY: int = int(getenv("AUTOPLAY_SEEN_CAPACITY", 200))
+		# Seconds to gather filter, volume, seek and pause into one update
+		UPDATE_WINDOW: float = float(getenv("PLAYER_UPDATE_WINDOW", 0.05))
+
+	class Balancer:
+		PLAYERS_WEIGHT: float = float(getenv("LAVALINK_PLAYERS_WEIGHT", 1.0))
+		PLAYING_WEIGHT: float = float(getenv("LAVALINK_PLAYING_WEIGHT", 1.0))
+		CPU_WEIGHT: float = float(getenv("LAVALINK_CPU_WEIGHT", 1.0))
+		FRAMES_WEIGHT: float = float(getenv("LAVALINK_FRAMES_WEIGHT", 1.0))
+		MAX_PLAYERS: int = int(getenv("LAVALINK_MAX_PLAYERS", 0))
+		FRAME_LOSS_THRESHOLD: float = float(
+			getenv("LAVALINK_FRAME_LOSS_THRESHOLD", 0.1)
+		)
+		DEGRADED_COOLDOWN: float = float(getenv("LAVALINK_DEGRADED_COOLDOWN", 300))
+		STATS_INTERVAL: float = float(getenv("LAVALINK_STATS_INTERVAL", 60))
+
+	class Autoplay:
+		LOW_WATERMARK: int = int(getenv("AUTOPLAY_LOW_WATERMARK", 8))
+		REFILL_JITTER: float = float(getenv("AUTOPLAY_REFILL_JITTER", 2.0))
+		REFILL_RATE: int = int(getenv("AUTOPLAY_REFILL_RATE", 10))
+		REFILL_PER: float = float(getenv("AUTOPLAY_REFILL_PER", 60))
+
+	class Queue:
+		CHUNK_SIZE: int = int(getenv("QUEUE_CHUNK_SIZE", 50))
+
+	class Enrichment:
+		WORKERS: int = int(getenv("ENRICHMENT_WORKERS", 4))
+		PER_NODE: int = int(getenv("ENRICHMENT_PER_NODE", 2))
+		WINDOW: int = int(getenv("ENRICHMENT_WINDOW", 5))
+
+	class Store:
+		FILE: str = getenv("TRACK_STORE_FILE", "data/track_store.db")
+		CAPACITY: int = int(getenv("TRACK_STORE_CAPACITY", 50000))
+		RESOLUTION_TTL: int = int(getenv("TRACK_STORE_RESOLUTION_TTL", 604800))
+		FLUSH_INTERVAL: int = int(getenv("TRACK_STORE_FLUSH_INTERVAL", 5))
+
+	class Session:
+		INTERVAL: int = int(getenv("PLAYER_SNAPSHOT_INTERVAL", 60))
+		HISTORY: int = int(getenv("PLAYER_SNAPSHOT_HISTORY", 50))
+		# Older snapshot is not resumed on start
+		MAX_AGE: int = int(getenv("PLAYER_SNAPSHOT_MAX_AGE", 21600))
+		# Seconds Lavalink keep player running while the bot is away, 0 disable it
+		RESUME_TIMEOUT: int = int(getenv("LAVALINK_RESUME_TIMEOUT", 60))
+
+	class NowPlaying:
+		# Seconds to wait so track end and the next start become one edit
+		DEBOUNCE: float = float(getenv("NOW_PLAYING_DEBOUNCE", 0.5))
+		EDIT_RATE: int = int(getenv("NOW_PLAYING_EDIT_RATE", 5))
+		EDIT_PER: float = float(getenv("NOW_PLAYING_EDIT_PER", 5))
+		# Newer message count before the controller is sent again at the bottom
+		SCROLL_LIMIT: int = int(getenv("NOW_PLAYING_SCROLL_LIMIT", 10))
 
 	@staticmethod
 	def get_secret(key: str) -> str | int | None:
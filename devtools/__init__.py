@@ -0,0 +1 @@
+"""Offline development tools, never imported by the bot itself."""
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from statistics import median
+from time import perf_counter_ns
+from typing import Callable
+
+
+@dataclass(slots=True)
+class Case:
+	name: str
+	# Called once, return the operation to time
+	setup: Callable[[], Callable[[], object]]
+
+
+@dataclass(slots=True)
+class Result:
+	name: str
+	number: int
+	repeat: int
+	median_ns: float
+	min_ns: float
+
+	def to_json(self) -> dict:
+		return dict({
+			"number": self.number,
+			"repeat": self.repeat,
+			"median_ns": round(self.median_ns, 1),
+			"min_ns": round(self.min_ns, 1),
+		})
+
+
+CASES: list[Case] = list()
+
+
+def case(name: str) -> Callable:
+	"""Register a benchmark, decorated function is its setup"""
+
+	def decorator(setup: Callable[[], Callable[[], object]]) -> Callable:
+		CASES.append(Case(name, setup))
+		return setup
+
+	return decorator
+
+
+def measure(item: Case, *, repeat: int = 7, target: float = 0.1) -> Result:
+	"""Time per operation, number of call per sample is calibrated to target second"""
+	operation: Callable[[], object] = item.setup()
+
+	# Warm up cache, lazy import and first allocation
+	operation()
+
+	number: int = 1
+	while True:
+		started: int = perf_counter_ns()
+		for _ in range(number):
+			operation()
+		elapsed: int = perf_counter_ns() - started
+
+		if elapsed >= target * 1e9 / 5 or number >= 1 << 20:
+			break
+
+		number *= 2
+
+	samples: list[float] = list()
+	for _ in range(repeat):
+		started = perf_counter_ns()
+		for _ in range(number):
+			operation()
+		samples.append((perf_counter_ns() - started) / number)
+
+	return Result(
+		name=item.name,
+		number=number,
+		repeat=repeat,
+		median_ns=median(samples),
+		min_ns=min(samples),
+	)
+
+
+def compare(
+	results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[tuple[str, float]]:
+	"""Cases slower than baseline by more than threshold, with their ratio"""
+	regressions: list[tuple[str, float]] = list()
+
+	for name, result in results.items():
+		if name not in baseline:
+			continue
+
+		ratio: float = result["median_ns"] / baseline[name]["median_ns"]
+		if ratio > 1 + threshold:
+			regressions.append((name, ratio))
+
+	return regressions
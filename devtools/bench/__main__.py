@@ -0,0 +1,83 @@
+from argparse import ArgumentParser
+from asyncio import run
+from json import dump, dumps, load
+from os import path
+from platform import python_implementation, python_version
+from sys import exit
+
+from . import CASES, Result, compare, measure
+from ..offline import prepare_environment
+
+BASELINE: str = path.join(path.dirname(__file__), "baseline.json")
+
+
+async def _run(pattern: str | None, repeat: int, target: float) -> dict[str, dict]:
+	# discord.ui.View need a running loop
+	results: dict[str, dict] = dict()
+
+	for item in CASES:
+		if pattern and pattern not in item.name:
+			continue
+
+		result: Result = measure(item, repeat=repeat, target=target)
+		results[result.name] = result.to_json()
+
+	return results
+
+
+def main() -> None:
+	parser: ArgumentParser = ArgumentParser(description="Player hot path benchmarks")
+	parser.add_argument("-k", "--filter", default=None, help="Run case containing it")
+	parser.add_argument("--repeat", type=int, default=7)
+	parser.add_argument("--target", type=float, default=0.1)
+	parser.add_argument("--baseline", default=BASELINE)
+	parser.add_argument("--threshold", type=float, default=0.25)
+	parser.add_argument("--output", default=None, help="Write result JSON here")
+	parser.add_argument("--save-baseline", action="store_true")
+	args = parser.parse_args()
+
+	# Config is read at import, environment must be ready first
+	prepare_environment()
+	from . import cases  # noqa: F401
+
+	results: dict[str, dict] = run(_run(args.filter, args.repeat, args.target))
+	report: dict = dict({
+		"python": f"{python_implementation()} {python_version()}",
+		"results": results,
+	})
+
+	if args.save_baseline:
+		with open(args.baseline, "w") as f:
+			dump(report, f, indent="\t")
+			f.write("\n")
+
+	if args.output:
+		with open(args.output, "w") as f:
+			dump(report, f, indent="\t")
+			f.write("\n")
+
+	baseline: dict[str, dict] = dict()
+	if not args.save_baseline and path.exists(args.baseline):
+		with open(args.baseline, "r") as f:
+			baseline = load(f)["results"]
+
+	for name, result in results.items():
+		ratio: str = (
+			f"{result['median_ns'] / baseline[name]['median_ns']:.2f}x"
+			if name in baseline
+			else "new"
+		)
+		print(f"{name:<32} {result['median_ns'] / 1000:>12.2f} us  {ratio}")
+
+	regressions: list[tuple[str, float]] = compare(results, baseline, args.threshold)
+	if regressions:
+		print(
+			dumps({
+				"regressions": {name: round(ratio, 2) for name, ratio in regressions}
+			})
+		)
+		exit(1)
+
+
+if __name__ == "__main__":
+	main()
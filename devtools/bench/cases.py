@@ -0,0 +1,256 @@
+from datetime import datetime
+from itertools import chain
+from types import SimpleNamespace
+
+import numpy as np
+
+from wavelink import Playable, Queue
+
+from ModularBot.prayer_engine import METHODS, PrayerEngine
+from ModularBot.player.interfaces import (
+	CustomPlayer,
+	CustomYouTubeMusicPlayable,
+	QueryResolver,
+	TrackType,
+)
+from ModularBot.player.identity_index import IdentityIndex, TrackedItems
+from ModularBot.player.presets import FilterEffect, FilterPresets
+from ModularBot.player.segments import TrackSegments
+from ModularBot.player.util_player import UtilTrackPlayer
+from ModularBot.player.view import QueueView, SelectViewTrack, TrackView
+from config import ModularBotConst
+
+from . import case
+from ..fake_lavalink import FakeLavalink
+
+URLS: tuple[str, ...] = (
+	"https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+	"https://youtu.be/dQw4w9WgXcQ?si=tracking",
+	"https://music.youtube.com/watch?v=dQw4w9WgXcQ&list=RDAMVMdQw4w9WgXcQ",
+	"https://www.youtube.com/playlist?list=PL590L5WQmH8fJ54F369BLDSqIwcs-TCfs",
+	"https://m.youtube.com/shorts/abcdefghijk",
+	"https://open.spotify.com/intl-id/track/4cOdK2wGLETKBW3PvgPWqT?si=x",
+	"https://open.spotify.com/album/1DFixLWuPkv3KT3TnV35m3",
+	"https://soundcloud.com/artist/sets/some-set",
+	"https://soundcloud.com/artist/some-track/",
+	"never gonna give you up",
+)
+
+
+def tracks(
+	count: int, source: str = "youtube", prefix: str = "bench"
+) -> list[Playable]:
+	return [
+		Playable(FakeLavalink.synthesize(source, f"{prefix} {i}")) for i in range(count)
+	]
+
+
+def bare_player() -> CustomPlayer:
+	"""Player state only, never connected to any node"""
+	player: CustomPlayer = CustomPlayer.__new__(CustomPlayer)
+	player.seen = IdentityIndex()
+	player.queue = Queue()
+	player.queue._items = TrackSegments(ModularBotConst.Queue.CHUNK_SIZE, player.seen)
+	player.auto_queue = Queue()
+	player.auto_queue._items = TrackedItems(player.seen)
+	for history in (player.queue.history, player.auto_queue.history):
+		history._items = TrackedItems(
+			player.seen, window=ModularBotConst.Player.SEEN_CAPACITY
+		)
+	player._paused = False
+	player.normal_default = True
+	player.reset_filter()
+
+	return player
+
+
+def interaction() -> SimpleNamespace:
+	return SimpleNamespace(
+		created_at=datetime.now(),
+		user=SimpleNamespace(
+			id=1,
+			display_name="Bench",
+			display_avatar="https://cdn.discordapp.com/embed/avatars/0.png",
+		),
+	)
+
+
+# TODO Query parsing
+@case("what_type.cached")
+def _what_type_cached():
+	def run() -> None:
+		for url in URLS:
+			TrackType.what_type(url)
+
+	return run
+
+
+@case("what_type.cold")
+def _what_type_cold():
+	def run() -> None:
+		QueryResolver.resolve.cache_clear()
+		for url in URLS:
+			TrackType.what_type(url)
+
+	return run
+
+
+@case("is_playlist.cold")
+def _is_playlist_cold():
+	def run() -> None:
+		QueryResolver.resolve.cache_clear()
+		for url in URLS:
+			TrackType.YOUTUBE.is_playlist(url)
+
+	return run
+
+
+@case("parse_sec")
+def _parse_sec():
+	lengths: list[int] = [x * 7919 for x in range(0, 100000, 1000)] + [90000000]
+
+	def run() -> None:
+		for length in lengths:
+			UtilTrackPlayer.parse_sec(length)
+			UtilTrackPlayer.parse_sec(length, show_suffix=False)
+
+	return run
+
+
+# TODO Embed rendering
+@case("queue_view.get_embed")
+def _queue_view():
+	view: QueueView = QueueView(tracks(1000), interaction())
+
+	def run() -> None:
+		view.get_embed
+
+	return run
+
+
+@case("queue_view.build_5000_lazy")
+def _queue_view_build():
+	player: CustomPlayer = bare_player()
+	player.queue_playlist(tracks(5000))
+	player.auto_queue.put(tracks(20, prefix="auto"))
+	source: SimpleNamespace = interaction()
+
+	def run() -> None:
+		QueueView(chain(player.queue, player.auto_queue), source).get_embed
+
+	return run
+
+
+@case("select_view_track.get_embed")
+def _select_view():
+	results: list[Playable] = tracks(30)
+	source: SimpleNamespace = interaction()
+
+	def run() -> None:
+		SelectViewTrack(None, source, data=results).get_embed
+
+	return run
+
+
+@case("track_view.get_embed")
+def _track_view():
+	player: CustomPlayer = bare_player()
+	player._original = player._current = tracks(1, "spotify")[0]
+	player.interaction = interaction()
+
+	def run() -> None:
+		TrackView(None, player).get_embed
+
+	return run
+
+
+@case("track_view.get_embed_filters")
+def _track_view_filters():
+	player: CustomPlayer = bare_player()
+	player._original = player._current = tracks(1, "spotify")[0]
+	player.interaction = interaction()
+	player.filter_effects = (
+		FilterEffect.NIGHT_CORE | FilterEffect.BASS_BOOST | FilterEffect.NORMALIZATION
+	)
+
+	def run() -> None:
+		TrackView(None, player).get_embed
+
+	return run
+
+
+@case("filters.compile_stacked")
+def _filters_compile():
+	effects: list[FilterEffect] = [
+		FilterEffect(x) for x in range(0, 1 << len(FilterEffect), 37)
+	]
+
+	def run() -> None:
+		for effect in effects:
+			FilterPresets.compile(effect)
+
+	return run
+
+
+# TODO Queue
+@case("queue.playlist_5000")
+def _playlist_insert():
+	playlist: list[Playable] = tracks(5000, "youtube_music")
+
+	def run() -> None:
+		player: CustomPlayer = bare_player()
+		player.queue_playlist(
+			playlist, transform=CustomYouTubeMusicPlayable.from_playable
+		)
+		player.queue.get()
+
+	return run
+
+
+@case("queue.playlist_5000_front")
+def _playlist_insert_front():
+	playlist: list[Playable] = tracks(5000)
+	queued: list[Playable] = tracks(200, prefix="queued")
+
+	def run() -> None:
+		player: CustomPlayer = bare_player()
+		player.queue.put(queued)
+		player.queue_playlist(playlist, front=True)
+		player.queue.get()
+
+	return run
+
+
+# TODO Autoplay
+@case("recommendation.filter")
+def _recommendation_filter():
+	candidates: list[Playable] = tracks(40, prefix="candidate")
+	history: list[Playable] = tracks(200, prefix="history") + candidates[::2]
+
+	# History is indexed as it is put, player is rebuilt on every run
+	def run() -> None:
+		player: CustomPlayer = bare_player()
+		player.queue.history.put(history)
+
+		player.pick_recommendations(candidates, 20)
+
+	return run
+
+
+# TODO Prayer
+@case("prayer_engine.year")
+def _prayer_year():
+	engine: PrayerEngine = PrayerEngine(
+		ModularBotConst.Prayer.LATITUDE,
+		ModularBotConst.Prayer.LONGITUDE,
+		tz=ModularBotConst.TIMEZONE,
+		method=METHODS["KEMENAG"],
+	)
+	days: np.ndarray = np.arange(
+		datetime(2026, 1, 1).toordinal(), datetime(2027, 1, 1).toordinal()
+	)
+
+	def run() -> None:
+		engine.compute(days)
+
+	return run
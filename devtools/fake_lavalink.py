@@ -0,0 +1,655 @@
+from argparse import ArgumentParser
+from asyncio import CancelledError, Task, create_task, run, sleep
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from dataclasses import dataclass, field
+from hashlib import sha1
+from json import dumps, load, loads
+from os import path
+from random import Random
+from time import monotonic, time
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+from aiohttp import WSMsgType, web
+
+FIXTURES: str = path.join(path.dirname(__file__), "fixtures", "loadtracks.json")
+
+
+@dataclass(slots=True)
+class FakeConfig:
+	password: str = "youshallnotpass"
+	# REST latency, uniformly picked between latency and latency + jitter
+	latency: float = 0.0
+	jitter: float = 0.0
+	# Chance of a REST call answered with HTTP 500
+	failure_rate: float = 0.0
+	# Chance of loadtracks answering loadType error
+	load_failure_rate: float = 0.0
+	# Chance of a started track failing with TrackException
+	track_failure_rate: float = 0.0
+	# Delay between PATCH and TrackStartEvent
+	start_delay: float = 0.0
+	# Playback speed, 60 make a 3 minute track end in 3 seconds
+	speed: float = 60.0
+	playlist_size: int = 100
+	search_size: int = 10
+	stats_interval: float = 5.0
+	update_interval: float = 5.0
+	# Frame stats reported in every stats op
+	deficit: int = 0
+	nulled: int = 0
+	seed: int | None = None
+
+
+@dataclass(slots=True)
+class _PlayerState:
+	guild_id: str
+	track: dict | None = None
+	position: int = 0
+	paused: bool = False
+	volume: int = 100
+	filters: dict = field(default_factory=dict)
+	voice: dict = field(default_factory=dict)
+	started_at: float = 0.0
+	end_time: int | None = None
+	task: Task | None = None
+
+	def current_position(self, speed: float) -> int:
+		if self.track is None or self.paused:
+			return self.position
+
+		elapsed: int = int((monotonic() - self.started_at) * 1000 * speed)
+		return min(self.track["info"]["length"], self.position + elapsed)
+
+
+@dataclass(slots=True)
+class _Session:
+	id: str
+	ws: web.WebSocketResponse | None = None
+	players: dict[str, _PlayerState] = field(default_factory=dict)
+	resuming: bool = False
+	timeout: int = 60
+
+
+class FakeLavalink:
+	"""Just enough of Lavalink v4 for the player layer to run offline.
+
+	``loadtracks`` answers from ``fixtures/loadtracks.json`` first, anything else
+	is synthesized deterministically from the identifier. Playback is simulated,
+	track events are sent over the websocket as a real node would.
+	"""
+
+	def __init__(self, config: FakeConfig | None = None) -> None:
+		self.config: FakeConfig = config or FakeConfig()
+		self.sessions: dict[str, _Session] = dict()
+		self.requests: int = 0
+
+		self.__random: Random = Random(self.config.seed)
+		self.__started_at: float = monotonic()
+		self.__runner: web.AppRunner | None = None
+		self.__tickers: list[Task] = list()
+
+		with open(FIXTURES, "r") as f:
+			self.__fixtures: dict[str, dict] = load(f)
+
+	# TODO Lifecycle
+	async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+		app: web.Application = web.Application(middlewares=[self.__middleware])
+		app.add_routes([
+			web.get("/version", self.__version),
+			web.get("/v4/info", self.__info),
+			web.get("/v4/stats", self.__stats_route),
+			web.get("/v4/websocket", self.__websocket),
+			web.get("/v4/loadtracks", self.__loadtracks),
+			web.get("/v4/sessions/{session}/players", self.__players),
+			web.get("/v4/sessions/{session}/players/{guild}", self.__player),
+			web.patch("/v4/sessions/{session}/players/{guild}", self.__update_player),
+			web.delete("/v4/sessions/{session}/players/{guild}", self.__destroy_player),
+			web.patch("/v4/sessions/{session}", self.__update_session),
+		])
+
+		self.__runner = web.AppRunner(app)
+		await self.__runner.setup()
+
+		site: web.TCPSite = web.TCPSite(self.__runner, host, port)
+		await site.start()
+
+		self.__tickers = [
+			create_task(self.__tick(self.config.stats_interval, self.__send_stats)),
+			create_task(self.__tick(self.config.update_interval, self.__send_updates)),
+		]
+
+		bound: int = site._server.sockets[0].getsockname()[1]
+		return f"http://{host}:{bound}"
+
+	async def stop(self) -> None:
+		for task in self.__tickers:
+			task.cancel()
+
+		for session in self.sessions.values():
+			for player in session.players.values():
+				if player.task:
+					player.task.cancel()
+
+			if session.ws is not None:
+				await session.ws.close()
+
+		if self.__runner:
+			await self.__runner.cleanup()
+
+	# TODO Track synthesis
+	@staticmethod
+	def encode(info: dict) -> str:
+		return urlsafe_b64encode(dumps(info).encode()).decode()
+
+	@classmethod
+	def decode(cls, encoded: str) -> dict:
+		return cls.track(loads(urlsafe_b64decode(encoded.encode())))
+
+	@classmethod
+	def track(cls, info: dict) -> dict:
+		return dict({
+			"encoded": cls.encode(info),
+			"info": info,
+			"pluginInfo": {},
+			"userData": {},
+		})
+
+	@classmethod
+	def synthesize(cls, source: str, seed: str, position: int = 0) -> dict:
+		identifier: str = sha1(f"{source}:{seed}".encode()).hexdigest()[:11]
+		uri, artwork = {
+			"youtube": (
+				f"https://www.youtube.com/watch?v={identifier}",
+				f"https://i.ytimg.com/vi/{identifier}/maxresdefault.jpg",
+			),
+			"youtube_music": (
+				f"https://music.youtube.com/watch?v={identifier}",
+				f"https://lh3.googleusercontent.com/{identifier}",
+			),
+			"soundcloud": (
+				f"https://soundcloud.com/fake/{identifier}",
+				f"https://i1.sndcdn.com/{identifier}.jpg",
+			),
+			"spotify": (
+				f"https://open.spotify.com/track/{identifier}",
+				f"https://i.scdn.co/image/{identifier}",
+			),
+		}[source]
+
+		return cls.track({
+			"identifier": identifier,
+			"isSeekable": True,
+			"author": f"Fake Artist {int(identifier, 16) % 7}",
+			"length": 150000 + int(identifier, 16) % 120000,
+			"isStream": False,
+			"position": position,
+			"title": f"Fake Track {seed}",
+			"uri": uri,
+			"artworkUrl": artwork,
+			"isrc": f"FAKE{identifier[:8].upper()}" if source == "spotify" else None,
+			"sourceName": "youtube" if source == "youtube_music" else source,
+		})
+
+	def resolve(self, identifier: str) -> dict:
+		if identifier in self.__fixtures:
+			return self.__fixtures[identifier]
+
+		if self.__random.random() < self.config.load_failure_rate:
+			return dict({
+				"loadType": "error",
+				"data": {
+					"message": "Injected load failure",
+					"severity": "common",
+					"cause": "FakeLavalink",
+				},
+			})
+
+		prefixes: dict[str, str] = {
+			"ytsearch:": "youtube",
+			"ytmsearch:": "youtube_music",
+			"scsearch:": "soundcloud",
+			"spsearch:": "spotify",
+			"sprec:": "spotify",
+		}
+		for prefix, source in prefixes.items():
+			if identifier.startswith(prefix):
+				query: str = identifier.removeprefix(prefix)
+				return dict({
+					"loadType": "search",
+					"data": [
+						self.synthesize(source, f"{query} {i}")
+						for i in range(self.config.search_size)
+					],
+				})
+
+		url = urlparse(identifier)
+		if not url.scheme:
+			return dict({"loadType": "empty", "data": {}})
+
+		source: str = (
+			"youtube_music"
+			if url.netloc.startswith("music.")
+			else "spotify"
+			if "spotify" in url.netloc
+			else "soundcloud"
+			if "soundcloud" in url.netloc
+			else "youtube"
+		)
+		params: dict[str, list[str]] = parse_qs(url.query)
+
+		if "list" in params or any(
+			x in url.path for x in ("/playlist", "/album", "/sets/")
+		):
+			name: str = params.get("list", [url.path])[0]
+			return dict({
+				"loadType": "playlist",
+				"data": {
+					"info": {"name": f"Fake Playlist {name}", "selectedTrack": -1},
+					"pluginInfo": {},
+					"tracks": [
+						self.synthesize(source, f"{name} {i}")
+						for i in range(self.config.playlist_size)
+					],
+				},
+			})
+
+		return dict({
+			"loadType": "track",
+			"data": self.synthesize(source, params.get("v", [url.path])[0]),
+		})
+
+	# TODO REST
+	@web.middleware
+	async def __middleware(self, request: web.Request, handler) -> web.StreamResponse:
+		if request.headers.get("Authorization") != self.config.password:
+			return web.json_response(self.__error(401, "Unauthorized"), status=401)
+
+		self.requests += 1
+
+		if request.path != "/v4/websocket":
+			if self.config.latency or self.config.jitter:
+				await sleep(
+					self.config.latency + self.__random.random() * self.config.jitter
+				)
+
+			if self.__random.random() < self.config.failure_rate:
+				return web.json_response(
+					self.__error(500, "Injected failure"), status=500
+				)
+
+		return await handler(request)
+
+	@staticmethod
+	def __error(status: int, message: str) -> dict:
+		return dict({
+			"timestamp": int(time() * 1000),
+			"status": status,
+			"error": message,
+			"message": message,
+			"path": "",
+		})
+
+	async def __version(self, _: web.Request) -> web.Response:
+		return web.Response(text="4.0.0-fake")
+
+	async def __info(self, _: web.Request) -> web.Response:
+		return web.json_response({
+			"version": {
+				"semver": "4.0.0-fake",
+				"major": 4,
+				"minor": 0,
+				"patch": 0,
+				"preRelease": "fake",
+				"build": None,
+			},
+			"buildTime": 0,
+			"git": {"branch": "fake", "commit": "0000000", "commitTime": 0},
+			"jvm": "none",
+			"lavaplayer": "none",
+			"sourceManagers": ["youtube", "soundcloud", "spotify"],
+			"filters": ["volume", "equalizer", "timescale", "tremolo", "vibrato"],
+			"plugins": [],
+		})
+
+	def __stats(self) -> dict:
+		players: list[_PlayerState] = [
+			x for s in self.sessions.values() for x in s.players.values()
+		]
+
+		return dict({
+			"players": len(players),
+			"playingPlayers": len([x for x in players if x.track and not x.paused]),
+			"uptime": int((monotonic() - self.__started_at) * 1000),
+			"memory": {"free": 0, "used": 0, "allocated": 0, "reservable": 0},
+			"cpu": {"cores": 1, "systemLoad": 0.0, "lavalinkLoad": 0.0},
+			"frameStats": {
+				"sent": 3000 - self.config.deficit - self.config.nulled,
+				"nulled": self.config.nulled,
+				"deficit": self.config.deficit,
+			},
+		})
+
+	async def __stats_route(self, _: web.Request) -> web.Response:
+		stats: dict = self.__stats()
+		stats["frameStats"] = None
+		return web.json_response(stats)
+
+	def __session(self, request: web.Request) -> _Session:
+		session: _Session | None = self.sessions.get(request.match_info["session"])
+		if session is None:
+			raise web.HTTPNotFound(
+				text=dumps(self.__error(404, "Session not found")),
+				content_type="application/json",
+			)
+
+		return session
+
+	def __player_json(self, player: _PlayerState) -> dict:
+		return dict({
+			"guildId": player.guild_id,
+			"track": player.track,
+			"volume": player.volume,
+			"paused": player.paused,
+			"state": {
+				"time": int(time() * 1000),
+				"position": player.current_position(self.config.speed),
+				"connected": bool(player.voice),
+				"ping": 0,
+			},
+			"voice": player.voice,
+			"filters": player.filters,
+		})
+
+	async def __loadtracks(self, request: web.Request) -> web.Response:
+		return web.json_response(self.resolve(request.query.get("identifier", "")))
+
+	async def __players(self, request: web.Request) -> web.Response:
+		session: _Session = self.__session(request)
+		return web.json_response([
+			self.__player_json(x) for x in session.players.values()
+		])
+
+	async def __player(self, request: web.Request) -> web.Response:
+		session: _Session = self.__session(request)
+		player: _PlayerState | None = session.players.get(request.match_info["guild"])
+
+		if player is None:
+			return web.json_response(self.__error(404, "Player not found"), status=404)
+
+		return web.json_response(self.__player_json(player))
+
+	async def __update_player(self, request: web.Request) -> web.Response:
+		session: _Session = self.__session(request)
+		guild: str = request.match_info["guild"]
+		data: dict = await request.json()
+		no_replace: bool = request.query.get("noReplace", "false").lower() == "true"
+
+		player: _PlayerState = session.players.setdefault(guild, _PlayerState(guild))
+
+		if "voice" in data:
+			player.voice = data["voice"]
+		if "volume" in data:
+			player.volume = data["volume"]
+		if "filters" in data:
+			player.filters = data["filters"]
+
+		if "position" in data and player.track and "track" not in data:
+			player.position = data["position"]
+			player.started_at = monotonic()
+			self.__schedule_end(session, player)
+
+		if "paused" in data and data["paused"] != player.paused:
+			player.position = player.current_position(self.config.speed)
+			player.started_at = monotonic()
+			player.paused = data["paused"]
+			self.__schedule_end(session, player)
+
+		track: dict | None = data.get("track")
+		if track is not None and not (no_replace and player.track):
+			encoded: str | None = track.get("encoded")
+			await self.__play(
+				session,
+				player,
+				self.decode(encoded) if encoded else None,
+				position=data.get("position", 0),
+				end_time=data.get("endTime"),
+				user_data=track.get("userData", {}),
+			)
+
+		return web.json_response(self.__player_json(player))
+
+	async def __destroy_player(self, request: web.Request) -> web.Response:
+		session: _Session = self.__session(request)
+		player: _PlayerState | None = session.players.pop(
+			request.match_info["guild"], None
+		)
+
+		if player and player.task:
+			player.task.cancel()
+
+		return web.Response(status=204)
+
+	async def __update_session(self, request: web.Request) -> web.Response:
+		session: _Session = self.__session(request)
+		data: dict = await request.json()
+
+		session.resuming = data.get("resuming", session.resuming)
+		session.timeout = data.get("timeout", session.timeout)
+
+		return web.json_response({
+			"resuming": session.resuming,
+			"timeout": session.timeout,
+		})
+
+	# TODO Websocket
+	async def __websocket(self, request: web.Request) -> web.WebSocketResponse:
+		ws: web.WebSocketResponse = web.WebSocketResponse()
+		await ws.prepare(request)
+
+		session_id: str | None = request.headers.get("Session-Id")
+		session: _Session | None = self.sessions.get(session_id) if session_id else None
+		resumed: bool = session is not None and session.resuming
+
+		if not resumed:
+			session = _Session(id=uuid4().hex[:16])
+			self.sessions[session.id] = session
+
+		session.ws = ws
+		await ws.send_json({"op": "ready", "resumed": resumed, "sessionId": session.id})
+		await ws.send_json({"op": "stats", **self.__stats()})
+
+		async for message in ws:
+			if message.type in (WSMsgType.CLOSE, WSMsgType.ERROR):
+				break
+
+		if session.ws is ws:
+			session.ws = None
+
+		# Not resumable, everything on it is gone
+		if not session.resuming:
+			for player in session.players.values():
+				if player.task:
+					player.task.cancel()
+
+			self.sessions.pop(session.id, None)
+
+		return ws
+
+	async def __send(self, session: _Session, data: dict) -> None:
+		if session.ws is not None and not session.ws.closed:
+			await session.ws.send_json(data)
+
+	async def __event(self, session: _Session, guild: str, kind: str, **data) -> None:
+		await self.__send(
+			session, {"op": "event", "type": kind, "guildId": guild, **data}
+		)
+
+	async def __tick(self, interval: float, callback) -> None:
+		while True:
+			await sleep(interval)
+			await callback()
+
+	async def __send_stats(self) -> None:
+		for session in list(self.sessions.values()):
+			await self.__send(session, {"op": "stats", **self.__stats()})
+
+	async def __send_updates(self) -> None:
+		for session in list(self.sessions.values()):
+			for player in list(session.players.values()):
+				await self.__send(
+					session,
+					{
+						"op": "playerUpdate",
+						"guildId": player.guild_id,
+						"state": self.__player_json(player)["state"],
+					},
+				)
+
+	# TODO Playback simulation
+	async def __play(
+		self,
+		session: _Session,
+		player: _PlayerState,
+		track: dict | None,
+		*,
+		position: int,
+		end_time: int | None,
+		user_data: dict,
+	) -> None:
+		if player.task:
+			player.task.cancel()
+			player.task = None
+
+		previous: dict | None = player.track
+		if previous is not None:
+			await self.__event(
+				session,
+				player.guild_id,
+				"TrackEndEvent",
+				track=previous,
+				reason="replaced" if track else "stopped",
+			)
+
+		player.track = None
+		player.position = 0
+		if track is None:
+			return
+
+		track["userData"] = user_data
+		player.track = track
+		player.position = position
+		player.end_time = end_time
+		player.started_at = monotonic()
+		player.task = create_task(self.__lifecycle(session, player, track))
+
+	async def __lifecycle(
+		self, session: _Session, player: _PlayerState, track: dict
+	) -> None:
+		try:
+			await sleep(self.config.start_delay)
+
+			if self.__random.random() < self.config.track_failure_rate:
+				player.track = None
+				await self.__event(
+					session,
+					player.guild_id,
+					"TrackExceptionEvent",
+					track=track,
+					exception={
+						"message": "Injected track failure",
+						"severity": "common",
+						"cause": "FakeLavalink",
+					},
+				)
+				await self.__event(
+					session,
+					player.guild_id,
+					"TrackEndEvent",
+					track=track,
+					reason="loadFailed",
+				)
+				return
+
+			player.started_at = monotonic()
+			await self.__event(session, player.guild_id, "TrackStartEvent", track=track)
+			await self.__wait_end(session, player, track)
+		except CancelledError:
+			pass
+
+	def __schedule_end(self, session: _Session, player: _PlayerState) -> None:
+		if player.task:
+			player.task.cancel()
+			player.task = None
+
+		if player.track and not player.paused:
+			player.task = create_task(self.__wait_end(session, player, player.track))
+
+	async def __wait_end(
+		self, session: _Session, player: _PlayerState, track: dict
+	) -> None:
+		try:
+			length: int = player.end_time or track["info"]["length"]
+			await sleep(max(0, length - player.position) / 1000 / self.config.speed)
+
+			if player.track is track:
+				player.track = None
+				player.position = 0
+				await self.__event(
+					session,
+					player.guild_id,
+					"TrackEndEvent",
+					track=track,
+					reason="finished",
+				)
+		except CancelledError:
+			pass
+
+
+async def _serve(config: FakeConfig, host: str, port: int) -> None:
+	server: FakeLavalink = FakeLavalink(config)
+	uri: str = await server.start(host, port)
+	print(f"Fake Lavalink listening on {uri}, password {config.password!r}")
+
+	try:
+		while True:
+			await sleep(3600)
+	finally:
+		await server.stop()
+
+
+def main() -> None:
+	parser: ArgumentParser = ArgumentParser(description="Run a fake Lavalink v4 node")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=2333)
+	parser.add_argument("--password", default="youshallnotpass")
+	parser.add_argument("--latency", type=float, default=0.0)
+	parser.add_argument("--jitter", type=float, default=0.0)
+	parser.add_argument("--failure-rate", type=float, default=0.0)
+	parser.add_argument("--load-failure-rate", type=float, default=0.0)
+	parser.add_argument("--track-failure-rate", type=float, default=0.0)
+	parser.add_argument("--speed", type=float, default=60.0)
+	parser.add_argument("--deficit", type=int, default=0)
+	parser.add_argument("--nulled", type=int, default=0)
+	args = parser.parse_args()
+
+	config: FakeConfig = FakeConfig(
+		password=args.password,
+		latency=args.latency,
+		jitter=args.jitter,
+		failure_rate=args.failure_rate,
+		load_failure_rate=args.load_failure_rate,
+		track_failure_rate=args.track_failure_rate,
+		speed=args.speed,
+		deficit=args.deficit,
+		nulled=args.nulled,
+	)
+
+	try:
+		run(_serve(config, args.host, args.port))
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == "__main__":
+	main()
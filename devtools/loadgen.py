@@ -0,0 +1,290 @@
+from argparse import ArgumentParser
+from asyncio import (
+	Event,
+	Future,
+	TimeoutError,
+	create_task,
+	gather,
+	get_running_loop,
+	run,
+	sleep,
+	wait_for,
+)
+from collections import Counter
+from dataclasses import dataclass, field
+from json import dumps
+from random import Random
+from time import perf_counter
+from typing import Any
+from uuid import uuid4
+
+from discord import Client, Intents, Object
+
+from .fake_lavalink import FakeConfig, FakeLavalink
+from .offline import prepare_environment
+
+
+@dataclass(slots=True)
+class LoadReport:
+	guilds: int
+	rounds: int
+	elapsed: float = 0.0
+	search: list[float] = field(default_factory=list)
+	play: list[float] = field(default_factory=list)
+	start: list[float] = field(default_factory=list)
+	errors: Counter = field(default_factory=Counter)
+
+	@staticmethod
+	def percentile(samples: list[float], q: float) -> float:
+		if not samples:
+			return 0.0
+
+		ordered: list[float] = sorted(samples)
+		return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+	def summary(self) -> dict:
+		completed: int = len(self.start)
+
+		return dict({
+			"guilds": self.guilds,
+			"rounds": self.rounds,
+			"elapsed": round(self.elapsed, 3),
+			"throughput": round(completed / self.elapsed, 2) if self.elapsed else 0.0,
+			"completed": completed,
+			"errors": dict(self.errors),
+			**{
+				f"{name}_ms": {
+					"p50": self.percentile(samples, 0.5),
+					"p95": self.percentile(samples, 0.95),
+					"p99": self.percentile(samples, 0.99),
+					"max": self.percentile(samples, 1.0),
+				}
+				for name, samples in (
+					("search", self.search),
+					("play", self.play),
+					("start", self.start),
+				)
+			},
+		})
+
+
+class _SimGuild:
+	"""Stand in guild, voice handshake is answered right away"""
+
+	def __init__(self, id: int) -> None:
+		self.id: int = id
+		self.name: str = f"Simulated {id}"
+		self.voice_client: Any = None
+
+	def __repr__(self) -> str:
+		return f"<SimGuild id={self.id}>"
+
+	async def change_voice_state(self, *, channel: Any, **_) -> None:
+		if channel is None or self.voice_client is None:
+			return
+
+		create_task(self.__handshake(channel))
+
+	async def __handshake(self, channel: Any) -> None:
+		await self.voice_client.on_voice_state_update({
+			"channel_id": channel.id,
+			"session_id": uuid4().hex,
+		})
+		await self.voice_client.on_voice_server_update({
+			"token": uuid4().hex,
+			"endpoint": "simulated.discord.media",
+			"guild_id": self.id,
+		})
+
+
+class _SimChannel:
+	def __init__(self, guild: _SimGuild) -> None:
+		self.id: int = guild.id * 10
+		self.guild: _SimGuild = guild
+		self.name: str = f"voice-{guild.id}"
+		# One listener keep wavelink inactivity check quiet
+		self.members: list[Object] = [Object(id=guild.id + 1)]
+		self.members[0].bot = False
+
+	def __str__(self) -> str:
+		return self.name
+
+
+class SimClient(Client):
+	"""Client that never log in to Discord, only used to carry wavelink events"""
+
+	def __init__(self) -> None:
+		super().__init__(intents=Intents.none())
+
+		self.__user: Object = Object(id=1)
+		self.channels: dict[int, _SimChannel] = dict()
+		self.waiting: dict[int, Future] = dict()
+		self.node_ready: Event = Event()
+
+	@property
+	def user(self) -> Object:
+		return self.__user
+
+	def get_channel(self, id: int, /) -> _SimChannel | None:
+		return self.channels.get(id)
+
+	async def on_wavelink_node_ready(self, payload: Any) -> None:
+		self.node_ready.set()
+
+	async def on_wavelink_track_start(self, payload: Any) -> None:
+		future: Future | None = self.waiting.pop(payload.player.guild.id, None)
+		if future and not future.done():
+			future.set_result(None)
+
+	async def on_wavelink_track_exception(self, payload: Any) -> None:
+		future: Future | None = self.waiting.pop(payload.player.guild.id, None)
+		if future and not future.done():
+			future.set_exception(RuntimeError(str(payload.exception)))
+
+
+async def simulate(
+	*,
+	guilds: int,
+	rounds: int,
+	config: FakeConfig,
+	playlist_every: int = 5,
+	timeout: float = 10.0,
+	seed: int | None = None,
+) -> LoadReport:
+	"""Drive guilds simulated players against a fake node, each round is search, play and wait start"""
+	prepare_environment()
+
+	# Config is read at import, environment must be ready first
+	from wavelink import Node, Pool
+
+	from ModularBot.player import CustomPlayer, TrackPlayer, TrackType
+
+	server: FakeLavalink = FakeLavalink(config)
+	uri: str = await server.start()
+
+	client: SimClient = SimClient()
+	await client._async_setup_hook()
+
+	await CustomPlayer.track_store.open()
+	await Pool.connect(
+		nodes=[Node(uri=uri, password=config.password, identifier="FAKE")],
+		client=client,
+	)
+	await wait_for(client.node_ready.wait(), timeout)
+	CustomPlayer.balancer.watch(Pool.get_node("FAKE"))
+
+	searcher: TrackPlayer = TrackPlayer()
+	report: LoadReport = LoadReport(guilds=guilds, rounds=rounds)
+	rng: Random = Random(seed)
+
+	async def _guild(index: int) -> None:
+		guild: _SimGuild = _SimGuild(1000 + index)
+		channel: _SimChannel = _SimChannel(guild)
+		client.channels[channel.id] = channel
+
+		try:
+			player: CustomPlayer = CustomPlayer(client, channel)
+			guild.voice_client = player
+			await player.connect(reconnect=True, timeout=timeout)
+		except Exception as e:
+			report.errors[type(e).__name__] += rounds
+			return
+
+		for round in range(rounds):
+			is_playlist: bool = playlist_every > 0 and round % playlist_every == 0
+			query: str = (
+				f"https://www.youtube.com/playlist?list=SIM{index}x{round}"
+				if is_playlist
+				else f"simulated {index} {round} {rng.random():.6f}"
+			)
+
+			try:
+				started: float = perf_counter()
+				tracks = await searcher._custom_wavelink_searcher(
+					query, TrackType.YOUTUBE, is_search=not is_playlist
+				)
+				report.search.append(perf_counter() - started)
+
+				if is_playlist:
+					player.queue.put(tracks)
+					track = player.queue.get()
+				else:
+					track = tracks[0]
+
+				future: Future = get_running_loop().create_future()
+				client.waiting[guild.id] = future
+
+				started = perf_counter()
+				await player.play(track)
+				report.play.append(perf_counter() - started)
+
+				await wait_for(future, timeout)
+				report.start.append(perf_counter() - started)
+			except TimeoutError:
+				report.errors["StartTimeout"] += 1
+			except Exception as e:
+				report.errors[type(e).__name__] += 1
+			finally:
+				client.waiting.pop(guild.id, None)
+
+		await player.disconnect()
+
+	began: float = perf_counter()
+	try:
+		await gather(*(_guild(i) for i in range(guilds)))
+		report.elapsed = perf_counter() - began
+	finally:
+		await CustomPlayer.enrichment.close()
+		CustomPlayer.balancer.unwatch(Pool.get_node("FAKE"))
+		await Pool.close()
+		await CustomPlayer.track_store.close()
+		await server.stop()
+		await client.close()
+
+	# Let aiohttp close its transports
+	await sleep(0.1)
+	return report
+
+
+def main() -> None:
+	parser: ArgumentParser = ArgumentParser(
+		description="Drive simulated guilds against a fake Lavalink node"
+	)
+	parser.add_argument("--guilds", type=int, default=50)
+	parser.add_argument("--rounds", type=int, default=10)
+	parser.add_argument("--playlist-every", type=int, default=5)
+	parser.add_argument("--timeout", type=float, default=10.0)
+	parser.add_argument("--latency", type=float, default=0.005)
+	parser.add_argument("--jitter", type=float, default=0.02)
+	parser.add_argument("--failure-rate", type=float, default=0.0)
+	parser.add_argument("--load-failure-rate", type=float, default=0.0)
+	parser.add_argument("--track-failure-rate", type=float, default=0.0)
+	parser.add_argument("--start-delay", type=float, default=0.01)
+	parser.add_argument("--seed", type=int, default=None)
+	args = parser.parse_args()
+
+	config: FakeConfig = FakeConfig(
+		latency=args.latency,
+		jitter=args.jitter,
+		failure_rate=args.failure_rate,
+		load_failure_rate=args.load_failure_rate,
+		track_failure_rate=args.track_failure_rate,
+		start_delay=args.start_delay,
+		seed=args.seed,
+	)
+
+	report: LoadReport = run(
+		simulate(
+			guilds=args.guilds,
+			rounds=args.rounds,
+			config=config,
+			playlist_every=args.playlist_every,
+			timeout=args.timeout,
+			seed=args.seed,
+		)
+	)
+	print(dumps(report.summary(), indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,46 @@
+from os import environ, path
+from tempfile import gettempdir
+
+# Required by config.py at import time, placeholder is enough offline
+__REQUIRED: tuple[str, ...] = (
+	"SERVER_ID",
+	"BINCANG_HARAM_CHANNEL",
+	"VERIFICATION_CHANNEL",
+	"INVITE_CHANNEL",
+	"PRAYER_CHANNEL",
+	"WELCOME_CHANNEL",
+	"GOODBYE_CHANNEL",
+	"MEMBER_ANALYTICS",
+	"USER_ANALYTICS",
+	"BOT_ANALYTICS",
+	"CHANNEL_ANALYTICS",
+	"ROLE_ANALYTICS",
+	"TETUA",
+	"THE_MUSKETEER",
+	"BOT",
+	"MAGICIAN",
+	"MUTE",
+)
+
+
+def prepare_environment() -> None:
+	"""Fill config with placeholder, call before importing anything from ModularBot"""
+	for key in __REQUIRED:
+		environ.setdefault(key, "0")
+
+	if "TOKEN" not in environ:
+		token: str = path.join(gettempdir(), "modularbot-offline-token")
+		with open(token, "w") as f:
+			f.write("offline")
+
+		environ["TOKEN"] = token
+
+	environ.setdefault("LAVALINK_SERVER", "http://127.0.0.1:2333")
+	environ.setdefault("LAVALINK_PASSWORD", "youshallnotpass")
+	environ.setdefault(
+		"TRACK_STORE_FILE", path.join(gettempdir(), "modularbot-offline.db")
+	)
+
+	# Never matching placeholder, auto react compile these at import
+	for key in ("BAD_WORDS_REGEX", "STRESS_WORDS_REGEX", "HOLY_WORDS_REGEX"):
+		environ.setdefault(key, r"(?!x)x")